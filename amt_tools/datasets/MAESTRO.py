@@ -18,7 +18,8 @@ class _MAESTRO(MAPS):
 
     def __init__(self, base_dir=None, splits=None, hop_length=512, sample_rate=16000, data_proc=None,
                  profile=None, num_frames=None, split_notes=False, reset_data=False, store_data=False,
-                 save_data=True, save_loc=None, seed=0):
+                 save_data=True, save_loc=None, seed=0, save_format='npz',
+                 window_feats=False, shared_store=False, cache_bytes=0, cache_policy='lru'):
         """
         Initialize the dataset and establish parameter defaults in function signature.
 
@@ -28,7 +29,8 @@ class _MAESTRO(MAPS):
         """
 
         super().__init__(base_dir, splits, hop_length, sample_rate, data_proc, profile,
-                         num_frames, split_notes, reset_data, store_data, save_data, save_loc, seed)
+                         num_frames, split_notes, reset_data, store_data, save_data, save_loc, seed,
+                         save_format, window_feats, shared_store, cache_bytes, cache_policy)
 
     def get_tracks(self, split):
         """
@@ -17,7 +17,8 @@ class MAPS(TranscriptionDataset):
 
     def __init__(self, base_dir=None, splits=None, hop_length=512, sample_rate=16000, data_proc=None,
                  profile=None, num_frames=None, split_notes=False, reset_data=False, store_data=True,
-                 save_data=True, save_loc=None, seed=0):
+                 save_data=True, save_loc=None, seed=0, save_format='npz',
+                 window_feats=False, shared_store=False, cache_bytes=0, cache_policy='lru'):
         """
         Initialize the dataset and establish parameter defaults in function signature.
 
@@ -27,7 +28,8 @@ class MAPS(TranscriptionDataset):
         """
 
         super().__init__(base_dir, splits, hop_length, sample_rate, data_proc, profile,
-                         num_frames, split_notes, reset_data, store_data, save_data, save_loc, seed)
+                         num_frames, split_notes, reset_data, store_data, save_data, save_loc, seed,
+                         save_format, window_feats, shared_store, cache_bytes, cache_policy)
 
     def get_tracks(self, split):
         """
@@ -115,13 +117,13 @@ class MAPS(TranscriptionDataset):
                 # Create the path if it doesn't exist
                 os.makedirs(os.path.dirname(gt_path), exist_ok=True)
 
-                # Save the data as a NumPy zip file
+                # Save the data in the selected format
                 keys = (tools.KEY_FS, tools.KEY_AUDIO, tools.KEY_MULTIPITCH,
                         tools.KEY_ONSETS, tools.KEY_OFFSETS, tools.KEY_NOTES)
-                tools.save_pack_npz(gt_path, keys,
-                                    data[tools.KEY_FS], data[tools.KEY_AUDIO],
-                                    data[tools.KEY_MULTIPITCH], data[tools.KEY_ONSETS],
-                                    data[tools.KEY_OFFSETS], data[tools.KEY_NOTES])
+                self.save_entries(gt_path, keys,
+                                  data[tools.KEY_FS], data[tools.KEY_AUDIO],
+                                  data[tools.KEY_MULTIPITCH], data[tools.KEY_ONSETS],
+                                  data[tools.KEY_OFFSETS], data[tools.KEY_NOTES])
 
         return data
 
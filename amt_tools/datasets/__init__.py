@@ -25,3 +25,4 @@ from .common import *
 from .GuitarSet import *
 from .MAESTRO import *
 from .MAPS import *
+from .stores import *
@@ -1,18 +1,22 @@
 # Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
 
 # My imports
-from ..features import STFT
+from .stores import SharedTrackStore, TrackCache
+from ..features import STFT, FeatureModule
 from .. import tools
 
 # Regular imports
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from torch.utils.data import Dataset
 from abc import abstractmethod
-from copy import deepcopy
 from tqdm import tqdm
 
 import numpy as np
 import warnings
+import hashlib
 import shutil
+import json
+import time
 import os
 
 # TODO - more datasets - MusicNet, Slakh, Drums
@@ -30,7 +34,8 @@ class TranscriptionDataset(Dataset):
     """
 
     def __init__(self, base_dir, splits, hop_length, sample_rate, data_proc, profile, num_frames,
-                 split_notes, reset_data, store_data, save_data, save_loc, seed):
+                 split_notes, reset_data, store_data, save_data, save_loc, seed, save_format,
+                 window_feats, shared_store, cache_bytes, cache_policy):
         """
         Initialize parameters common to all datasets as fields and instantiate
         as a PyTorch Dataset.
@@ -63,6 +68,23 @@ class TranscriptionDataset(Dataset):
           Location for saving and loading pre-organized ground-truth and calculated features
         seed : int
           The seed for random number generation
+        save_format : string
+          Format for saving ground-truth and features, either
+          'npz' - NumPy zip file containing all entries of a track, or
+          'npy' - directory of NumPy files (one per entry), which are memory-mapped when loaded
+        window_feats : bool
+          Flag to compute features only for the sampled window (and its receptive field) if they
+          have not been saved, rather than for the whole track - these features are never saved
+          or stored, and they only match those of the whole track if a fixed dB reference is used
+        shared_store : bool
+          Flag to store data (if store_data=True) within a single read-only memory-mapped file,
+          such that processes (e.g. DataLoader workers) share it instead of copying it - the
+          features for each track are calculated upfront, since stored data cannot be modified
+        cache_bytes : int
+          Budget of bytes for caching recently or frequently sampled tracks (if store_data=False)
+          in RAM, separately within each process, instead of reloading them each time - 0 to disable
+        cache_policy : string
+          Replacement policy for the cache, either 'lru' (least recently used) or 'lfu' (least frequently used)
         """
 
         # Select a default base directory path if none was provided
@@ -108,11 +130,26 @@ class TranscriptionDataset(Dataset):
 
         # Set the storing and saving parameters
         self.store_data = store_data
+        self.shared_store = shared_store
         self.save_data = save_data
         if save_loc is None:
             save_loc = tools.DEFAULT_FEATURES_GT_DIR
         self.save_loc = save_loc
 
+        # Make sure the chosen format for saving data is supported
+        if save_format not in [tools.NPZ_EXT, tools.NPY_EXT]:
+            raise ValueError(f'Unsupported format \'{save_format}\' for saving data.')
+        self.save_format = save_format
+
+        # Set the flag for computing features over sampled windows
+        self.window_feats = window_feats
+
+        # Initialize a cache for track data if it will not all be stored
+        if not self.store_data and cache_bytes > 0:
+            self.cache = TrackCache(cache_bytes, cache_policy)
+        else:
+            self.cache = None
+
         self.reset_data = reset_data
         # Remove any saved ground-truth for the dataset if reset_data is selected
         if os.path.exists(self.get_gt_dir()) and self.reset_data:
@@ -137,8 +174,23 @@ class TranscriptionDataset(Dataset):
         # Load the ground-truth for each track into RAM
         if self.store_data:
             self.data = {}
+            if self.shared_store:
+                # Construct a path to a file unique to this dataset object
+                store_path = SharedTrackStore.get_store_path(os.path.join(self.save_loc, self.dataset_name(),
+                                                                          tools.SHARED_STORE_DIR))
+                # Initialize the shared store
+                store = SharedTrackStore(store_path)
             for track in tqdm(self.tracks):
                 self.data[track] = self.load(track)
+                if self.shared_store:
+                    # Calculate the features and add them to the track data
+                    self.calculate_feats(self.data[track])
+                    # Move the track data into the shared store
+                    store.add(track, self.data.pop(track))
+            if self.shared_store:
+                # Replace the dictionary with the complete shared store
+                store.finalize()
+                self.data = store
 
     def __len__(self):
         """
@@ -207,8 +259,8 @@ class TranscriptionDataset(Dataset):
 
         # Determine what type of argument was given
         if isinstance(data, dict):
-            # Copy the track's data into a local dictionary
-            data = deepcopy(data)
+            # Copy the track's data (but not the entries) into a local dictionary
+            data = dict(data)
         else:
             # We assume a track name was given
             data = {tools.KEY_TRACK : data}
@@ -221,7 +273,7 @@ class TranscriptionDataset(Dataset):
         # Check if the features already exist
         if os.path.exists(feats_path):
             # If so, load the features
-            feats_dict = tools.load_unpack_npz(feats_path)
+            feats_dict = self.load_entries(feats_path)
             feats = feats_dict[tools.KEY_FEATS]
             feats = feats.item() if feats.size == 1 else feats
 
@@ -239,9 +291,9 @@ class TranscriptionDataset(Dataset):
             if self.save_data:
                 # Get the appropriate path for saving the features
                 os.makedirs(os.path.dirname(feats_path), exist_ok=True)
-                # Save the features to memory as a NumPy zip file
+                # Save the features to memory in the selected format
                 keys = (tools.KEY_FEATS, tools.KEY_FS, tools.KEY_HOP)
-                tools.save_pack_npz(feats_path, keys, feats, fs, hop_length)
+                self.save_entries(feats_path, keys, feats, fs, hop_length)
 
         # Make sure there is agreement between dataset and features
         if self.sample_rate != fs or self.hop_length != hop_length:
@@ -286,28 +338,47 @@ class TranscriptionDataset(Dataset):
           Dictionary with each entry sliced for the random or provided interval
         """
 
+        # Check to see if a specific sequence length was given
+        if seq_length is None:
+            # If not, and this Dataset object has a sequence length, use it
+            seq_length = self.seq_length
+
         if self.store_data:
-            # Copy the track's ground-truth data into a local dictionary
-            data = deepcopy(self.data[track_id])
+            # Copy the track's ground-truth data (but not the entries) into a local dictionary,
+            # such that the stored entries are never modified and slices are views into them
+            data = dict(self.data[track_id])
         else:
-            # Load the track's ground-truth
-            data = self.load(track_id)
+            # Check whether the track's data is cached (recording a hit or miss)
+            cached = None if self.cache is None else self.cache.get(track_id)
+
+            if cached is not None:
+                # Copy the cached data (but not the entries) into a local dictionary
+                data = dict(cached)
+            else:
+                # Load the track's ground-truth (memory-mapped if saved as NumPy files)
+                data = self.load(track_id)
 
-        if tools.KEY_FEATS not in data.keys():
+        # Determine whether features should only be computed for the sampled window
+        window_feats = self.window_feats and seq_length is not None and \
+                       tools.KEY_FEATS not in data.keys() and \
+                       not os.path.exists(self.get_feats_dir(track_id))
+
+        if tools.KEY_FEATS not in data.keys() and not window_feats:
             # Calculate the features and add to the dictionary
             data.update(self.calculate_feats(data))
 
+        if self.cache is not None and track_id not in self.cache:
+            # Add the track's data (with any features) to the cache and continue with
+            # the cached entries (but not the cached dictionary), which are read-only
+            data = dict(self.cache.add(track_id, data))
+
         # Determine which keys exist after calculating features
         keys = list(data.keys())
 
-        # Check to see if a specific sequence length was given
+        # Check to see if the whole track is desired
         if seq_length is None:
-            # If not, and this Dataset object has a sequence length, use it
-            if self.seq_length is not None:
-                seq_length = self.seq_length
-            # Otherwise, we assume the whole track is desired and perform no further actions
-            else:
-                return data
+            # Perform no further actions
+            return data
 
         # If a specific starting sample was not provided, sample one randomly
         if sample_start is None:
@@ -324,6 +395,12 @@ class TranscriptionDataset(Dataset):
         # Calculate the last sample included in the slice
         sample_end = sample_start + seq_length
 
+        if window_feats:
+            # Calculate the features only for the frames within the slice
+            feats = self.data_proc.process_frames(data[tools.KEY_AUDIO], frame_start, self.num_frames)
+            # Calculate the frame times for the whole track (sliced below)
+            data[tools.KEY_TIMES] = self.data_proc.get_times(data[tools.KEY_AUDIO])
+
         # Slice the audio
         data[tools.KEY_AUDIO] = data[tools.KEY_AUDIO][..., sample_start : sample_end]
 
@@ -331,7 +408,7 @@ class TranscriptionDataset(Dataset):
         if tools.KEY_NOTES in keys:
             # Notes entry has not been popped by a dataloader
             notes = data[tools.KEY_NOTES]
-        elif tools.KEY_NOTES in self.data[track_id].keys():
+        elif self.store_data and tools.KEY_NOTES in self.data[track_id].keys():
             # Notes entry has been popped and must be added again
             notes = self.data[track_id][tools.KEY_NOTES]
         else:
@@ -352,8 +429,59 @@ class TranscriptionDataset(Dataset):
         # Slice the remaining dictionary entries
         data = tools.slice_track(data, frame_start, frame_end, skipped_keys)
 
+        # Check if fixed features were calculated for the slice
+        if window_feats and feats is not None:
+            # Add the features to the data dictionary
+            data[tools.KEY_FEATS] = feats
+
         return data
 
+    def is_saved(self, track):
+        """
+        Determine whether the ground-truth and features of a track have already been saved.
+        Since all data is saved atomically, the existence of the files implies they are valid.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track to check
+
+        Returns
+        ----------
+        saved : bool
+          Whether or not the ground-truth and features have been saved
+        """
+
+        # Check for both the saved ground-truth and the saved features
+        saved = os.path.exists(self.get_gt_dir(track)) and os.path.exists(self.get_feats_dir(track))
+
+        return saved
+
+    def precompute_track(self, track):
+        """
+        Compute and save (if they do not already exist) the ground-truth and features of a track.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track to process
+
+        Returns
+        ----------
+        duration : float
+          Duration of the track's audio in seconds
+        """
+
+        # Load or compute (and save) the ground-truth
+        data = self.load(track)
+        # Load or compute (and save) the features
+        self.calculate_feats(data)
+
+        # Determine the duration of the audio
+        duration = len(data[tools.KEY_AUDIO]) / self.sample_rate
+
+        return duration
+
     @abstractmethod
     def get_tracks(self, split):
         """
@@ -393,7 +521,7 @@ class TranscriptionDataset(Dataset):
         # Check if an entry for the data exists
         if os.path.exists(gt_path):
             # Load and unpack the data
-            data = tools.load_unpack_npz(gt_path)
+            data = self.load_entries(gt_path)
 
             # Make sure there is agreement between dataset and saved data
             if self.sample_rate != data[tools.KEY_FS].item():
@@ -408,6 +536,39 @@ class TranscriptionDataset(Dataset):
 
         return data
 
+    def get_gt_config_hash(self, length=10):
+        """
+        Obtain a stable hash of everything the saved ground-truth depends on besides
+        the track itself, i.e. the sampling rate of the audio, the frame times (which
+        are determined by the hop length and the feature extraction module), and the
+        instrument profile.
+
+        Parameters
+        ----------
+        length : int
+          Number of characters of the hash to keep
+
+        Returns
+        ----------
+        config_hash : string
+          Hexadecimal digest of the configuration of the ground-truth
+        """
+
+        # Collect the configuration of the instrument profile
+        profile = {key : FeatureModule.get_config_entry(value) for key, value in vars(self.profile).items()}
+        profile['name'] = self.profile.__class__.__name__
+
+        # Collect everything the ground-truth depends on
+        config = {'sample_rate' : FeatureModule.get_config_entry(self.sample_rate),
+                  'hop_length' : FeatureModule.get_config_entry(self.hop_length),
+                  'data_proc' : self.data_proc.get_config_hash(),
+                  'profile' : profile}
+
+        # Serialize the configuration in a stable way and hash it
+        config_hash = hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:length]
+
+        return config_hash
+
     def get_gt_dir(self, track=None):
         """
         Get the path for the ground-truth directory or a track's ground-truth.
@@ -423,12 +584,16 @@ class TranscriptionDataset(Dataset):
           Path to the ground-truth directory or a specific track's ground-truth
         """
 
+        # Tag the directory with a hash of everything the ground-truth depends on,
+        # such that ground-truth from different configurations can coexist
+        gt_tag = f'{tools.GROUND_TRUTH_DIR}_{self.get_gt_config_hash()}'
+
         # Get the path to the ground truth directory
-        path = os.path.join(self.save_loc, self.dataset_name(), tools.GROUND_TRUTH_DIR)
+        path = os.path.join(self.save_loc, self.dataset_name(), gt_tag)
 
-        # Add the track name and the .npz extension if a track was provided
+        # Add the track name and the extension of the save format if a track was provided
         if track is not None:
-            path = os.path.join(path, f'{track}.{tools.NPZ_EXT}')
+            path = os.path.join(path, f'{track}.{self.save_format}')
 
         return path
 
@@ -447,15 +612,64 @@ class TranscriptionDataset(Dataset):
           Path to the features directory or a specific track's features
         """
 
+        # Tag the directory with the module name and a hash of its configuration,
+        # such that features from different configurations can coexist
+        features_tag = f'{self.data_proc.features_name()}_{self.data_proc.get_config_hash()}'
+
         # Get the path to the features directory
-        path = os.path.join(self.save_loc, self.dataset_name(), self.data_proc.features_name())
+        path = os.path.join(self.save_loc, self.dataset_name(), features_tag)
 
-        # Add the track name and the .npz extension if a track was provided
+        # Add the track name and the extension of the save format if a track was provided
         if track is not None:
-            path = os.path.join(path, f'{track}.{tools.NPZ_EXT}')
+            path = os.path.join(path, f'{track}.{self.save_format}')
 
         return path
 
+    def save_entries(self, path, keys, *args):
+        """
+        Save entries of track data (ground-truth or features) in the selected format.
+
+        Parameters
+        ----------
+        path : string
+          Path to the track's ground-truth or features
+        keys : list of str
+          Keys corresponding to the entries
+        *args : object
+          Entries to save
+        """
+
+        if self.save_format == tools.NPY_EXT:
+            # Save each entry as a separate NumPy file
+            tools.save_pack_npy(path, keys, *args)
+        else:
+            # Save the entries as a NumPy zip file
+            tools.save_pack_npz(path, keys, *args)
+
+    def load_entries(self, path):
+        """
+        Load entries of track data (ground-truth or features) saved in the selected format.
+
+        Parameters
+        ----------
+        path : string
+          Path to the track's ground-truth or features
+
+        Returns
+        ----------
+        data : dict
+          Dictionary containing the loaded entries
+        """
+
+        if self.save_format == tools.NPY_EXT:
+            # Memory-map the arrays, unless they are going to be stored in RAM anyway
+            data = tools.load_unpack_npy(path, mmap_mode=None if self.store_data else 'r')
+        else:
+            # Load all entries from the NumPy zip file
+            data = tools.load_unpack_npz(path)
+
+        return data
+
     @staticmethod
     @abstractmethod
     def available_splits():
@@ -498,3 +712,66 @@ class TranscriptionDataset(Dataset):
 
         # Create the base directory
         os.makedirs(save_dir)
+
+
+def precompute(dataset_class, splits=None, data_proc=None, num_workers=None, **kwargs):
+    """
+    Compute and save the ground-truth and features for all tracks within
+    partitions of a dataset ahead of time, using a pool of processes.
+    Tracks whose ground-truth and features have already been saved are skipped.
+
+    Parameters
+    ----------
+    dataset_class : type
+      TranscriptionDataset subclass to instantiate
+    splits : list of strings or None (optional)
+      Names of partitions to process - all available partitions if unspecified
+    data_proc : FeatureModule (features/common.py) or None (optional)
+      Feature extraction module whose features to save
+    num_workers : int or None (optional)
+      Number of processes to use - the number of available processors if unspecified
+    **kwargs : dict
+      Any other arguments for the dataset (storing and saving arguments are overridden)
+
+    Returns
+    ----------
+    dataset : TranscriptionDataset
+      Dataset which was used to compute the ground-truth and features
+    """
+
+    # Make sure that data is saved but not stored
+    kwargs.update({'store_data' : False, 'save_data' : True})
+
+    # Instantiate the dataset
+    dataset = dataset_class(splits=splits, data_proc=data_proc, **kwargs)
+
+    # Determine which tracks have not been completely saved yet
+    tracks = [track for track in dataset.tracks if not dataset.is_saved(track)]
+
+    # Keep track of the amount of audio processed and the elapsed time
+    total_duration, start_time = 0, time.time()
+
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        # Distribute the tracks among the processes
+        futures = [executor.submit(dataset.precompute_track, track) for track in tracks]
+
+        # Initialize a progress bar, starting with the number of skipped tracks
+        progress = tqdm(total=len(dataset.tracks), initial=len(dataset.tracks) - len(tracks))
+
+        # Loop through the tracks as they finish
+        for num_processed, future in enumerate(as_completed(futures), 1):
+            # Add the duration of the processed audio
+            total_duration += future.result()
+
+            # Determine the elapsed time
+            elapsed_time = max(time.time() - start_time, 1E-9)
+
+            # Report the throughput in tracks and in seconds of audio per second
+            progress.set_postfix(tracks_per_sec=f'{num_processed / elapsed_time:.2f}',
+                                 audio_per_sec=f'{total_duration / elapsed_time:.1f}',
+                                 refresh=False)
+            progress.update(1)
+
+        progress.close()
+
+    return dataset
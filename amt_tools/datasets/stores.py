@@ -0,0 +1,653 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from .. import tools
+
+# Regular imports
+from collections import OrderedDict
+
+import numpy as np
+import weakref
+import uuid
+import os
+
+try:
+    # File locks are used to determine whether the file of a store is still in use
+    import fcntl
+except ImportError:
+    # Files of stores are only removed by the processes which created them
+    fcntl = None
+
+
+class SharedTrackStore(object):
+    """
+    Implements a read-only store for track data, where the array entries of all tracks
+    are packed into a single memory-mapped file and located through an offset index.
+
+    Each entry retrieved from the store is a view into the mapped file. Since the file
+    is only ever read, processes which share the store (e.g. DataLoader workers) also
+    share the physical memory backing the arrays, regardless of how many there are.
+
+    The file is removed once the store is garbage-collected or the interpreter exits.
+    While the store exists, its process (and any processes forked from it) holds a shared
+    lock on the file. Files left behind by processes which were killed before they could
+    clean up are no longer locked, and are removed the next time a store is created in
+    the same directory. Since the lock is held by the file system rather than checked
+    through process IDs, files of stores on other hosts or in other containers sharing
+    the directory are left alone. Where file locks are unavailable, nothing is removed.
+    """
+
+    def __init__(self, path, alignment=64):
+        """
+        Initialize the fields of the store.
+
+        Parameters
+        ----------
+        path : string
+          Path to the file which will hold the array entries
+        alignment : int
+          Number of bytes to which the offset of each array is aligned
+        """
+
+        self.path = path
+        self.alignment = alignment
+
+        # Index containing, for each track, the keys (in-order),
+        # the location of the arrays, and any non-array entries
+        self.index = dict()
+
+        # Number of bytes written to the file so far
+        self.size = 0
+
+        # Handle for writing to the file (only while adding tracks)
+        self.arena_file = None
+        # Memory-mapped contents of the file (only after adding tracks)
+        self.arena = None
+
+        # Keep track of the process which created the file
+        self.owner = os.getpid()
+
+        # Remove any files left behind by stores which no longer exist
+        self.remove_stale(os.path.dirname(self.path))
+
+        # Make sure the directory for the file exists
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Create the file and mark it as in use
+        self.lock = lock_store_file(self.path)
+
+        # Remove the file once the store is garbage-collected or the interpreter exits
+        self.finalizer = weakref.finalize(self, remove_store_file, self.path, self.owner, self.lock)
+
+    def add(self, track, data):
+        """
+        Append the entries of a track to the file.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track
+        data : dict
+          Dictionary containing the data for the track
+        """
+
+        if self.arena_file is None:
+            # Open the file for writing
+            self.arena_file = open(self.path, 'wb')
+
+        # Initialize dictionaries for the locations of arrays and any other entries
+        arrays, others = dict(), dict()
+
+        # Loop through the entries of the track
+        for key, entry in data.items():
+            # Check if the entry is an array which can be written as raw bytes
+            if isinstance(entry, np.ndarray) and entry.ndim > 0 and not entry.dtype.hasobject:
+                # Pad the file such that the array begins at an aligned offset
+                padding = (-self.size) % self.alignment
+                self.arena_file.write(bytes(padding))
+                self.size += padding
+
+                # Make sure the array is laid out contiguously before writing it
+                entry = np.ascontiguousarray(entry)
+                entry.tofile(self.arena_file)
+
+                # Keep track of where the array is located and how to interpret it
+                arrays[key] = (self.size, entry.dtype.str, entry.shape)
+                self.size += entry.nbytes
+            else:
+                # Keep the entry within the index
+                others[key] = entry
+
+        # Add the track to the index
+        self.index[track] = (list(data.keys()), arrays, others)
+
+    def finalize(self):
+        """
+        Stop adding tracks and map the contents of the file into memory (read-only).
+        """
+
+        if self.arena_file is not None:
+            # Close the file now that it is complete
+            self.arena_file.close()
+            self.arena_file = None
+
+        # Map the file into memory
+        self.get_arena()
+
+    def get_arena(self):
+        """
+        Obtain the memory-mapped contents of the file, mapping it first if necessary.
+
+        Returns
+        ----------
+        arena : ndarray
+          Read-only bytes of the file
+        """
+
+        if self.arena is None:
+            if self.size > 0:
+                # Map the file into memory as raw bytes
+                self.arena = np.memmap(self.path, dtype=np.uint8, mode='r', shape=(self.size,))
+            else:
+                # Memory-mapping an empty file is not possible
+                self.arena = np.empty(0, dtype=np.uint8)
+
+        return self.arena
+
+    def __getitem__(self, track):
+        """
+        Retrieve the data for a track.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track
+
+        Returns
+        ----------
+        data : dict
+          Dictionary containing the data for the track, where arrays are read-only views
+        """
+
+        # Unpack the index entry for the track
+        keys, arrays, others = self.index[track]
+
+        # Obtain the memory-mapped contents of the file
+        arena = self.get_arena()
+
+        # Initialize a dictionary to hold the track data
+        data = dict()
+
+        # Loop through the keys in their original order
+        for key in keys:
+            if key in arrays.keys():
+                # Unpack the location of the array
+                offset, dtype, shape = arrays[key]
+                # Determine the number of bytes spanned by the array
+                nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+                # Interpret the relevant bytes as the original array
+                data[key] = arena[offset : offset + nbytes].view(dtype).reshape(shape)
+            else:
+                # Add the non-array entry
+                data[key] = others[key]
+
+        return data
+
+    def __contains__(self, track):
+        """
+        Determine whether a track exists within the store.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track
+
+        Returns
+        ----------
+        exists : bool
+          Whether or not the track exists within the store
+        """
+
+        exists = track in self.index.keys()
+
+        return exists
+
+    def __len__(self):
+        """
+        Defines the notion of length for the store.
+
+        Returns
+        ----------
+        length : int
+          Number of tracks within the store
+        """
+
+        length = len(self.index)
+
+        return length
+
+    def keys(self):
+        """
+        Obtain the names of the tracks within the store.
+
+        Returns
+        ----------
+        tracks : list of string
+          Names of the tracks within the store
+        """
+
+        tracks = list(self.index.keys())
+
+        return tracks
+
+    def pop(self, track):
+        """
+        Remove a track from the store. Its bytes remain within the file.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track
+
+        Returns
+        ----------
+        data : dict
+          Dictionary containing the data for the removed track
+        """
+
+        # Retrieve the data before removing the track from the index
+        data = self[track]
+        self.index.pop(track)
+
+        return data
+
+    @staticmethod
+    def get_store_path(directory):
+        """
+        Construct a path to a new file for a store, unique to the current process and store.
+
+        Parameters
+        ----------
+        directory : string
+          Directory in which to place the file
+
+        Returns
+        ----------
+        path : string
+          Path to the file, named <process ID>-<unique ID>.dat
+        """
+
+        # Begin the name of the file with the ID of the process, followed by a unique ID
+        path = os.path.join(directory, f'{os.getpid()}-{uuid.uuid4().hex}.{tools.DAT_EXT}')
+
+        return path
+
+    @staticmethod
+    def remove_stale(directory):
+        """
+        Remove the files of stores within a directory which are no longer in
+        use, i.e. which are not locked by any store (see lock_store_file).
+
+        Parameters
+        ----------
+        directory : string
+          Directory containing files of stores
+        """
+
+        if fcntl is None or not os.path.isdir(directory):
+            # There is nothing which can be removed
+            return
+
+        # Loop through the files of stores within the directory
+        for file_name in os.listdir(directory):
+            if not file_name.endswith(f'.{tools.DAT_EXT}'):
+                # The file does not belong to a store
+                continue
+
+            # Construct the path to the file
+            path = os.path.join(directory, file_name)
+
+            try:
+                # Open the file (for writing, as required for exclusive locks on some file systems)
+                handle = os.open(path, os.O_RDWR)
+            except OSError:
+                # The file was already removed or belongs to another user
+                continue
+
+            try:
+                # Attempt to lock the file exclusively, which is only possible if no store holds it
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                # The file is still in use, or locks are not supported
+                pass
+            else:
+                # Remove the file left behind
+                remove_store_file(path)
+            finally:
+                # Release the handle (and any lock)
+                os.close(handle)
+
+    def __getstate__(self):
+        """
+        Obtain the state of the store for pickling (e.g. for spawned DataLoader workers),
+        leaving out the mapped contents of the file, which are re-mapped upon first access.
+
+        Returns
+        ----------
+        state : dict
+          Fields of the store
+        """
+
+        # Copy the fields of the store
+        state = self.__dict__.copy()
+
+        # Remove the file handle and the memory-mapped contents
+        state['arena_file'] = None
+        state['arena'] = None
+
+        # The file is only locked and removed by the process which created it
+        state['lock'] = None
+        state['finalizer'] = None
+
+        return state
+
+
+def lock_store_file(path):
+    """
+    Create the file of a shared track store and hold a shared lock on it, which marks
+    the file as in use for as long as the returned handle (or a copy of it within a
+    forked process) remains open (see SharedTrackStore.remove_stale).
+
+    Parameters
+    ----------
+    path : string
+      Path to the file
+
+    Returns
+    ----------
+    handle : int
+      Open file descriptor for the file
+    """
+
+    while True:
+        # Create the file if it does not exist yet
+        handle = os.open(path, os.O_RDWR | os.O_CREAT)
+
+        if fcntl is None:
+            # The file cannot be locked
+            break
+
+        try:
+            # Lock the file, waiting for any store which is removing it
+            fcntl.flock(handle, fcntl.LOCK_SH)
+        except OSError:
+            # Locks are not supported, so no store will remove the file
+            break
+
+        try:
+            # Check whether the locked file is still the one at the path
+            locked = os.path.samestat(os.stat(path), os.fstat(handle))
+        except FileNotFoundError:
+            # The file was removed
+            locked = False
+
+        if locked:
+            # The file is marked as in use
+            break
+
+        # The file was removed as stale before it was locked, so create it again
+        os.close(handle)
+
+    return handle
+
+
+def remove_store_file(path, owner=None, lock=None):
+    """
+    Remove the file of a shared track store.
+
+    Parameters
+    ----------
+    path : string
+      Path to the file
+    owner : int or None
+      ID of the process responsible for the file - None to remove it regardless
+    lock : int or None
+      Open file descriptor holding the lock on the file, to release after removing it
+    """
+
+    # Only the process which created the file is responsible for it (e.g. not forked workers)
+    if owner is None or owner == os.getpid():
+        try:
+            # Remove the file
+            os.remove(path)
+        except FileNotFoundError:
+            # The file has already been removed
+            pass
+
+        if lock is not None:
+            # Release the lock on the file
+            os.close(lock)
+
+
+class TrackCache(object):
+    """
+    Implements an in-process cache for track data, which holds as many tracks in RAM as
+    fit within a budget of bytes and evicts tracks according to a replacement policy.
+
+    Since each process (e.g. DataLoader worker) maintains its own cache, the budget
+    applies separately to each process.
+    """
+
+    def __init__(self, max_bytes, policy='lru'):
+        """
+        Initialize the fields of the cache.
+
+        Parameters
+        ----------
+        max_bytes : int
+          Maximum number of bytes of array entries to hold
+        policy : string
+          Replacement policy for choosing which track to evict, either
+          'lru' - least recently used track, or
+          'lfu' - least frequently used track (least recently used among ties)
+        """
+
+        # Make sure the chosen replacement policy is supported
+        if policy not in ['lru', 'lfu']:
+            raise ValueError(f'Unsupported cache replacement policy \'{policy}\'.')
+
+        self.max_bytes = max_bytes
+        self.policy = policy
+
+        # Cached data for each track, ordered from least to most recently used
+        self.entries = OrderedDict()
+        # Number of bytes and number of accesses for each cached track
+        self.sizes = dict()
+        self.counts = dict()
+
+        # Number of bytes currently held
+        self.size = 0
+
+        # Initialize the counters for cache performance
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def get_nbytes(data):
+        """
+        Determine the number of bytes occupied by the arrays of a track.
+
+        Parameters
+        ----------
+        data : dict
+          Dictionary containing the data for the track
+
+        Returns
+        ----------
+        nbytes : int
+          Total number of bytes of all array entries
+        """
+
+        # Add up the size of all array entries
+        nbytes = sum([entry.nbytes for entry in data.values() if isinstance(entry, np.ndarray)])
+
+        return nbytes
+
+    def get(self, track):
+        """
+        Retrieve the data for a track if it is cached, recording a hit or a miss.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track
+
+        Returns
+        ----------
+        data : dict or None
+          Dictionary containing the (read-only) data for the track, or None if it is not cached
+        """
+
+        if track in self.entries.keys():
+            # Record the hit and the access
+            self.hits += 1
+            self.counts[track] += 1
+            # Mark the track as most recently used
+            self.entries.move_to_end(track)
+            data = self.entries[track]
+        else:
+            # Record the miss
+            self.misses += 1
+            data = None
+
+        return data
+
+    def add(self, track, data):
+        """
+        Add the data for a track to the cache, evicting other tracks if necessary.
+        Any memory-mapped arrays are read into RAM, such that the track is resident.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track
+        data : dict
+          Dictionary containing the data for the track
+
+        Returns
+        ----------
+        cached : dict
+          Dictionary containing the (read-only) cached data for the track,
+          or the original data if the track could not be cached
+        """
+
+        if track in self.entries.keys():
+            # The track has already been cached
+            return self.entries[track]
+
+        # Determine how many bytes the track will occupy
+        nbytes = self.get_nbytes(data)
+
+        if nbytes > self.max_bytes:
+            # Do not cache tracks which could never fit within the budget
+            return data
+
+        # Evict tracks until the new track fits within the budget
+        while self.size + nbytes > self.max_bytes:
+            self.evict()
+
+        # Initialize a dictionary to hold the cached data
+        cached = dict()
+
+        # Loop through the entries of the track
+        for key, entry in data.items():
+            if isinstance(entry, np.ndarray):
+                # Read any memory-mapped array into RAM
+                if isinstance(entry, np.memmap):
+                    entry = np.array(entry)
+                else:
+                    # Create a view, such that the original array remains writeable
+                    entry = entry.view()
+                # Make sure the cached array is never modified
+                entry.flags.writeable = False
+            cached[key] = entry
+
+        # Add the track to the cache as the most recently used
+        self.entries[track] = cached
+        self.sizes[track] = nbytes
+        # Count the access which led to the track being added
+        self.counts[track] = 1
+        self.size += nbytes
+
+        return cached
+
+    def evict(self):
+        """
+        Remove a track from the cache according to the replacement policy.
+        """
+
+        if self.policy == 'lru':
+            # Choose the least recently used track
+            track = next(iter(self.entries.keys()))
+        else:
+            # Choose the least frequently used track (the first is least recently used)
+            track = min(self.entries.keys(), key=lambda t: self.counts[t])
+
+        # Remove the track and its bookkeeping
+        self.entries.pop(track)
+        self.counts.pop(track)
+        self.size -= self.sizes.pop(track)
+
+        # Record the eviction
+        self.evictions += 1
+
+    def get_stats(self):
+        """
+        Obtain the counters for cache performance.
+
+        Returns
+        ----------
+        stats : dict
+          Number of hits, misses, evictions, cached tracks, and bytes held
+        """
+
+        stats = {'hits' : self.hits,
+                 'misses' : self.misses,
+                 'evictions' : self.evictions,
+                 'tracks' : len(self.entries),
+                 'bytes' : self.size}
+
+        return stats
+
+    def __contains__(self, track):
+        """
+        Determine whether a track is cached (without recording a hit or a miss).
+
+        Parameters
+        ----------
+        track : string
+          Name of the track
+
+        Returns
+        ----------
+        exists : bool
+          Whether or not the track is cached
+        """
+
+        exists = track in self.entries.keys()
+
+        return exists
+
+    def __len__(self):
+        """
+        Defines the notion of length for the cache.
+
+        Returns
+        ----------
+        length : int
+          Number of cached tracks
+        """
+
+        length = len(self.entries)
+
+        return length
@@ -5,7 +5,13 @@ from . import tools
 
 # Regular imports
 from mir_eval.transcription import precision_recall_f1_overlap as evaluate_notes
+from mir_eval.transcription import validate as validate_notes
+from mir_eval.multipitch import compute_accuracy, compute_err_score
 from mir_eval.multipitch import evaluate as evaluate_frames
+from scipy.sparse.csgraph import maximum_bipartite_matching
+from mir_eval.util import f_measure
+from scipy.sparse import csr_matrix
+from collections import OrderedDict
 from abc import abstractmethod
 from scipy.stats import hmean
 from copy import deepcopy
@@ -25,6 +31,236 @@ EPSILON = sys.float_info.epsilon
 ##################################################
 
 
+class ResultsAccumulator(object):
+    """
+    Implements a streaming accumulator for results dictionaries, which tracks either all of
+    the individual values for each metric within growable arrays, or only running sums and
+    counts, instead of re-allocating the tracked results each time new results are added.
+    """
+
+    def __init__(self, keep_values=True):
+        """
+        Initialize the fields of the accumulator.
+
+        Parameters
+        ----------
+        keep_values : bool
+          Whether to keep all of the individual values for each metric, in which case
+          averages are computed exactly as they would be for the appended values
+        """
+
+        self.keep_values = keep_values
+
+        # Initialize the tracking
+        self.counts = None
+        self.sums = None
+        self.values = None
+        self.sizes = None
+        self.reset()
+
+    def reset(self):
+        """
+        Reset the tracking to empty dictionaries.
+        """
+
+        # Count for each metric, indexed by the path of keys leading to the metric
+        self.counts = dict()
+
+        # Running sum for each metric (if not keeping values)
+        self.sums = dict()
+
+        # Buffer of values and number of values used for each metric (if keeping values)
+        self.values = dict()
+        self.sizes = dict()
+
+    def add_values(self, path, values):
+        """
+        Add values to the tracking for a single metric.
+
+        Parameters
+        ----------
+        path : tuple of string
+          Path of keys leading to the metric
+        values : ndarray
+          Values to add (flattened)
+        """
+
+        # Add the values to the count
+        self.counts[path] = self.counts.get(path, 0) + values.size
+
+        if not self.keep_values:
+            # Add the values to the running sum
+            self.sums[path] = self.sums.get(path, 0) + np.sum(values, dtype=np.float64)
+            return
+
+        # Determine how many values are currently kept
+        size = self.sizes.get(path, 0)
+
+        # Obtain the current buffer, defaulting to an empty buffer of the same type
+        buffer = self.values.get(path)
+        if buffer is None:
+            buffer = np.empty(0, dtype=values.dtype)
+
+        # Determine the data type which can represent both the kept and new values
+        dtype = buffer.dtype if values.dtype == buffer.dtype else np.result_type(buffer, values)
+
+        if size + values.size > buffer.size or dtype != buffer.dtype:
+            # Allocate a new buffer with (at least) twice the capacity
+            new_buffer = np.empty(max(2 * buffer.size, size + values.size, 16), dtype=dtype)
+            # Copy over the currently kept values
+            new_buffer[:size] = buffer[:size]
+            buffer = new_buffer
+            self.values[path] = buffer
+
+        # Add the new values to the buffer
+        buffer[size : size + values.size] = values
+
+        self.sizes[path] = size + values.size
+
+    def append(self, new_results, path=()):
+        """
+        Add a results dictionary to the tracking.
+
+        Parameters
+        ----------
+        new_results : dictionary
+          Dictionary containing results of a track (or batch) arranged by metric
+        path : tuple of string
+          Path of keys leading to the dictionary
+        """
+
+        # Loop through the keys in the new dictionary
+        for key in new_results.keys():
+            # Check if the entry is another dictionary
+            if isinstance(new_results[key], dict):
+                # Recursively call this function
+                self.append(new_results[key], path + (key,))
+            else:
+                # Add the new entry (or entries) to the tracking
+                self.add_values(path + (key,), np.asarray(new_results[key]).ravel())
+
+    def merge(self, other):
+        """
+        Add the tracking of another accumulator to this one.
+
+        Parameters
+        ----------
+        other : ResultsAccumulator
+          Accumulator whose tracking to add
+        """
+
+        if self.keep_values and not other.keep_values:
+            # Individual values can no longer be kept, so switch to running sums
+            self.sums = self.get_sums()
+            self.keep_values = False
+            self.values, self.sizes = dict(), dict()
+
+        # Obtain the running sums of the other accumulator
+        other_sums = other.get_sums()
+
+        # Loop through the metrics tracked by the other accumulator
+        for path in other.counts.keys():
+            if self.keep_values:
+                # Add all of the values kept by the other accumulator
+                self.add_values(path, other.values[path][:other.sizes[path]])
+            else:
+                # Add the running sum and count of the other accumulator
+                self.sums[path] = self.sums.get(path, 0) + other_sums[path]
+                self.counts[path] = self.counts.get(path, 0) + other.counts[path]
+
+    def get_sums(self):
+        """
+        Obtain the sum of the values for each metric.
+
+        Returns
+        ----------
+        sums : dictionary
+          Sum for each metric, indexed by the path of keys leading to the metric
+        """
+
+        if self.keep_values:
+            # Add up the kept values
+            sums = {path : np.sum(self.values[path][:self.sizes[path]], dtype=np.float64)
+                    for path in self.counts.keys()}
+        else:
+            # Use the running sums
+            sums = dict(self.sums)
+
+        return sums
+
+    def unflatten(self, entries):
+        """
+        Arrange entries indexed by paths of keys into a nested dictionary.
+
+        Parameters
+        ----------
+        entries : dictionary
+          Entries indexed by the path of keys leading to each metric
+
+        Returns
+        ----------
+        results : dictionary
+          Dictionary with the entries arranged by metric
+        """
+
+        # Initialize an empty dictionary for the results
+        results = dict()
+
+        # Loop through the paths in the order they were first tracked
+        for path in self.counts.keys():
+            # Start at the top level
+            level = results
+            # Descend to the dictionary holding the metric, creating it if necessary
+            for key in path[:-1]:
+                level = level.setdefault(key, dict())
+            # Add the entry
+            level[path[-1]] = entries[path]
+
+        return results
+
+    def get_values(self):
+        """
+        Obtain all of the individual values for each metric.
+
+        Returns
+        ----------
+        results : dictionary
+          Dictionary containing results of tracks arranged by metric
+        """
+
+        # Obtain the kept values for each metric
+        values = {path : self.values[path][:self.sizes[path]].copy() for path in self.values.keys()}
+
+        # Arrange the values by metric
+        results = self.unflatten(values)
+
+        return results
+
+    def average(self):
+        """
+        Obtain the average across all tracked results for each metric.
+
+        Returns
+        ----------
+        average : dictionary
+          Dictionary with a single value for each metric
+        """
+
+        if self.keep_values:
+            # Take the average of all kept values (exactly as for appended values)
+            averages = {path : float(np.mean(self.values[path][:self.sizes[path]]))
+                        for path in self.counts.keys()}
+        else:
+            # Take the average using the running sums and counts
+            averages = {path : float(self.sums[path] / self.counts[path])
+                        for path in self.counts.keys()}
+
+        # Arrange the averages by metric
+        average = self.unflatten(averages)
+
+        return average
+
+
 def average_results(results):
     """
     Obtain the average across all tracked results for each metric
@@ -32,8 +268,8 @@ def average_results(results):
 
     Parameters
     ----------
-    results : dictionary
-      Dictionary containing results of tracks arranged by metric
+    results : dictionary or ResultsAccumulator
+      Dictionary containing results of tracks arranged by metric or accumulator tracking them
 
     Returns
     ----------
@@ -41,6 +277,10 @@ def average_results(results):
       Dictionary with a single value for each metric
     """
 
+    if isinstance(results, ResultsAccumulator):
+        # Let the accumulator compute the averages
+        return results.average()
+
     # Only modify a local copy which will be returned
     average = deepcopy(results)
 
@@ -95,6 +335,284 @@ def append_results(tracked_results, new_results):
     return tracked_results
 
 
+def match_notes_fast(ref_intervals, ref_pitches, est_intervals, est_pitches, onset_tolerance=0.05,
+                     pitch_tolerance=50.0, offset_ratio=0.2, offset_min_tolerance=0.05):
+    """
+    Determine the number of matching notes within a maximum matching between reference and
+    estimated notes, using the same criteria as mir_eval.transcription.match_notes. Instead of
+    comparing all pairs of notes, only those with nearby onsets and pitches are considered.
+
+    Parameters
+    ----------
+    ref_intervals : ndarray (N x 2)
+      Array of reference onset-offset time pairs
+      N - number of reference notes
+    ref_pitches : ndarray (N)
+      Array of reference pitches in Hertz
+      N - number of reference notes
+    est_intervals : ndarray (K x 2)
+      Array of estimated onset-offset time pairs
+      K - number of estimated notes
+    est_pitches : ndarray (K)
+      Array of estimated pitches in Hertz
+      K - number of estimated notes
+    onset_tolerance : float
+      Maximum distance (seconds) between matching onsets
+    pitch_tolerance : float
+      Maximum distance (cents) between matching pitches
+    offset_ratio : float or None (optional)
+      Ratio of the reference note's duration used to define the offset tolerance - None to ignore offsets
+    offset_min_tolerance : float
+      Minimum offset tolerance (seconds)
+
+    Returns
+    ----------
+    num_matches : int
+      Number of notes within a maximum matching
+    """
+
+    # Determine the number of reference and estimated notes
+    num_ref, num_est = len(ref_pitches), len(est_pitches)
+
+    # Convert the pitches to octaves (the same way as mir_eval)
+    ref_octaves, est_octaves = np.log2(ref_pitches), np.log2(est_pitches)
+
+    # Group the pitches into buckets as wide as the pitch tolerance, such that
+    # matching pitches always fall within the same or adjacent buckets
+    ref_buckets = np.floor(1200 * ref_octaves / pitch_tolerance)
+    est_buckets = np.floor(1200 * est_octaves / pitch_tolerance)
+
+    # Widen the onset window slightly to account for the rounding of distances
+    window = onset_tolerance + 1E-3
+
+    # Determine the spacing between buckets when ordering estimated notes by bucket, then onset
+    onsets = np.concatenate((ref_intervals[:, 0], est_intervals[:, 0]))
+    spacing = np.max(onsets) - np.min(onsets) + 2 * window + 1
+
+    # Sort the estimated notes by bucket, then by onset
+    est_order = np.lexsort((est_intervals[:, 0], est_buckets))
+    est_keys = (est_buckets * spacing + est_intervals[:, 0])[est_order]
+
+    # Initialize lists to hold the indices of candidate pairs
+    ref_idcs, est_idcs = list(), list()
+
+    # Loop through the adjacent buckets (pitches)
+    for offset in [-1, 0, 1]:
+        # Determine the key of the reference onset within the bucket
+        ref_keys = (ref_buckets + offset) * spacing + ref_intervals[:, 0]
+
+        # Sweep through the estimated notes within the onset window of each reference note
+        starts = np.searchsorted(est_keys, ref_keys - window, side='left')
+        stops = np.searchsorted(est_keys, ref_keys + window, side='right')
+        counts = stops - starts
+
+        # Enumerate the candidate pairs
+        ref_idcs.append(np.repeat(np.arange(num_ref), counts))
+        est_positions = np.arange(np.sum(counts)) - np.repeat(np.cumsum(counts) - counts - starts, counts)
+        est_idcs.append(est_order[est_positions])
+
+    # Combine the candidate pairs
+    ref_idcs, est_idcs = np.concatenate(ref_idcs), np.concatenate(est_idcs)
+
+    # Check for onset matches (with the same rounding as mir_eval)
+    onset_distances = np.around(np.abs(ref_intervals[ref_idcs, 0] - est_intervals[est_idcs, 0]), decimals=4)
+    hits = onset_distances <= onset_tolerance
+
+    # Check for pitch matches
+    pitch_distances = np.abs(1200 * (ref_octaves[ref_idcs] - est_octaves[est_idcs]))
+    hits = np.logical_and(hits, pitch_distances <= pitch_tolerance)
+
+    if offset_ratio is not None:
+        # Check for offset matches (with the same rounding as mir_eval)
+        offset_distances = np.around(np.abs(ref_intervals[ref_idcs, 1] - est_intervals[est_idcs, 1]), decimals=4)
+        ref_durations = np.abs(np.diff(ref_intervals, axis=-1)).flatten()
+        offset_tolerances = np.maximum(offset_ratio * ref_durations, offset_min_tolerance)
+        hits = np.logical_and(hits, offset_distances <= offset_tolerances[ref_idcs])
+
+    # Construct a sparse bipartite graph from the matching pairs
+    graph = csr_matrix((np.ones(np.sum(hits), dtype=np.int8), (ref_idcs[hits], est_idcs[hits])),
+                       shape=(num_ref, num_est))
+
+    # Compute a maximum matching and count the matched reference notes
+    num_matches = int(np.sum(maximum_bipartite_matching(graph, perm_type='column') >= 0))
+
+    return num_matches
+
+
+def evaluate_notes_fast(ref_intervals, ref_pitches, est_intervals, est_pitches, offset_ratio=0.2):
+    """
+    Compute note-level precision, recall, and f-measure, with or without offsets, exactly
+    as mir_eval.transcription.precision_recall_f1_overlap does, but using match_notes_fast.
+
+    Parameters
+    ----------
+    See match_notes_fast...
+
+    Returns
+    ----------
+    precision : float
+      Fraction of estimated notes which were matched
+    recall : float
+      Fraction of reference notes which were matched
+    f_measure : float
+      Harmonic mean of precision and recall
+    """
+
+    # Perform the same validation as mir_eval
+    validate_notes(ref_intervals, ref_pitches, est_intervals, est_pitches)
+
+    # Metrics are undefined without notes
+    if len(ref_pitches) == 0 or len(est_pitches) == 0:
+        return 0.0, 0.0, 0.0
+
+    # Count the matching notes
+    num_matches = match_notes_fast(ref_intervals, ref_pitches, est_intervals,
+                                   est_pitches, offset_ratio=offset_ratio)
+
+    # Compute the metrics
+    precision = float(num_matches) / len(est_pitches)
+    recall = float(num_matches) / len(ref_pitches)
+    f1 = f_measure(precision, recall)
+
+    return precision, recall, f1
+
+
+def count_frame_matches(ref_frames, ref_keys, est_frames, est_keys, num_frames, num_keys):
+    """
+    Count the number of matching (discrete) observations within each frame, where each
+    reference observation can be matched to at most one estimated observation.
+
+    Parameters
+    ----------
+    ref_frames : ndarray (N)
+      Frame index of each reference observation
+      N - number of reference observations
+    ref_keys : ndarray (N)
+      Discrete key (e.g. pitch index) of each reference observation in [0, num_keys)
+      N - number of reference observations
+    est_frames : ndarray (M)
+      Frame index of each estimated observation
+      M - number of estimated observations
+    est_keys : ndarray (M)
+      Discrete key (e.g. pitch index) of each estimated observation in [0, num_keys)
+      M - number of estimated observations
+    num_frames : int
+      Number of frames T
+    num_keys : int
+      Number of distinct keys K
+
+    Returns
+    ----------
+    num_matches : ndarray (T)
+      Number of matching observations within each frame
+    """
+
+    # Count the occurrences of each key within each frame
+    ref_counts = np.bincount(ref_frames * num_keys + ref_keys, minlength=num_frames * num_keys)
+    est_counts = np.bincount(est_frames * num_keys + est_keys, minlength=num_frames * num_keys)
+
+    # Each occurrence of a key can be matched once, and matches are summed across keys
+    num_matches = np.minimum(ref_counts, est_counts).reshape(num_frames, num_keys).sum(axis=-1)
+
+    # Use the same data type as mir_eval
+    num_matches = num_matches.astype(tools.FLOAT)
+
+    return num_matches
+
+
+def evaluate_frames_fast(ref_times, ref_pitches, est_times, est_pitches):
+    """
+    Compute all frame-level multi pitch metrics exactly as mir_eval.multipitch.evaluate does.
+    If the estimate and reference share the same time grid and all pitches are discrete
+    (i.e. whole semitones), the matches within each frame are counted all at once. Otherwise,
+    this falls back to the mir_eval implementation, which resamples and matches frame by frame.
+
+    Parameters
+    ----------
+    ref_times : ndarray (N)
+      Time in seconds of beginning of each reference frame
+      N - number of reference frames
+    ref_pitches : list of ndarray (N x [...])
+      Array of reference pitches (MIDI) active within each frame
+      N - number of reference frames
+    est_times : ndarray (M)
+      Time in seconds of beginning of each estimated frame
+      M - number of estimated frames
+    est_pitches : list of ndarray (M x [...])
+      Array of estimated pitches (MIDI) active within each frame
+      M - number of estimated frames
+
+    Returns
+    ----------
+    frame_metrics : OrderedDict
+      Dictionary containing the frame-level metrics with the same keys as mir_eval
+    """
+
+    # Determine the number of pitches active within each frame
+    ref_counts = np.array([len(p) for p in ref_pitches], dtype=tools.INT)
+    est_counts = np.array([len(p) for p in est_pitches], dtype=tools.INT)
+
+    # Collapse all of the pitches into a single array
+    ref_all = np.concatenate([np.empty(0)] + [np.asarray(p, dtype=tools.FLOAT).flatten() for p in ref_pitches])
+    est_all = np.concatenate([np.empty(0)] + [np.asarray(p, dtype=tools.FLOAT).flatten() for p in est_pitches])
+
+    # Determine whether the estimate and reference share the same time grid (same criterion as mir_eval)
+    aligned = ref_times.size == est_times.size and np.allclose(ref_times, est_times)
+    # Determine whether all of the pitches are discrete
+    discrete = np.array_equal(ref_all, np.round(ref_all)) and np.array_equal(est_all, np.round(est_all))
+
+    if not (aligned and discrete):
+        # Convert pitch lists to Hertz and fall back to the mir_eval implementation
+        frame_metrics = evaluate_frames(ref_times, tools.pitch_list_to_hz(ref_pitches),
+                                        est_times, tools.pitch_list_to_hz(est_pitches))
+        return frame_metrics
+
+    # Determine the number of frames
+    num_frames = ref_times.size
+
+    # Obtain the frame index of each pitch observation
+    ref_frames = np.repeat(np.arange(num_frames), ref_counts)
+    est_frames = np.repeat(np.arange(num_frames), est_counts)
+
+    # Convert the pitches to integers
+    ref_all, est_all = ref_all.astype(tools.INT), est_all.astype(tools.INT)
+
+    # Determine the lowest pitch and the range of pitches observed
+    lowest = min(np.min(ref_all, initial=0), np.min(est_all, initial=0))
+    num_pitches = max(np.max(ref_all, initial=0), np.max(est_all, initial=0)) - lowest + 1
+
+    # Pitches within a quarter-tone match exactly when they are discrete
+    true_positives = count_frame_matches(ref_frames, ref_all - lowest,
+                                         est_frames, est_all - lowest,
+                                         num_frames, num_pitches)
+
+    # Pitch classes within a quarter-tone match exactly when pitches are discrete
+    true_positives_chroma = count_frame_matches(ref_frames, np.mod(ref_all, 12),
+                                                est_frames, np.mod(est_all, 12),
+                                                num_frames, 12)
+
+    # Initialize a dictionary to hold the metrics
+    frame_metrics = OrderedDict()
+
+    # Compute the metrics from the counts, using the mir_eval functions
+    (frame_metrics['Precision'],
+     frame_metrics['Recall'],
+     frame_metrics['Accuracy']) = compute_accuracy(true_positives, ref_counts, est_counts)
+    (frame_metrics['Substitution Error'],
+     frame_metrics['Miss Error'],
+     frame_metrics['False Alarm Error'],
+     frame_metrics['Total Error']) = compute_err_score(true_positives, ref_counts, est_counts)
+    (frame_metrics['Chroma Precision'],
+     frame_metrics['Chroma Recall'],
+     frame_metrics['Chroma Accuracy']) = compute_accuracy(true_positives_chroma, ref_counts, est_counts)
+    (frame_metrics['Chroma Substitution Error'],
+     frame_metrics['Chroma Miss Error'],
+     frame_metrics['Chroma False Alarm Error'],
+     frame_metrics['Chroma Total Error']) = compute_err_score(true_positives_chroma, ref_counts, est_counts)
+
+    return frame_metrics
+
+
 def log_results(results, writer, step=0, patterns=None, tag=''):
     """
     Log results using TensorBoardX.
@@ -276,10 +794,23 @@ class Evaluator(object):
 
     def reset_results(self):
         """
-        Reset tracked results to empty dictionary.
+        Reset tracked results to an empty accumulator.
+        """
+
+        self.results = ResultsAccumulator()
+
+    def merge_results(self, other):
+        """
+        Add the results tracked by another (e.g. a copy of this) evaluator to the tracked results.
+
+        Parameters
+        ----------
+        other : Evaluator
+          Evaluator of the same structure whose tracked results to add
         """
 
-        self.results = dict()
+        # Merge the tracked results
+        self.results.merge(other.results)
 
     def average_results(self):
         """
@@ -448,8 +979,8 @@ class Evaluator(object):
         # Calculate the results
         results = self.evaluate(estimated, reference)
 
-        # Add the results to the tracked dictionary
-        self.results = append_results(self.results, results)
+        # Add the results to the tracking
+        self.results.append(results)
 
         # Write the results
         self.write(results, track)
@@ -509,6 +1040,22 @@ class ComboEvaluator(Evaluator):
             # Reset the respective results dictionary so it is empty
             evaluator.reset_results()
 
+    def merge_results(self, other):
+        """
+        Add the results tracked by each evaluator in the collection of another
+        (e.g. a copy of this) evaluator to the tracked results of each evaluator.
+
+        Parameters
+        ----------
+        other : ComboEvaluator
+          Evaluator of the same structure whose tracked results to add
+        """
+
+        # Loop through the pairs of corresponding evaluators
+        for evaluator, other_evaluator in zip(self.evaluators, other.evaluators):
+            # Merge the tracked results of the evaluator
+            evaluator.merge_results(other_evaluator)
+
     def average_results(self):
         """
         Return the average of the currently tracked results across all evaluators.
@@ -594,8 +1141,8 @@ class ComboEvaluator(Evaluator):
                 # Create a new entry for the results
                 results[evaluator.get_key()] = new_results
 
-            # Add the results to the tracked dictionary
-            evaluator.results = append_results(evaluator.results, new_results)
+            # Add the results to the evaluator's tracking
+            evaluator.results.append(new_results)
 
         # Write the results
         self.write(results, track)
@@ -783,7 +1330,8 @@ class StackedNoteEvaluator(Evaluator):
     Implements an evaluator for stacked (independent) note estimations.
     """
 
-    def __init__(self, offset_ratio=None, key=None, save_dir=None, patterns=None, verbose=False):
+    def __init__(self, offset_ratio=None, key=None, save_dir=None, patterns=None, verbose=False,
+                 fast_matching=False):
         """
         Initialize parameters for the evaluator.
 
@@ -793,11 +1341,15 @@ class StackedNoteEvaluator(Evaluator):
 
         offset_ratio : float
           Ratio of the reference note's duration used to define the offset tolerance
+        fast_matching : bool
+          Whether to match notes with evaluate_notes_fast (only comparing notes
+          with nearby onsets and pitches) instead of the mir_eval implementation
         """
 
         super().__init__(key, save_dir, patterns, verbose)
 
         self.offset_ratio = offset_ratio
+        self.fast_matching = fast_matching
 
     @staticmethod
     def get_default_key():
@@ -861,12 +1413,20 @@ class StackedNoteEvaluator(Evaluator):
             pitches_ref = tools.notes_to_hz(pitches_ref)
             pitches_est = tools.notes_to_hz(pitches_est)
 
-            # Calculate frame-wise precision, recall, and f1 score with or without offset
-            p, r, f, _ = evaluate_notes(ref_intervals=intervals_ref,
-                                        ref_pitches=pitches_ref,
-                                        est_intervals=intervals_est,
-                                        est_pitches=pitches_est,
-                                        offset_ratio=self.offset_ratio)
+            if self.fast_matching:
+                # Calculate note-wise precision, recall, and f1 score with or without offset
+                p, r, f = evaluate_notes_fast(ref_intervals=intervals_ref,
+                                              ref_pitches=pitches_ref,
+                                              est_intervals=intervals_est,
+                                              est_pitches=pitches_est,
+                                              offset_ratio=self.offset_ratio)
+            else:
+                # Calculate frame-wise precision, recall, and f1 score with or without offset
+                p, r, f, _ = evaluate_notes(ref_intervals=intervals_ref,
+                                            ref_pitches=pitches_ref,
+                                            est_intervals=intervals_est,
+                                            est_pitches=pitches_est,
+                                            offset_ratio=self.offset_ratio)
 
             # Add the results to the respective array
             precision = np.append(precision, p)
@@ -888,7 +1448,8 @@ class NoteEvaluator(StackedNoteEvaluator):
     Implements an evaluator for notes.
     """
 
-    def __init__(self, offset_ratio=None, key=None, save_dir=None, patterns=None, verbose=False):
+    def __init__(self, offset_ratio=None, key=None, save_dir=None, patterns=None, verbose=False,
+                 fast_matching=False):
         """
         Initialize parameters for the evaluator.
 
@@ -897,7 +1458,7 @@ class NoteEvaluator(StackedNoteEvaluator):
         See StackedNoteEvaluator class...
         """
 
-        super().__init__(offset_ratio, key, save_dir, patterns, verbose)
+        super().__init__(offset_ratio, key, save_dir, patterns, verbose, fast_matching)
 
     def evaluate(self, estimated, reference):
         """
@@ -943,17 +1504,27 @@ class StackedPitchListEvaluator(Evaluator):
     discrete estimates, but is more general and works for continuous pitch estimations.
     """
 
-    def __init__(self, key=None, save_dir=None, patterns=None, verbose=False):
+    def __init__(self, key=None, save_dir=None, patterns=None, verbose=False,
+                 fast_frames=False, extended=False):
         """
         Initialize parameters for the evaluator.
 
         Parameters
         ----------
         See Evaluator class...
+
+        fast_frames : bool
+          Whether to compute the metrics with evaluate_frames_fast, which counts matches all at
+          once when the time grids are aligned and pitches are discrete, instead of using mir_eval
+        extended : bool
+          Whether to also report accuracy, error scores, and chroma (octave-agnostic) metrics
         """
 
         super().__init__(key, save_dir, patterns, verbose)
 
+        self.fast_frames = fast_frames
+        self.extended = extended
+
     @staticmethod
     def get_default_key():
         """
@@ -962,6 +1533,34 @@ class StackedPitchListEvaluator(Evaluator):
 
         return tools.KEY_PITCHLIST
 
+    @staticmethod
+    def get_extended_results(frame_metrics, prefix=''):
+        """
+        Extract the accuracy and error scores from the mir_eval frame-level metrics.
+
+        Parameters
+        ----------
+        frame_metrics : dict
+          Dictionary containing the frame-level metrics with the same keys as mir_eval
+        prefix : string
+          Prefix of the relevant mir_eval keys (e.g. 'Chroma ')
+
+        Returns
+        ----------
+        results : dict
+          Dictionary containing accuracy and substitution, miss, false alarm, and total error
+        """
+
+        results = {
+            tools.KEY_ACCURACY : frame_metrics[prefix + 'Accuracy'],
+            tools.KEY_ERROR_SUB : frame_metrics[prefix + 'Substitution Error'],
+            tools.KEY_ERROR_MISS : frame_metrics[prefix + 'Miss Error'],
+            tools.KEY_ERROR_FA : frame_metrics[prefix + 'False Alarm Error'],
+            tools.KEY_ERROR_TOTAL : frame_metrics[prefix + 'Total Error']
+        }
+
+        return results
+
     def evaluate(self, estimated, reference):
         """
         Evaluate stacked pitch list estimates with respect to a reference.
@@ -977,10 +1576,11 @@ class StackedPitchListEvaluator(Evaluator):
         ----------
         results : dict
           Dictionary containing precision, recall, and f-measure
+          (and any extended metrics)
         """
 
-        # Initialize empty arrays to hold results for each degree of freedom
-        precision, recall, f_measure = np.empty(0), np.empty(0), np.empty(0)
+        # Initialize a collection to hold results for each degree of freedom
+        results = ResultsAccumulator()
 
         # Loop through the stack of pitch lists
         for key in estimated.keys():
@@ -988,12 +1588,16 @@ class StackedPitchListEvaluator(Evaluator):
             times_ref, pitches_ref = estimated[key]
             times_est, pitches_est = reference[key]
 
-            # Convert pitch lists to Hertz
-            pitches_ref = tools.pitch_list_to_hz(pitches_ref)
-            pitches_est = tools.pitch_list_to_hz(pitches_est)
+            if self.fast_frames:
+                # Calculate frame-wise metrics, counting matches all at once if possible
+                frame_metrics = evaluate_frames_fast(times_ref, pitches_ref, times_est, pitches_est)
+            else:
+                # Convert pitch lists to Hertz
+                pitches_ref = tools.pitch_list_to_hz(pitches_ref)
+                pitches_est = tools.pitch_list_to_hz(pitches_est)
 
-            # Calculate frame-wise precision, recall, and f1 score for continuous pitches
-            frame_metrics = evaluate_frames(times_ref, pitches_ref, times_est, pitches_est)
+                # Calculate frame-wise precision, recall, and f1 score for continuous pitches
+                frame_metrics = evaluate_frames(times_ref, pitches_ref, times_est, pitches_est)
 
             # Extract observation-wise precision and recall
             p, r = frame_metrics['Precision'], frame_metrics['Recall']
@@ -1001,17 +1605,33 @@ class StackedPitchListEvaluator(Evaluator):
             # Calculate the f1-score using the harmonic mean formula
             f = hmean([p + EPSILON, r + EPSILON]) - EPSILON
 
-            # Add the results to the respective array
-            precision = np.append(precision, p)
-            recall = np.append(recall, r)
-            f_measure = np.append(f_measure, f)
+            # Collect the results for this degree of freedom
+            slice_results = {
+                tools.KEY_PRECISION : p,
+                tools.KEY_RECALL : r,
+                tools.KEY_F1 : f
+            }
 
-        # Package the results into a dictionary
-        results = {
-            tools.KEY_PRECISION : precision,
-            tools.KEY_RECALL : recall,
-            tools.KEY_F1 : f_measure
-        }
+            if self.extended:
+                # Add the accuracy and error scores
+                slice_results.update(self.get_extended_results(frame_metrics))
+
+                # Extract the chroma precision and recall
+                p, r = frame_metrics['Chroma Precision'], frame_metrics['Chroma Recall']
+
+                # Group the chroma metrics under their own key
+                slice_results[tools.KEY_CHROMA] = {
+                    tools.KEY_PRECISION : p,
+                    tools.KEY_RECALL : r,
+                    tools.KEY_F1 : hmean([p + EPSILON, r + EPSILON]) - EPSILON
+                }
+                slice_results[tools.KEY_CHROMA].update(self.get_extended_results(frame_metrics, 'Chroma '))
+
+            # Add the results to the respective arrays
+            results.append(slice_results)
+
+        # Obtain the results for each degree of freedom
+        results = results.get_values()
 
         return results
 
@@ -1024,16 +1644,17 @@ class PitchListEvaluator(StackedPitchListEvaluator):
     discrete estimates, but is more general and works for continuous pitch estimations.
     """
 
-    def __init__(self, key=None, save_dir=None, patterns=None, verbose=False):
+    def __init__(self, key=None, save_dir=None, patterns=None, verbose=False,
+                 fast_frames=False, extended=False):
         """
         Initialize parameters for the evaluator.
 
         Parameters
         ----------
-        See Evaluator class...
+        See StackedPitchListEvaluator class...
         """
 
-        super().__init__(key, save_dir, patterns, verbose)
+        super().__init__(key, save_dir, patterns, verbose, fast_frames, extended)
 
     def evaluate(self, estimated, reference):
         """
@@ -1060,6 +1681,7 @@ class PitchListEvaluator(StackedPitchListEvaluator):
         ----------
         results : dict
           Dictionary containing precision, recall, and f-measure
+          (and any extended metrics)
         """
 
         # Convert the pitch lists to stacked pitch lists
@@ -22,6 +22,7 @@ HVQT()
 
 from .combo import *
 from .common import *
+from .frontends import *
 from .cqt import *
 from .hcqt import *
 from .hvqt import *
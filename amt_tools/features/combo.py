@@ -13,7 +13,7 @@ class FeatureCombo(FeatureModule):
     """
     Implements a wrapper for a combination of multiple feature extraction modules.
     """
-    def __init__(self, modules):
+    def __init__(self, modules, num_workers=0, use_processes=False):
         """
         Initialize parameters for the feature combination.
 
@@ -21,10 +21,24 @@ class FeatureCombo(FeatureModule):
         ----------
         modules : list of FeatureModules
           Post-initialization feature extraction modules
+        num_workers : int
+          Number of workers to compute the inner modules concurrently - 0 to compute them in order
+        use_processes : bool
+          Whether to use a pool of processes, rather than threads, for the workers
+          (not possible with a running reference, see FeatureModule.process_modules)
         """
 
         self.modules = modules
 
+        # Use the maximum of each piece of audio as the decibel reference (see set_running_ref)
+        self.running_ref = None
+
+        # Pool of workers for the inner modules, created once it is needed (see get_executor)
+        self.executor, self.executor_pid = None, None
+
+        self.num_workers = num_workers
+        self.use_processes = use_processes
+
     def get_expected_frames(self, audio):
         """
         Determine the number of frames we expect from provided audio.
@@ -81,6 +95,30 @@ class FeatureCombo(FeatureModule):
 
         return sample_range
 
+    def get_receptive_field(self):
+        """
+        Determine the number of samples on either side of a frame's
+        center which can influence the features of the frame.
+
+        Returns
+        ----------
+        receptive_field : int or None
+          Number of samples influencing each frame on either side
+        """
+
+        # Gather the receptive fields of the inner modules
+        receptive_field = [module.get_receptive_field()
+                           for module in self.modules]
+
+        if None in receptive_field:
+            # The receptive field of at least one module is unknown
+            receptive_field = None
+        else:
+            # Take the widest receptive field
+            receptive_field = max(receptive_field)
+
+        return receptive_field
+
     def process_audio(self, audio):
         """
         Get the features for a piece of audio.
@@ -98,13 +136,10 @@ class FeatureCombo(FeatureModule):
 
         # TODO - more sophisticated stacking/padding may be required - not if I return a list and let user figure it out
 
-        feats = []
         # Gather features from inner modules
-        for module in self.modules:
-            mod_feats = module.process_audio(audio)
-            # Add to the list if fixed features were calculated
-            if mod_feats is not None:
-                feats += [mod_feats]
+        feats = self.process_modules(self.modules, audio, self.num_workers, self.use_processes)
+        # Only keep the features of modules where fixed features were calculated
+        feats = [mod_feats for mod_feats in feats if mod_feats is not None]
 
         # If the list is still empty, all modules produced None
         if len(feats) == 0:
@@ -119,6 +154,38 @@ class FeatureCombo(FeatureModule):
 
         return feats
 
+    def get_config_exclusions(self):
+        """
+        Determine which fields of the module do not influence
+        the features and should be left out of its configuration.
+
+        Returns
+        ----------
+        exclusions : list of string
+          Names of fields to leave out of the configuration
+        """
+
+        # The workers only determine how the features are computed
+        exclusions = super().get_config_exclusions() + ['num_workers', 'use_processes']
+
+        return exclusions
+
+    def set_running_ref(self, running_ref):
+        """
+        Set the running decibel reference of the module and of the inner modules.
+
+        Parameters
+        ----------
+        running_ref : float or None
+          Initial running reference - None to use the maximum of each piece of audio
+        """
+
+        super().set_running_ref(running_ref)
+
+        # Loop through the inner modules
+        for module in self.modules:
+            module.set_running_ref(running_ref)
+
     def get_times(self, audio):
         """
         Determine the time, in seconds, associated with frame.
@@ -4,10 +4,16 @@
 # None of my imports used
 
 # Regular imports
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from abc import abstractmethod
+from itertools import repeat
+from copy import deepcopy
 
 import numpy as np
+import hashlib
 import librosa
+import json
+import os
 
 # TODO - take squared modulus of some of these?
 
@@ -17,7 +23,7 @@ class FeatureModule(object):
     Implements a generic music feature extraction module wrapper.
     """
 
-    def __init__(self, sample_rate, hop_length, num_channels, decibels=True):
+    def __init__(self, sample_rate, hop_length, num_channels, decibels=True, db_ref=None):
         """
         Initialize parameters common to all feature extraction modules.
 
@@ -31,12 +37,56 @@ class FeatureModule(object):
           Number of independent feature channels
         decibels : bool
           Convert features to decibel (dB) units
+        db_ref : float or None (optional)
+          Fixed reference for decibel conversion, such that features do
+          not depend on the rest of the signal - None to use the maximum
         """
 
         self.sample_rate = sample_rate
         self.hop_length = hop_length
         self.num_channels = num_channels
         self.decibels = decibels
+        self.db_ref = db_ref
+
+        # Use the maximum of each piece of audio as the decibel reference (see set_running_ref)
+        self.running_ref = None
+
+        # Pool of workers for any inner modules, created once it is needed (see get_executor)
+        self.executor, self.executor_pid = None, None
+
+    def __getstate__(self):
+        """
+        Obtain the fields of the module to pickle (e.g. for a pool of processes or deepcopy).
+
+        Returns
+        ----------
+        state : dict
+          Fields of the module
+        """
+
+        state = self.__dict__.copy()
+
+        # Pools of workers cannot be pickled and only belong to the process which created them
+        state['executor'], state['executor_pid'] = None, None
+
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restore the fields of the module when it is unpickled.
+
+        Parameters
+        ----------
+        state : dict
+          Fields of the module
+        """
+
+        # Modules saved before running references and pools of workers existed have neither
+        state.setdefault('running_ref', None)
+        state.setdefault('executor', None)
+        state.setdefault('executor_pid', None)
+
+        self.__dict__.update(state)
 
     def get_expected_frames(self, audio):
         """
@@ -89,6 +139,24 @@ class FeatureModule(object):
 
         return sample_range
 
+    def get_receptive_field(self):
+        """
+        Determine the number of samples on either side of a frame's
+        center which can influence the features of the frame.
+
+        This is the default behavior, which indicates that the
+        receptive field is unknown. It can be overridden.
+
+        Returns
+        ----------
+        receptive_field : int or None
+          Number of samples influencing each frame on either side
+        """
+
+        receptive_field = None
+
+        return receptive_field
+
     @abstractmethod
     def process_audio(self, audio):
         """
@@ -102,6 +170,219 @@ class FeatureModule(object):
 
         return NotImplementedError
 
+    def process_frames(self, audio, frame_start, num_frames):
+        """
+        Get features for a range of frames of a piece of audio, processing only
+        the samples within the receptive field of those frames when it is known.
+
+        Parameters
+        ----------
+        audio : ndarray
+          Mono-channel audio
+        frame_start : int
+          First frame to compute
+        num_frames : int
+          Number of frames to compute
+
+        Returns
+        ----------
+        feats : ndarray
+          Post-processed features for the range of frames
+        """
+
+        # Determine how many samples influence each frame
+        receptive_field = self.get_receptive_field()
+
+        if receptive_field is None:
+            # Process all of the audio, since any sample may influence the frames
+            chunk_start = 0
+            feats = self.process_audio(audio)
+        else:
+            # Obtain the number of samples between frames
+            hop_length = self.get_hop_length()
+            # Pad the range by a whole number of hops covering the receptive field
+            pad_hops = int(np.ceil(receptive_field / hop_length))
+            # Determine the first frame of the padded range
+            chunk_start = max(0, frame_start - pad_hops)
+            # Determine the boundaries of the samples within the padded range
+            sample_start = chunk_start * hop_length
+            sample_end = (frame_start + num_frames + pad_hops) * hop_length
+            # Process the samples within the padded range
+            feats = self.process_audio(audio[..., sample_start : sample_end])
+
+        if feats is not None:
+            # Remove the frames of the padded range which were not requested
+            feats = feats[..., frame_start - chunk_start : frame_start - chunk_start + num_frames]
+
+        return feats
+
+    def get_executor(self, modules, num_workers, use_processes):
+        """
+        Obtain the pool of workers for computing inner modules, which is created on
+        the first call and reused afterwards, such that workers are not started for
+        every piece of audio. A pool of processes receives a copy of the inner modules
+        once, when it is created, so the inner modules should not be modified afterwards.
+
+        Parameters
+        ----------
+        modules : list of FeatureModules
+          Inner modules to compute
+        num_workers : int
+          Number of workers within the pool
+        use_processes : bool
+          Whether to use a pool of processes, rather than threads
+
+        Returns
+        ----------
+        executor : ThreadPoolExecutor or ProcessPoolExecutor
+          Pool of workers
+        """
+
+        # Create a new pool if there is none yet, or if the module was copied into a forked process
+        if self.executor is None or self.executor_pid != os.getpid():
+            if use_processes:
+                # Send the inner modules to each process once, rather than along with every piece of audio
+                self.executor = ProcessPoolExecutor(max_workers=num_workers,
+                                                    initializer=set_worker_modules,
+                                                    initargs=(modules,))
+            else:
+                # Threads can access the inner modules directly
+                self.executor = ThreadPoolExecutor(max_workers=num_workers)
+
+            # Keep track of the process which owns the pool
+            self.executor_pid = os.getpid()
+
+        return self.executor
+
+    def process_modules(self, modules, audio, num_workers=0, use_processes=False, **kwargs):
+        """
+        Get the features of several independent feature extraction modules for a piece
+        of audio, computing them concurrently if workers are requested (see get_executor).
+
+        Parameters
+        ----------
+        modules : list of FeatureModules
+          Feature extraction modules to compute
+        audio : ndarray
+          Mono-channel audio
+        num_workers : int
+          Number of workers to compute the modules with - 0 to compute them in order
+        use_processes : bool
+          Whether to use a pool of processes, rather than threads, for the workers,
+          which is not possible while the modules maintain a running reference
+        **kwargs : dict
+          Additional keyword arguments for the process_audio method of each module,
+          which are shared by all modules within a thread or within a process
+
+        Returns
+        ----------
+        feats : list of (ndarray or None)
+          Post-processed features of each module, in the original order
+        """
+
+        if num_workers > 0 and use_processes and any(module.running_ref is not None for module in modules):
+            # Each process would update the running reference of a copy of its module, which is then lost
+            raise ValueError('A running decibel reference cannot be maintained '
+                             'when computing modules within a pool of processes.')
+
+        if num_workers > 0:
+            # Obtain the pool of workers
+            executor = self.get_executor(modules, num_workers, use_processes)
+
+            if use_processes:
+                # Divide the modules into one contiguous group per process, such that
+                # the modules within a group share the keyword arguments (e.g. a cache)
+                groups = [group for group in np.array_split(np.arange(len(modules)), num_workers) if len(group)]
+                # Compute the features of the groups concurrently, retaining the order
+                feats = sum(executor.map(process_module_group, groups, repeat(audio), repeat(kwargs)), [])
+            else:
+                # Compute the features of the modules concurrently, retaining the order
+                feats = list(executor.map(process_module, modules, repeat(audio), repeat(kwargs)))
+        else:
+            # Compute the features of the modules one after another
+            feats = [process_module(module, audio, kwargs) for module in modules]
+
+        return feats
+
+    def process_audio_stream(self, blocks):
+        """
+        Get features for audio which is provided incrementally, e.g. while it is
+        being decoded, such that arbitrarily long audio can be processed with bounded
+        memory. The features of each frame are produced as soon as all samples within
+        its receptive field have been received, and only those samples are retained.
+
+        With a fixed decibel reference (or without decibels), the concatenated features
+        are equal to those computed for all of the audio at once, up to the precision of
+        process_frames. Otherwise, the features are converted to decibels with respect to
+        the maximum of all features produced so far, rather than the maximum of the track.
+
+        If the receptive field of the module is unknown, all of the audio is gathered
+        and the features are produced once the blocks are exhausted.
+
+        Parameters
+        ----------
+        blocks : iterable of ndarray
+          Consecutive blocks of mono-channel audio
+
+        Yields
+        ----------
+        feats : ndarray
+          Post-processed features for the next range of frames
+        """
+
+        # Work on a copy of the module, such that the running reference does not persist
+        module = deepcopy(self)
+
+        # Maintain a running reference across blocks, which only applies without a fixed reference
+        module.set_running_ref(0.)
+
+        # Determine how many samples influence each frame
+        receptive_field = module.get_receptive_field()
+
+        # Obtain the number of samples between frames
+        hop_length = module.get_hop_length()
+
+        # Determine how many hops are needed on either side of a frame
+        pad_hops = None if receptive_field is None else int(np.ceil(receptive_field / hop_length))
+
+        # Initialize the retained audio and keep track of the first frame it pertains to
+        buffer, buffer_frame = np.empty(0, dtype=np.float32), 0
+
+        # Keep track of the total number of samples and the next frame to produce
+        num_samples, next_frame = 0, 0
+
+        # Loop through the blocks of audio
+        for block in blocks:
+            # Add the block to the retained audio
+            buffer = np.concatenate((buffer.astype(block.dtype, copy=False), block))
+            num_samples += len(block)
+
+            if pad_hops is None:
+                # Wait for the rest of the audio
+                continue
+
+            # Determine the frames for which all influencing samples have been received
+            num_frames = num_samples // hop_length - pad_hops - next_frame
+
+            if num_frames > 0:
+                # Compute the features for the frames from the retained audio
+                yield module.process_frames(buffer, next_frame - buffer_frame, num_frames)
+
+                next_frame += num_frames
+
+                # Discard samples which cannot influence any of the remaining frames
+                discard_frames = max(0, next_frame - pad_hops) - buffer_frame
+                buffer = buffer[discard_frames * hop_length:]
+                buffer_frame += discard_frames
+
+        # Determine the number of frames expected for all of the audio, without
+        # allocating it (only the number of samples is needed)
+        total_frames = module.get_expected_frames(np.broadcast_to(buffer[:1], (num_samples,)))
+
+        if num_samples > 0 and total_frames > next_frame:
+            # Compute the features for the remaining frames
+            yield module.process_frames(buffer, next_frame - buffer_frame, total_frames - next_frame)
+
     def to_decibels(self, feats):
         """
         Convert features to decibels (dB) units.
@@ -119,11 +400,57 @@ class FeatureModule(object):
           Calculated features in decibels
         """
 
-        # Simply use the appropriate librosa function
-        feats = librosa.core.amplitude_to_db(feats, ref=np.max)
+        # Convert using the reference and clip at 80 dB below it
+        feats = librosa.core.amplitude_to_db(feats, ref=self.get_db_ref(feats), top_db=None)
+        feats = np.maximum(feats, -80)
 
         return feats
 
+    def get_db_ref(self, feats):
+        """
+        Determine the reference for decibel conversion. This is the fixed reference
+        if one was provided, otherwise the maximum of the features, or the maximum
+        of all features processed so far if a running reference is maintained.
+
+        Parameters
+        ----------
+        feats : ndarray
+          Calculated amplitude (or power) features
+
+        Returns
+        ----------
+        db_ref : float
+          Reference for decibel conversion
+        """
+
+        if self.db_ref is not None:
+            # Use the fixed reference
+            db_ref = self.db_ref
+        else:
+            # Use the maximum of the features
+            db_ref = np.max(feats)
+
+            if self.running_ref is not None:
+                # Use and update the maximum across everything processed so far
+                db_ref = max(db_ref, self.running_ref)
+                self.running_ref = db_ref
+
+        return db_ref
+
+    def set_running_ref(self, running_ref):
+        """
+        Set the running decibel reference of the module.
+
+        This is the default behavior. It can be overridden.
+
+        Parameters
+        ----------
+        running_ref : float or None
+          Initial running reference - None to use the maximum of each piece of audio
+        """
+
+        self.running_ref = running_ref
+
     def post_proc(self, feats):
         """
         Perform post-processing steps.
@@ -226,6 +553,119 @@ class FeatureModule(object):
 
         return num_channels
 
+    def get_config_exclusions(self):
+        """
+        Determine which fields of the module do not influence
+        the features and should be left out of its configuration.
+
+        This is the default behavior. It can be overridden.
+
+        Returns
+        ----------
+        exclusions : list of string
+          Names of fields to leave out of the configuration
+        """
+
+        # The running reference only changes while features are being computed,
+        # and the pool of workers only determines how they are computed
+        exclusions = ['running_ref', 'executor', 'executor_pid']
+
+        return exclusions
+
+    @staticmethod
+    def get_config_entry(value):
+        """
+        Convert a field of a module into a serializable configuration entry.
+
+        Parameters
+        ----------
+        value : object
+          Value of the field
+
+        Returns
+        ----------
+        entry : object or None
+          Serializable representation of the field, or None if the field
+          has no such representation and should be left out of the configuration
+        """
+
+        # Default the entry to being left out
+        entry = None
+
+        if isinstance(value, FeatureModule):
+            # Recurse into the configuration of the inner module
+            entry = value.get_config()
+        elif isinstance(value, (list, tuple)):
+            # Convert each element of the collection
+            entry = [FeatureModule.get_config_entry(v) for v in value]
+        elif isinstance(value, (bool, str)):
+            # Strings and booleans are kept as they are
+            entry = value
+        elif isinstance(value, (int, np.integer)):
+            # Make sure integers are native Python types
+            entry = int(value)
+        elif isinstance(value, (float, np.floating)):
+            # Make sure floats are native Python types
+            entry = float(value)
+
+        return entry
+
+    def get_config(self):
+        """
+        Obtain the configuration, i.e. all hyperparameters which
+        influence the features, of the module and any inner modules.
+
+        Returns
+        ----------
+        config : dict
+          Dictionary of hyperparameters, including the name of the module
+        """
+
+        # Start with the name of the module
+        config = {'name' : self.features_name()}
+
+        # Loop through the fields of the module
+        for key, value in vars(self).items():
+            # Skip fields which do not influence the features
+            if key in self.get_config_exclusions():
+                continue
+
+            if value is None:
+                # Unspecified fields (e.g. the decibel reference) are still meaningful
+                config[key] = None
+            else:
+                # Convert the field into a configuration entry
+                entry = self.get_config_entry(value)
+
+                # Add the entry if the field could be represented
+                if entry is not None:
+                    config[key] = entry
+
+        return config
+
+    def get_config_hash(self, length=10):
+        """
+        Obtain a stable hash of the configuration of the module.
+
+        Parameters
+        ----------
+        length : int
+          Number of hexadecimal characters to keep
+
+        Returns
+        ----------
+        config_hash : string
+          Hexadecimal digest of the configuration
+        """
+
+        # Serialize the configuration with a deterministic ordering
+        config = json.dumps(self.get_config(), sort_keys=True)
+
+        # Hash the serialized configuration and truncate the digest
+        config_hash = hashlib.sha1(config.encode('utf-8')).hexdigest()[:length]
+
+        return config_hash
+
     @classmethod
     def features_name(cls):
         """
@@ -238,3 +678,75 @@ class FeatureModule(object):
         """
 
         return cls.__name__
+
+
+def process_module(module, audio, kwargs):
+    """
+    Get the features of a feature extraction module for a piece of audio.
+    This is defined at the top level of the file, such that it can be
+    called within a pool of processes (see FeatureModule.process_modules).
+
+    Parameters
+    ----------
+    module : FeatureModule
+      Feature extraction module to compute
+    audio : ndarray
+      Mono-channel audio
+    kwargs : dict
+      Additional keyword arguments for the process_audio method of the module
+
+    Returns
+    ----------
+    feats : ndarray or None
+      Post-processed features of the module
+    """
+
+    feats = module.process_audio(audio, **kwargs)
+
+    return feats
+
+
+# Inner modules of the feature extraction module which created the
+# pool of processes containing this process (see set_worker_modules)
+worker_modules = None
+
+
+def set_worker_modules(modules):
+    """
+    Keep a copy of the inner modules of a feature extraction module within a process
+    of its pool, such that they do not need to be sent along with each piece of audio.
+
+    Parameters
+    ----------
+    modules : list of FeatureModules
+      Inner modules of the feature extraction module
+    """
+
+    global worker_modules
+
+    worker_modules = modules
+
+
+def process_module_group(indices, audio, kwargs):
+    """
+    Get the features of a group of the inner modules kept within a process (see
+    set_worker_modules) for a piece of audio, computing them one after another.
+
+    Parameters
+    ----------
+    indices : ndarray
+      Indices of the inner modules within the group
+    audio : ndarray
+      Mono-channel audio
+    kwargs : dict
+      Additional keyword arguments for the process_audio method of the modules
+
+    Returns
+    ----------
+    feats : list of (ndarray or None)
+      Post-processed features of each module within the group
+    """
+
+    feats = [process_module(worker_modules[i], audio, kwargs) for i in indices]
+
+    return feats
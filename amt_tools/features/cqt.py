@@ -13,7 +13,7 @@ class CQT(VQT):
     which is a special case of the Variable-Q Transform.
     """
     def __init__(self, sample_rate=22050, hop_length=512, decibels=True,
-                 fmin=None, n_bins=84, bins_per_octave=12):
+                 fmin=None, n_bins=84, bins_per_octave=12, db_ref=None, plan_path=None):
         """
         Initialize parameters for the CQT.
 
@@ -22,4 +22,4 @@ class CQT(VQT):
         See VQT class...
         """
 
-        super().__init__(sample_rate, hop_length, decibels, fmin, n_bins, bins_per_octave, gamma=0)
+        super().__init__(sample_rate, hop_length, decibels, fmin, n_bins, bins_per_octave, gamma=0, db_ref=db_ref, plan_path=plan_path)
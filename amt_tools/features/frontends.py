@@ -0,0 +1,614 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from .vqt import get_resampling_filter
+from .common import FeatureModule
+
+# Regular imports
+from torch import nn
+
+import numpy as np
+import librosa
+import torch
+
+
+class FrontendProxy(FeatureModule):
+    """
+    Implements a stand-in for a feature extraction module whose features are instead
+    computed within a model (see FeatureFrontend). It does not compute any features,
+    such that a dataset only provides audio, but it reports the same frame counts,
+    sample ranges, and times as the module it stands in for.
+    """
+    def __init__(self, module):
+        """
+        Initialize parameters for the proxy.
+
+        Parameters
+        ----------
+        module : FeatureModule
+          Feature extraction module computed within the model
+        """
+
+        super().__init__(module.sample_rate, module.hop_length, module.num_channels, module.decibels, module.db_ref)
+
+        self.module = module
+
+    def get_expected_frames(self, audio):
+        """
+        Determine the number of frames the module will return
+        for a piece of audio.
+
+        Parameters
+        ----------
+        audio : ndarray
+          Mono-channel audio
+
+        Returns
+        ----------
+        num_frames : int
+          Number of frames expected
+        """
+
+        num_frames = self.module.get_expected_frames(audio)
+
+        return num_frames
+
+    def get_sample_range(self, num_frames):
+        """
+        Determine the range of audio samples which will produce features
+        with a given number of frames.
+
+        Parameters
+        ----------
+        num_frames : int
+          Number of frames for sample-range query
+
+        Returns
+        ----------
+        sample_range : ndarray
+          Valid audio signal lengths to obtain queried number of frames
+        """
+
+        sample_range = self.module.get_sample_range(num_frames)
+
+        return sample_range
+
+    def process_audio(self, audio):
+        """
+        Features are not computed by the proxy.
+
+        Parameters
+        ----------
+        audio : ndarray
+          Mono-channel audio
+
+        Returns
+        ----------
+        feats : None
+          No features
+        """
+
+        return None
+
+    def get_times(self, audio):
+        """
+        Determine the time, in seconds, associated with frame.
+
+        Parameters
+        ----------
+        audio: ndarray
+          Mono-channel audio
+
+        Returns
+        ----------
+        times : ndarray
+          Time in seconds of each frame
+        """
+
+        times = self.module.get_times(audio)
+
+        return times
+
+
+class FeatureFrontend(nn.Module):
+    """
+    Implements a generic PyTorch feature extraction frontend, which computes the
+    features of a feature extraction module for a whole batch of audio at once.
+    It can be used as the frontend of a TranscriptionModel, in which case the
+    dataset should use the proxy of the frontend (see get_proxy()).
+    """
+
+    def __init__(self, module):
+        """
+        Initialize parameters common to all feature extraction frontends.
+
+        Parameters
+        ----------
+        module : FeatureModule
+          Feature extraction module specifying the configuration
+        """
+
+        super().__init__()
+
+        self.module = module
+
+    def get_proxy(self):
+        """
+        Obtain a stand-in for the feature extraction module to give to a dataset.
+
+        Returns
+        ----------
+        proxy : FrontendProxy
+          Module which reports the frame times, etc., but does not compute features
+        """
+
+        proxy = FrontendProxy(self.module)
+
+        return proxy
+
+    def get_expected_frames(self, audio):
+        """
+        Determine the number of frames the module will return for a batch of audio.
+
+        Parameters
+        ----------
+        audio : Tensor (B x 1 x N)
+          Batch of mono-channel audio
+          B - batch size
+          N - number of samples
+
+        Returns
+        ----------
+        num_frames : int
+          Number of frames expected
+        """
+
+        # Only the number of samples is relevant, so pass along the first signal
+        num_frames = self.module.get_expected_frames(audio[0, 0])
+
+        return num_frames
+
+    def stft(self, audio, n_fft, window, hop_length=None):
+        """
+        Compute the (centered and zero-padded) STFT of a batch of audio, as librosa.stft does.
+
+        Parameters
+        ----------
+        audio : Tensor (B x 1 x N)
+          Batch of mono-channel audio
+          B - batch size
+          N - number of samples
+        n_fft : int
+          Length of the FFT window
+        window : Tensor (W)
+          Window applied to each frame, which is centered within the FFT window
+          W - number of samples to use for each frame
+        hop_length : int or None (optional)
+          Number of samples between frames - None to use the hop length of the module
+
+        Returns
+        ----------
+        stft : Tensor (B x K x T)
+          Complex-valued STFT for the batch
+          B - batch size
+          K - number of non-negative frequencies
+          T - number of frames
+        """
+
+        # Default the hop length to that of the module
+        if hop_length is None:
+            hop_length = self.module.hop_length
+
+        # Remove the channel dimension
+        audio = audio.flatten(0, -2)
+
+        # Compute the STFT for the whole batch
+        stft = torch.stft(audio,
+                          n_fft=n_fft,
+                          hop_length=hop_length,
+                          win_length=len(window),
+                          window=window,
+                          center=True,
+                          pad_mode='constant',
+                          return_complex=True)
+
+        return stft
+
+    def to_decibels(self, feats, power=False):
+        """
+        Convert features to decibels (dB) units, as FeatureModule does for each track.
+
+        Parameters
+        ----------
+        feats : Tensor (B x F x T)
+          Calculated amplitude (or power) features
+          B - batch size
+          F - number of features (frequency bins)
+          T - number of frames
+        power : bool
+          Whether the features are power, rather than amplitude, features
+
+        Returns
+        ----------
+        feats : Tensor (B x F x T)
+          Calculated features in decibels
+        """
+
+        # Convert amplitude to power, as librosa.amplitude_to_db does
+        feats = feats if power else feats ** 2
+
+        # Minimum power, matching librosa
+        amin = 1e-10
+
+        if self.module.db_ref is None:
+            # Use the maximum of each track as the reference
+            ref = torch.amax(feats, dim=(-2, -1), keepdim=True)
+        else:
+            # Use the fixed reference, converted to power if necessary
+            ref = torch.tensor(self.module.db_ref if power else self.module.db_ref ** 2)
+
+        # Compute the decibels with respect to the reference
+        feats = 10.0 * torch.log10(torch.clamp(feats, min=amin))
+        feats = feats - 10.0 * torch.log10(torch.clamp(ref, min=amin)).to(feats.device)
+
+        if self.module.db_ref is None:
+            # Clip at 80 dB below the maximum of each track
+            feats = torch.maximum(feats, torch.amax(feats, dim=(-2, -1), keepdim=True) - 80)
+        else:
+            # Clip at 80 dB below the fixed reference
+            feats = torch.clamp(feats, min=-80)
+
+        return feats
+
+    def post_proc(self, feats, power=False):
+        """
+        Perform post-processing steps, as FeatureModule does for each track.
+
+        Parameters
+        ----------
+        feats : Tensor (B x F x T)
+          Calculated features
+          B - batch size
+          F - number of features (frequency bins)
+          T - number of frames
+        power : bool
+          Whether the features are power, rather than amplitude, features
+
+        Returns
+        ----------
+        feats : Tensor (B x 1 x F x T)
+          Post-processed features
+          B - batch size
+          F - number of features (frequency bins)
+          T - number of frames
+        """
+
+        if self.module.decibels:
+            # Convert to decibels (dB)
+            feats = self.to_decibels(feats, power)
+
+            # Assuming range of -80 to 0 dB, scale between 0 and 1
+            feats = feats / 80
+            feats = feats + 1
+
+        # Add a channel dimension
+        feats = feats.unsqueeze(-3)
+
+        return feats
+
+
+class STFTFrontend(FeatureFrontend):
+    """
+    Implements a PyTorch frontend for the STFT feature extraction module.
+    """
+
+    def __init__(self, module):
+        """
+        Initialize parameters for the frontend.
+
+        Parameters
+        ----------
+        See FeatureFrontend class...
+        """
+
+        super().__init__(module)
+
+        # Determine the number of samples used for each frame
+        win_length = self.module.n_fft if self.module.win_length is None else self.module.win_length
+
+        # Use the same (periodic) Hann window as librosa
+        self.register_buffer('window', torch.hann_window(win_length, periodic=True))
+
+    def forward(self, audio):
+        """
+        Compute the spectrogram features for a batch of audio.
+
+        Parameters
+        ----------
+        audio : Tensor (B x 1 x N)
+          Batch of mono-channel audio
+          B - batch size
+          N - number of samples
+
+        Returns
+        ----------
+        feats : Tensor (B x 1 x F x T)
+          Post-processed features
+          B - batch size
+          F - number of features (frequency bins)
+          T - number of frames
+        """
+
+        # Take the magnitude of the spectrogram
+        spec = torch.abs(self.stft(audio, self.module.n_fft, self.window))
+
+        # Post-process the spectrogram
+        feats = self.post_proc(spec)
+
+        return feats
+
+
+class MelSpecFrontend(STFTFrontend):
+    """
+    Implements a PyTorch frontend for the Mel Spectrogram feature extraction module.
+    """
+
+    def __init__(self, module):
+        """
+        Initialize parameters for the frontend.
+
+        Parameters
+        ----------
+        See FeatureFrontend class...
+        """
+
+        super().__init__(module)
+
+        # Obtain the same Mel filterbank as librosa
+        mel_basis = librosa.filters.mel(sr=self.module.sample_rate,
+                                        n_fft=self.module.n_fft,
+                                        n_mels=self.module.n_mels,
+                                        htk=self.module.htk)
+        self.register_buffer('mel_basis', torch.from_numpy(mel_basis))
+
+    def forward(self, audio):
+        """
+        Compute the Mel Spectrogram features for a batch of audio.
+
+        Parameters
+        ----------
+        audio : Tensor (B x 1 x N)
+          Batch of mono-channel audio
+          B - batch size
+          N - number of samples
+
+        Returns
+        ----------
+        feats : Tensor (B x 1 x F x T)
+          Post-processed features
+          B - batch size
+          F - number of features (Mel bins)
+          T - number of frames
+        """
+
+        # Compute the power spectrogram
+        spec = torch.abs(self.stft(audio, self.module.n_fft, self.window)) ** 2
+
+        # Apply the Mel filterbank
+        mel = torch.matmul(self.mel_basis, spec)
+
+        # Post-process the Mel Spectrogram
+        feats = self.post_proc(mel, power=True)
+
+        return feats
+
+
+class VQTFrontend(FeatureFrontend):
+    """
+    Implements a PyTorch frontend for the VQT (or CQT) feature extraction module.
+
+    The transform plan of the module (see VQT.build_plan) is followed in the same way as
+    librosa.vqt, i.e. the filters of each octave are applied to the STFT of the audio after
+    it has been recursively downsampled. The downsampling is performed with a strided
+    convolution using the impulse response of the resampler of librosa.vqt, such that the
+    features match those of the module up to numerical precision, except within the first
+    and last couple of frames when the audio is downsampled by more than 2 before processing,
+    where the resampler handles the boundaries of the signal slightly differently.
+    """
+
+    def __init__(self, module):
+        """
+        Initialize parameters for the frontend.
+
+        Parameters
+        ----------
+        See FeatureFrontend class...
+        """
+
+        super().__init__(module)
+
+        if self.module.plan is None:
+            # The filters cannot be obtained without a transform plan
+            raise ValueError('The VQT frontend requires a module with a transform plan.')
+
+        # Obtain the transform plan of the module
+        plan = self.module.plan
+
+        # Keep track of the number of downsamples before processing and the FFT length for each octave
+        self.early_ds_count = plan['early_ds_count']
+        self.n_ffts = list(plan['n_ffts'])
+
+        # Loop through the octaves, starting from the top
+        for i, (scale, fft_basis) in enumerate(zip(plan['scales'], plan['fft_bases'])):
+            # Convert the filters to the type of the response and compensate for downsampling
+            fft_basis = fft_basis.astype(np.complex64).tocoo()
+            fft_basis.data *= scale
+
+            # Keep the filters sparse, since only a few frequencies of each are non-zero
+            fft_basis = torch.sparse_coo_tensor(np.vstack([fft_basis.row, fft_basis.col]),
+                                                fft_basis.data, fft_basis.shape).coalesce()
+
+            self.register_buffer(f'fft_basis_{i}', fft_basis)
+            # Frames are not windowed before applying the filters
+            self.register_buffer(f'window_{i}', torch.ones(self.n_ffts[i]))
+
+        # Keep track of the length of each filter to scale the final response
+        self.register_buffer('lengths', torch.from_numpy(plan['lengths']).float())
+
+        # Determine which downsampling steps are taken, i.e. before processing and between octaves
+        ds_steps = [('early', 2 ** self.early_ds_count)] if self.early_ds_count > 0 else []
+        ds_steps += [('octave', 2)]
+
+        # Obtain the filter for each downsampling step
+        for name, ds_factor in ds_steps:
+            # Obtain the impulse response of the resampler used by librosa.vqt
+            taps, offset = get_resampling_filter(ds_factor)
+
+            self.register_buffer(f'{name}_filter', torch.from_numpy(taps).float().view(1, 1, -1))
+            setattr(self, f'{name}_offset', offset)
+
+    def downsample(self, audio, name, ds_factor):
+        """
+        Downsample a batch of audio in the same way as librosa.vqt.
+
+        Parameters
+        ----------
+        audio : Tensor (B x 1 x N)
+          Batch of mono-channel audio
+          B - batch size
+          N - number of samples
+        name : string
+          Name of the filter to use, either 'early' or 'octave'
+        ds_factor : int
+          Factor by which to downsample
+
+        Returns
+        ----------
+        audio : Tensor (B x 1 x M)
+          Batch of downsampled audio
+          B - batch size
+          M - number of samples after downsampling
+        """
+
+        # Obtain the filter and the position of its first tap
+        taps, offset = getattr(self, f'{name}_filter'), getattr(self, f'{name}_offset')
+
+        # Determine the number of samples after downsampling, matching librosa
+        num_samples = -(-audio.size(-1) // ds_factor)
+
+        # Pad the audio with zeros, such that every output sample is computed
+        audio = nn.functional.pad(audio, (-offset, taps.size(-1) + offset))
+
+        # Apply the filter and decimate the audio
+        audio = nn.functional.conv1d(audio, taps, stride=ds_factor)[..., :num_samples]
+
+        return audio
+
+    def forward(self, audio):
+        """
+        Compute the VQT features for a batch of audio.
+
+        Parameters
+        ----------
+        audio : Tensor (B x 1 x N)
+          Batch of mono-channel audio
+          B - batch size
+          N - number of samples
+
+        Returns
+        ----------
+        feats : Tensor (B x 1 x F x T)
+          Post-processed features
+          B - batch size
+          F - number of features (frequency bins)
+          T - number of frames
+        """
+
+        # Determine the hop length after early downsampling
+        my_hop = self.module.hop_length // 2 ** self.early_ds_count
+
+        if self.early_ds_count > 0:
+            # Downsample the audio before processing the top octave
+            audio = self.downsample(audio, 'early', 2 ** self.early_ds_count)
+
+        # Initialize a list to hold the response of each octave
+        vqt = list()
+
+        # Loop through the octaves, starting from the top
+        for i, n_fft in enumerate(self.n_ffts):
+            # Compute the STFT of the audio at the current sampling rate
+            stft = self.stft(audio, n_fft, getattr(self, f'window_{i}'), my_hop)
+            # Arrange the frames of the whole batch as columns of a single matrix
+            frames = stft.transpose(0, 1).flatten(1)
+            # Apply the (sparse) filters of the octave to the STFT
+            response = torch.sparse.mm(getattr(self, f'fft_basis_{i}'), frames)
+            # Restore the batch dimension
+            vqt.insert(0, response.unflatten(1, (stft.size(0), -1)).transpose(0, 1))
+
+            if my_hop % 2 == 0:
+                # Downsample the audio for the next octave
+                audio = self.downsample(audio, 'octave', 2)
+                my_hop //= 2
+
+        # Determine the number of frames common to all octaves
+        num_frames = min(response.size(-1) for response in vqt)
+
+        # Stack the responses of the octaves, trimming the lowest octave if necessary
+        vqt = torch.cat([response[..., :num_frames] for response in vqt], dim=-2)[..., -self.module.n_bins:, :]
+
+        # Take the magnitude and scale by the square-root of the length of each filter
+        vqt = torch.abs(vqt) / torch.sqrt(self.lengths).unsqueeze(-1)
+
+        # Post-process the VQT
+        feats = self.post_proc(vqt)
+
+        return feats
+
+
+class HVQTFrontend(FeatureFrontend):
+    """
+    Implements a PyTorch frontend for the HVQT (or HCQT) feature extraction module.
+    """
+
+    def __init__(self, module):
+        """
+        Initialize parameters for the frontend.
+
+        Parameters
+        ----------
+        See FeatureFrontend class...
+        """
+
+        super().__init__(module)
+
+        # Create a VQT frontend for each harmonic
+        self.harmonics = nn.ModuleList([VQTFrontend(vqt) for vqt in self.module.modules])
+
+    def forward(self, audio):
+        """
+        Compute the VQT features stacked across harmonics for a batch of audio.
+
+        Parameters
+        ----------
+        audio : Tensor (B x 1 x N)
+          Batch of mono-channel audio
+          B - batch size
+          N - number of samples
+
+        Returns
+        ----------
+        feats : Tensor (B x H x F x T)
+          Post-processed features
+          B - batch size
+          H - number of harmonics
+          F - number of features (frequency bins)
+          T - number of frames
+        """
+
+        # Determine the frame cutoff (highest harmonic's output)
+        num_frames = self.get_expected_frames(audio)
+
+        # Take the VQT at each harmonic and stack the features along the channel dimension
+        feats = torch.cat([harmonic(audio)[..., :num_frames] for harmonic in self.harmonics], dim=-3)
+
+        return feats
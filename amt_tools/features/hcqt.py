@@ -12,7 +12,8 @@ class HCQT(HVQT):
     A simple wrapper (for convenience) for a Harmonic Constant-Q Transform,
     """
     def __init__(self, sample_rate=22050, hop_length=512, decibels=True,
-                 fmin=None, harmonics=None, n_bins=84, bins_per_octave=12):
+                 fmin=None, harmonics=None, n_bins=84, bins_per_octave=12, db_ref=None,
+                 num_workers=0, use_processes=False, plan_path=None):
         """
         Initialize parameters for the HCQT.
 
@@ -21,4 +22,6 @@ class HCQT(HVQT):
         See HVQT class...
         """
 
-        super().__init__(sample_rate, hop_length, decibels, fmin, harmonics, n_bins, bins_per_octave, gamma=0)
+        super().__init__(sample_rate, hop_length, decibels, fmin, harmonics,
+                         n_bins, bins_per_octave, gamma=0, db_ref=db_ref,
+                         num_workers=num_workers, use_processes=use_processes, plan_path=plan_path)
@@ -7,6 +7,7 @@ from .vqt import VQT
 # Regular imports
 import numpy as np
 import librosa
+import os
 
 
 class HVQT(FeatureModule):
@@ -15,7 +16,7 @@ class HVQT(FeatureModule):
     """
     def __init__(self, sample_rate=22050, hop_length=512, decibels=True,
                  fmin=None, harmonics=None, n_bins=84, bins_per_octave=12,
-                 gamma=None):
+                 gamma=None, db_ref=None, num_workers=0, use_processes=False, plan_path=None):
         """
         Initialize parameters for the HVQT.
 
@@ -26,6 +27,14 @@ class HVQT(FeatureModule):
           Center frequency of lowest filter in lowest harmonic
         harmonics : list of int or float
           Harmonics transforms to take, relative to transform at fmin
+        num_workers : int
+          Number of workers to compute the harmonics concurrently - 0 to compute them in order
+        use_processes : bool
+          Whether to use a pool of processes, rather than threads, for the workers
+          (not possible with a running reference, see FeatureModule.process_modules)
+        plan_path : string or None (optional)
+          Base path for the transform plans of the harmonics, each of which is
+          loaded from or saved to this path with the harmonic appended (see VQT)
         """
 
         # Default the lowest center frequency to the note C1
@@ -40,13 +49,17 @@ class HVQT(FeatureModule):
         harmonics.sort()
         self.harmonics = harmonics
 
-        super().__init__(sample_rate, hop_length, len(self.harmonics), decibels)
+        super().__init__(sample_rate, hop_length, len(self.harmonics), decibels, db_ref)
+
+        self.plan_path = plan_path
 
         modules = []
         # Construct a list of VQT modules for the harmonic transform
         for h in self.harmonics:
             # Center frequency for the harmonic
             fmin_h = h * fmin
+            # Path for the transform plan of the harmonic
+            plan_path_h = None if plan_path is None else self.get_plan_path(plan_path, h)
             # Add a module for this harmonic's VQT
             modules += [VQT(sample_rate=sample_rate,
                             hop_length=hop_length,
@@ -54,9 +67,40 @@ class HVQT(FeatureModule):
                             fmin=fmin_h,
                             n_bins=n_bins,
                             bins_per_octave=bins_per_octave,
-                            gamma=gamma)]
+                            gamma=gamma,
+                            db_ref=db_ref,
+                            plan_path=plan_path_h)]
         self.modules = modules
 
+        self.num_workers = num_workers
+        self.use_processes = use_processes
+
+    @staticmethod
+    def get_plan_path(plan_path, harmonic):
+        """
+        Determine the path for the transform plan of a harmonic.
+
+        Parameters
+        ----------
+        plan_path : string
+          Base path for the transform plans of the harmonics
+        harmonic : int or float
+          Harmonic of the transform
+
+        Returns
+        ----------
+        plan_path_h : string
+          Path for the transform plan of the harmonic
+        """
+
+        # Separate any extension from the base path
+        root, ext = os.path.splitext(plan_path)
+
+        # Append the harmonic to the name of the file
+        plan_path_h = f'{root}_h{harmonic}{ext}'
+
+        return plan_path_h
+
     def get_expected_frames(self, audio):
         """
         Determine the number of frames the module will return
@@ -104,6 +148,30 @@ class HVQT(FeatureModule):
 
         return sample_range
 
+    def get_receptive_field(self):
+        """
+        Determine the number of samples on either side of a frame's
+        center which can influence the features of the frame.
+
+        Returns
+        ----------
+        receptive_field : int or None
+          Number of samples influencing each frame on either side
+        """
+
+        # Gather the receptive fields of the harmonics
+        receptive_field = [module.get_receptive_field()
+                           for module in self.modules]
+
+        if None in receptive_field:
+            # The receptive field of at least one harmonic is unknown
+            receptive_field = None
+        else:
+            # Take the widest receptive field across harmonics
+            receptive_field = max(receptive_field)
+
+        return receptive_field
+
     def process_audio(self, audio):
         """
         Get the VQT features stacked across harmonics for a piece of audio.
@@ -122,16 +190,51 @@ class HVQT(FeatureModule):
         # Determine the frame cutoff (highest harmonic's output)
         num_frames = self.get_expected_frames(audio)
 
-        feats = []
+        # Share the downsampled signals and STFTs across harmonics (within each process if there are several)
+        cache = dict()
+
         # Take the VQT at each harmonic
-        for module in self.modules:
-            feats += [module.process_audio(audio)[..., :num_frames]]
+        feats = self.process_modules(self.modules, audio, self.num_workers, self.use_processes, cache=cache)
+        # Trim the features of each harmonic to the same number of frames
+        feats = [mod_feats[..., :num_frames] for mod_feats in feats]
 
         # Stack the features along the
         feats = np.concatenate(feats, axis=0)
 
         return feats
 
+    def get_config_exclusions(self):
+        """
+        Determine which fields of the module do not influence
+        the features and should be left out of its configuration.
+
+        Returns
+        ----------
+        exclusions : list of string
+          Names of fields to leave out of the configuration
+        """
+
+        # The workers only determine how the features are computed
+        exclusions = super().get_config_exclusions() + ['num_workers', 'use_processes', 'plan_path']
+
+        return exclusions
+
+    def set_running_ref(self, running_ref):
+        """
+        Set the running decibel reference of the module and of the VQT module of each harmonic.
+
+        Parameters
+        ----------
+        running_ref : float or None
+          Initial running reference - None to use the maximum of each piece of audio
+        """
+
+        super().set_running_ref(running_ref)
+
+        # Loop through the VQT modules of the harmonics
+        for module in self.modules:
+            module.set_running_ref(running_ref)
+
     def to_decibels(self, feats):
         """
         Convert features to decibels (dB) units.
@@ -15,7 +15,7 @@ class MelSpec(FeatureModule):
     Implements a Mel Spectrogram wrapper.
     """
     def __init__(self, sample_rate=16000, hop_length=512, decibels=True,
-                 n_mels=229, n_fft=2048, win_length=None, htk=False):
+                 n_mels=229, n_fft=2048, win_length=None, htk=False, db_ref=None):
         """
         Initialize parameters for the Mel Spectrogram.
 
@@ -34,13 +34,29 @@ class MelSpec(FeatureModule):
           Whether to use HTK formula instead of Slaney
         """
 
-        super().__init__(sample_rate, hop_length, 1, decibels)
+        super().__init__(sample_rate, hop_length, 1, decibels, db_ref)
 
         self.n_mels = n_mels
         self.n_fft = n_fft
         self.win_length = win_length
         self.htk = htk
 
+    def get_receptive_field(self):
+        """
+        Determine the number of samples on either side of a frame's
+        center which can influence the features of the frame.
+
+        Returns
+        ----------
+        receptive_field : int
+          Number of samples influencing each frame on either side
+        """
+
+        # Frames are centered within the FFT window
+        receptive_field = self.n_fft // 2
+
+        return receptive_field
+
     def process_audio(self, audio):
         """
         Get the Mel Spectrogram features for a piece of audio.
@@ -85,7 +101,8 @@ class MelSpec(FeatureModule):
           Calculated features in decibels
         """
 
-        # Simply use the appropriate librosa function
-        feats = librosa.core.power_to_db(feats, ref=np.max)
+        # Convert using the reference and clip at 80 dB below it
+        feats = librosa.core.power_to_db(feats, ref=self.get_db_ref(feats), top_db=None)
+        feats = np.maximum(feats, -80)
 
         return feats
@@ -15,7 +15,7 @@ class STFT(FeatureModule):
     Implements a Spectrogram wrapper.
     """
     def __init__(self, sample_rate=16000, hop_length=512, decibels=True,
-                 n_fft=2048, win_length=None):
+                 n_fft=2048, win_length=None, db_ref=None):
         """
         Initialize parameters for the Mel Spectrogram.
 
@@ -30,11 +30,27 @@ class STFT(FeatureModule):
           Defaults to n_fft if unspecified
         """
 
-        super().__init__(sample_rate, hop_length, 1, decibels)
+        super().__init__(sample_rate, hop_length, 1, decibels, db_ref)
 
         self.n_fft = n_fft
         self.win_length = win_length
 
+    def get_receptive_field(self):
+        """
+        Determine the number of samples on either side of a frame's
+        center which can influence the features of the frame.
+
+        Returns
+        ----------
+        receptive_field : int
+          Number of samples influencing each frame on either side
+        """
+
+        # Frames are centered within the FFT window
+        receptive_field = self.n_fft // 2
+
+        return receptive_field
+
     def process_audio(self, audio):
         """
         Get the spectrogram features for a piece of audio.
@@ -2,13 +2,25 @@
 
 # My imports
 from .common import FeatureModule
+from .. import tools
 
 # Regular imports
-from librosa.core.constantq import __early_downsample_count as early_downsample_count
 from librosa.filters import window_bandwidth
+from scipy.sparse import csr_matrix
+from functools import lru_cache
 
 import numpy as np
+import warnings
 import librosa
+import os
+
+try:
+    # Private helpers of librosa, which the transform plan relies on to match librosa.vqt
+    from librosa.core.constantq import __early_downsample_count as early_downsample_count
+    from librosa.filters import _relative_bandwidth as relative_bandwidth
+except ImportError:
+    # Fall back to librosa.vqt when they are unavailable (see build_plan)
+    early_downsample_count, relative_bandwidth = None, None
 
 
 class VQT(FeatureModule):
@@ -16,7 +28,7 @@ class VQT(FeatureModule):
     Implements a Variable-Q Transform wrapper.
     """
     def __init__(self, sample_rate=22050, hop_length=512, decibels=True,
-                 fmin=None, n_bins=84, bins_per_octave=12, gamma=None):
+                 fmin=None, n_bins=84, bins_per_octave=12, gamma=None, db_ref=None, plan_path=None):
         """
         Initialize parameters for the VQT.
 
@@ -31,9 +43,11 @@ class VQT(FeatureModule):
           Number of bins per octave
         gamma : float or None
           Bandwidth offset for determining filter lengths
+        plan_path : string or None (optional)
+          Path to load the transform plan from, or to save it to if it does not exist yet
         """
 
-        super().__init__(sample_rate, hop_length, 1, decibels)
+        super().__init__(sample_rate, hop_length, 1, decibels, db_ref)
 
         # Default the lowest center frequency to the note C1
         if fmin is None:
@@ -56,6 +70,235 @@ class VQT(FeatureModule):
         n_octs = int(np.ceil(float(self.n_bins) / self.bins_per_octave))
         self.n_octs = n_octs
 
+        if plan_path is not None and not plan_path.endswith(f'.{tools.NPZ_EXT}'):
+            # Add the extension to the path, as it will be added when the plan is saved
+            plan_path = f'{plan_path}.{tools.NPZ_EXT}'
+        self.plan_path = plan_path
+
+        if self.plan_path is not None and os.path.exists(self.plan_path):
+            # Load the transform plan computed previously
+            self.plan = self.load_plan(self.plan_path)
+        else:
+            # Compute the transform plan once, to be reused for every track
+            self.plan = self.build_plan()
+
+            if self.plan_path is not None:
+                # Save the transform plan for later use (e.g. by other processes)
+                self.save_plan(self.plan_path)
+
+    def __setstate__(self, state):
+        """
+        Restore the fields of the module when it is unpickled.
+
+        Parameters
+        ----------
+        state : dict
+          Fields of the module
+        """
+
+        # Modules saved before plans existed compute the transform with librosa.vqt
+        state.setdefault('plan_path', None)
+        state.setdefault('plan', None)
+
+        super().__setstate__(state)
+
+    def get_config_exclusions(self):
+        """
+        Determine which fields of the module do not influence
+        the features and should be left out of its configuration.
+
+        Returns
+        ----------
+        exclusions : list of string
+          Names of fields to leave out of the configuration
+        """
+
+        # The transform plan is derived entirely from the other fields
+        exclusions = super().get_config_exclusions() + ['plan_path', 'plan']
+
+        return exclusions
+
+    def build_plan(self):
+        """
+        Compute everything required by librosa.vqt which does not depend on the audio,
+        i.e. the frequency-domain filters, the FFT size for each octave, and the
+        downsampling schedule, following librosa.core.constantq.vqt.
+
+        Returns
+        ----------
+        plan : dict or None
+          Dictionary containing the transform plan, or None if the filters
+          exceed the Nyquist frequency and the transform cannot be computed,
+          or if the private helpers of librosa the plan relies on are missing
+        """
+
+        if early_downsample_count is None or relative_bandwidth is None:
+            # Leave the transform to librosa.vqt, since the plan may not match it
+            return None
+
+        # Obtain the center frequency of each filter, computed in the same way as librosa.vqt
+        freqs = librosa.interval_frequencies(n_bins=self.n_bins,
+                                             fmin=self.fmin,
+                                             intervals='equal',
+                                             bins_per_octave=self.bins_per_octave,
+                                             sort=True)
+
+        if self.n_bins == 1:
+            # Compute the relative bandwidth for equal spacing directly
+            ratio = 2.0 ** (2.0 / self.bins_per_octave)
+            alpha = np.atleast_1d((ratio - 1) / (ratio + 1))
+        else:
+            # Compute the relative bandwidth of each filter
+            alpha = relative_bandwidth(freqs=freqs)
+
+        # Determine the highest frequency which the filters will respond to
+        _, filter_cutoff = librosa.filters.wavelet_lengths(freqs=freqs,
+                                                           sr=self.sample_rate,
+                                                           window=self.window,
+                                                           gamma=self.gamma,
+                                                           alpha=alpha)
+
+        if filter_cutoff > self.sample_rate / 2.0:
+            # Leave the error to be raised by librosa when processing audio
+            return None
+
+        # Calculate the number of downsamples before processing
+        early_ds_count = self.get_early_ds_count()
+
+        # Determine the sampling rate and hop length after early downsampling
+        sr = self.sample_rate / 2 ** early_ds_count
+        hop_length = self.hop_length // 2 ** early_ds_count
+
+        # Determine the number of filters within each octave
+        n_filters = min(self.bins_per_octave, self.n_bins)
+
+        # Initialize the plan, including the filter lengths to scale the final response
+        plan = {'early_ds_count' : early_ds_count,
+                'lengths' : librosa.filters.wavelet_lengths(freqs=freqs,
+                                                            sr=sr,
+                                                            window=self.window,
+                                                            gamma=self.gamma,
+                                                            alpha=alpha)[0],
+                'n_ffts' : [], 'scales' : [], 'fft_bases' : []}
+
+        # Keep track of the sampling rate and hop length for each octave
+        my_sr, my_hop = sr, hop_length
+
+        # Loop through the octaves, starting from the top
+        for i in range(self.n_octs):
+            # Slice out the filters of the current octave
+            if i == 0:
+                sl = slice(-n_filters, None)
+            else:
+                sl = slice(-n_filters * (i + 1), -n_filters * i)
+
+            # Obtain the time-domain filters at the sampling rate of the octave
+            basis, lengths = librosa.filters.wavelet(freqs=freqs[sl],
+                                                     sr=my_sr,
+                                                     window=self.window,
+                                                     pad_fft=True,
+                                                     norm=1,
+                                                     gamma=self.gamma,
+                                                     alpha=alpha[sl])
+
+            # Determine the length of the FFT window
+            n_fft = basis.shape[1]
+
+            # Re-normalize the filters with respect to the FFT window length
+            basis *= lengths[:, np.newaxis] / float(n_fft)
+
+            # Retain the non-negative frequencies of the FFT (using the library of librosa) of each filter
+            fft_basis = librosa.get_fftlib().fft(basis, n=n_fft, axis=1)[:, : (n_fft // 2) + 1]
+            # Sparsify the filters, keeping full precision until the audio type is known
+            fft_basis = librosa.util.sparsify_rows(fft_basis, quantile=0.01, dtype=np.complex128)
+
+            # Add the octave to the plan, along with the scaling to compensate for downsampling
+            plan['n_ffts'].append(n_fft)
+            plan['scales'].append(np.sqrt(sr / my_sr))
+            plan['fft_bases'].append(fft_basis)
+
+            if my_hop % 2 == 0:
+                # Downsample the audio for the next octave
+                my_hop //= 2
+                my_sr /= 2.0
+
+        return plan
+
+    def save_plan(self, path):
+        """
+        Save the transform plan of the module to disk.
+
+        Parameters
+        ----------
+        path : string
+          Path to save the plan as a NumPy zip file
+        """
+
+        # Start with the configuration of the module, which the plan must agree with
+        keys = ['config_hash']
+        entries = [self.get_config_hash()]
+
+        if self.plan is not None:
+            # Add the fields shared across octaves
+            keys += ['early_ds_count', 'lengths', 'n_ffts', 'scales']
+            entries += [self.plan['early_ds_count'], self.plan['lengths'],
+                        self.plan['n_ffts'], self.plan['scales']]
+
+            # Add the components of the sparse filters for each octave
+            for i, fft_basis in enumerate(self.plan['fft_bases']):
+                keys += [f'data_{i}', f'indices_{i}', f'indptr_{i}']
+                entries += [fft_basis.data, fft_basis.indices, fft_basis.indptr]
+
+        # Make sure the directory for the plan exists
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        # Save the plan as a NumPy zip file
+        tools.save_pack_npz(path, keys, *entries)
+
+    def load_plan(self, path):
+        """
+        Load a transform plan saved with save_plan.
+
+        Parameters
+        ----------
+        path : string
+          Path to the NumPy zip file containing the plan
+
+        Returns
+        ----------
+        plan : dict or None
+          Dictionary containing the transform plan
+        """
+
+        # Load the saved plan
+        data = tools.load_unpack_npz(path)
+
+        if str(data['config_hash']) != self.get_config_hash():
+            # The plan was computed for a different configuration
+            warnings.warn('Saved transform plan does not match configuration. '
+                          'Computing the plan instead.', category=RuntimeWarning)
+
+            return self.build_plan()
+
+        if 'n_ffts' not in data.keys():
+            # No plan could be computed for the configuration
+            return None
+
+        # Unpack the fields shared across octaves
+        plan = {'early_ds_count' : int(data['early_ds_count']),
+                'lengths' : data['lengths'],
+                'n_ffts' : [int(n_fft) for n_fft in data['n_ffts']],
+                'scales' : list(data['scales']),
+                'fft_bases' : []}
+
+        # Reassemble the sparse filters for each octave
+        for i, n_fft in enumerate(plan['n_ffts']):
+            fft_basis = csr_matrix((data[f'data_{i}'], data[f'indices_{i}'], data[f'indptr_{i}']),
+                                   shape=(len(data[f'indptr_{i}']) - 1, (n_fft // 2) + 1))
+            plan['fft_bases'].append(fft_basis)
+
+        return plan
+
     def get_early_ds_count(self):
         """
         Utility function to calculate the number of downsamples required
@@ -86,14 +329,67 @@ class VQT(FeatureModule):
         # Calculate the Nyquist rate
         nyquist = self.sample_rate / 2.0
 
-        # Calculate the number of downsamples
-        early_ds_count = early_downsample_count(nyquist=nyquist,
-                                                filter_cutoff=freq_cutoff,
-                                                hop_length=self.hop_length,
-                                                n_octaves=self.n_octs)
+        if early_downsample_count is not None:
+            # Calculate the number of downsamples
+            early_ds_count = early_downsample_count(nyquist=nyquist,
+                                                    filter_cutoff=freq_cutoff,
+                                                    hop_length=self.hop_length,
+                                                    n_octaves=self.n_octs)
+        else:
+            # Downsample as many times as the filter cutoff allows, as librosa 0.11 does
+            ds_count_cutoff = max(0, int(np.ceil(np.log2(nyquist / freq_cutoff)) - 1) - 1)
+            # Determine how many times the hop length can be divided by 2
+            num_twos = (self.hop_length & -self.hop_length).bit_length() - 1 if self.hop_length > 0 else 0
+            # Make sure the hop length can still be divided by 2 for each octave
+            ds_count_hop = max(0, num_twos - self.n_octs + 1)
+            # Calculate the number of downsamples
+            early_ds_count = min(ds_count_cutoff, ds_count_hop)
 
         return early_ds_count
 
+    def get_receptive_field(self):
+        """
+        Determine the number of samples on either side of a frame's
+        center which can influence the features of the frame.
+
+        Returns
+        ----------
+        receptive_field : int or None
+          Number of samples influencing each frame on either side,
+          or None if the transform cannot be computed (see build_plan)
+        """
+
+        if self.plan is None:
+            # There are no filters to determine the receptive field from
+            return None
+
+        # Obtain the number of downsamples before processing the top octave
+        early_ds_count = self.plan['early_ds_count']
+
+        # Determine the number of original samples influencing each sample of the
+        # top octave's signal, which is only downsampled if there is early downsampling
+        resampling_field = 0 if early_ds_count == 0 else get_resampling_support(2 ** early_ds_count)
+
+        # Keep track of the hop length and downsampling factor of each octave
+        my_hop, ds_factor = self.hop_length // 2 ** early_ds_count, 2 ** early_ds_count
+
+        # Initialize the receptive field
+        receptive_field = 0
+
+        # Loop through the octaves, starting from the top
+        for n_fft in self.plan['n_ffts']:
+            # Frames are centered within the FFT window at the sampling rate of the octave,
+            # and each of those samples is influenced by the samples of the resampling filters
+            receptive_field = max(receptive_field, (n_fft // 2) * ds_factor + resampling_field)
+
+            if my_hop % 2 == 0:
+                # Add the resampling filter for the next octave, at the current sampling rate
+                resampling_field += get_resampling_support(2) * ds_factor
+                my_hop //= 2
+                ds_factor *= 2
+
+        return receptive_field
+
     def get_expected_frames(self, audio):
         """
         Determine the number of frames the module will return
@@ -159,7 +455,7 @@ class VQT(FeatureModule):
 
         return sample_range
 
-    def process_audio(self, audio):
+    def process_audio(self, audio, cache=None):
         """
         Get the VQT features for a piece of audio.
 
@@ -167,6 +463,8 @@ class VQT(FeatureModule):
         ----------
         audio : ndarray
           Mono-channel audio
+        cache : dict or None (optional)
+          Intermediate results to share with other modules (see apply_plan)
 
         Returns
         ----------
@@ -174,17 +472,220 @@ class VQT(FeatureModule):
           Post-processed features
         """
 
-        # Calculate the VQT using librosa
-        vqt = librosa.vqt(y=audio,
-                          sr=self.sample_rate,
-                          hop_length=self.hop_length,
-                          fmin=self.fmin,
-                          n_bins=self.n_bins,
-                          bins_per_octave=self.bins_per_octave,
-                          gamma=self.gamma)
+        if self.plan is None:
+            # Calculate the VQT using librosa
+            vqt = librosa.vqt(y=audio,
+                              sr=self.sample_rate,
+                              hop_length=self.hop_length,
+                              fmin=self.fmin,
+                              n_bins=self.n_bins,
+                              bins_per_octave=self.bins_per_octave,
+                              gamma=self.gamma)
+        else:
+            # Calculate the VQT using the precomputed plan
+            vqt = self.apply_plan(audio, self.plan, cache)
+
         # Take the magnitude of the VQT
         vqt = np.abs(vqt)
         # Post-process the VQT
         feats = super().post_proc(vqt)
 
         return feats
+
+    def apply_plan(self, audio, plan, cache=None):
+        """
+        Calculate the VQT of a piece of audio with a precomputed transform plan.
+        This follows the steps of librosa.vqt and produces the same result.
+
+        Parameters
+        ----------
+        audio : ndarray
+          Mono-channel audio
+        plan : dict
+          Dictionary containing the transform plan
+        cache : dict or None (optional)
+          Downsampled signals and STFTs of the audio, keyed by the downsampling
+          steps taken, which can be shared across modules with the same sampling
+          rate and hop length (see HVQT) - None to only use within the call
+
+        Returns
+        ----------
+        vqt : ndarray
+          Complex-valued VQT of the audio
+        """
+
+        if cache is None:
+            # Initialize a cache to use only for this call
+            cache = dict()
+
+        # Determine the complex type of the response, as librosa does
+        dtype = librosa.util.dtype_r2c(audio.dtype)
+
+        # Obtain the number of downsamples before processing the top octave
+        early_ds_count = plan['early_ds_count']
+
+        # Determine the hop length after early downsampling
+        my_hop = self.hop_length // 2 ** early_ds_count
+
+        if (early_ds_count, 0) not in cache.keys():
+            if early_ds_count > 0:
+                # Downsample the audio before processing the top octave
+                ds_factor = 2 ** early_ds_count
+
+                if audio.shape[-1] < ds_factor:
+                    raise librosa.ParameterError(f'Input signal length={len(audio):d} '
+                                                 f'is too short for {self.n_octs:d}-octave CQT')
+
+                cache[(early_ds_count, 0)] = librosa.resample(audio, orig_sr=ds_factor, target_sr=1,
+                                                              res_type='soxr_hq', scale=True)
+            else:
+                # Use the audio as is for the top octave
+                cache[(early_ds_count, 0)] = audio
+
+        # Keep track of the number of times the audio has been downsampled by 2
+        num_halvings = 0
+
+        # Initialize a list to hold the response of each octave
+        vqt_resp = []
+
+        # Loop through the octaves, starting from the top
+        for n_fft, scale, fft_basis in zip(plan['n_ffts'], plan['scales'], plan['fft_bases']):
+            if (early_ds_count, num_halvings) not in cache.keys():
+                # Downsample the audio of the previous octave
+                cache[(early_ds_count, num_halvings)] = librosa.resample(cache[(early_ds_count, num_halvings - 1)],
+                                                                         orig_sr=2, target_sr=1,
+                                                                         res_type='soxr_hq', scale=True)
+
+            if (early_ds_count, num_halvings, n_fft) not in cache.keys():
+                # Compute the unwindowed STFT of the audio at the current sampling rate
+                cache[(early_ds_count, num_halvings, n_fft)] = librosa.stft(cache[(early_ds_count, num_halvings)],
+                                                                            n_fft=n_fft,
+                                                                            hop_length=my_hop,
+                                                                            window='ones',
+                                                                            pad_mode='constant',
+                                                                            dtype=dtype)
+
+            # Convert the filters to the type of the response and compensate for downsampling
+            fft_basis = fft_basis.astype(dtype)
+            fft_basis.data *= scale
+
+            # Apply the filters of the octave to the STFT
+            vqt_resp.append(fft_basis.dot(cache[(early_ds_count, num_halvings, n_fft)]))
+
+            if my_hop % 2 == 0:
+                # Downsample the audio for the next octave
+                my_hop //= 2
+                num_halvings += 1
+
+        # Determine the number of frames common to all octaves
+        num_frames = min(resp.shape[-1] for resp in vqt_resp)
+
+        # Stack the responses of the octaves from the bottom, trimming the lowest octave if necessary
+        vqt = np.concatenate([resp[..., :num_frames] for resp in reversed(vqt_resp)], axis=-2)[-self.n_bins:]
+
+        # Scale the response by the square-root of the length of each filter
+        vqt /= np.sqrt(plan['lengths'])[:, np.newaxis]
+
+        return vqt
+
+
+@lru_cache(maxsize=None)
+def get_resampling_support(ds_factor):
+    """
+    Determine the number of samples on either side of an output sample which can
+    influence it when downsampling by an integer factor in the same way as librosa.vqt.
+
+    The soxr_hq resampler is designed for 20-bit precision, so the support is taken as the
+    furthest input sample whose impulse response exceeds 2^-20 relative to the peak response.
+
+    Parameters
+    ----------
+    ds_factor : int
+      Factor by which to downsample
+
+    Returns
+    ----------
+    support : int
+      Number of input samples influencing each output sample on either side
+    """
+
+    # Make the signal long enough that the response is not affected by its boundaries
+    num_samples = 2 ** 12 * ds_factor
+
+    # Initialize the support
+    support = 0
+
+    # Loop through every phase of the impulse with respect to the output samples
+    for phase in range(ds_factor):
+        # Construct an impulse in the middle of the signal
+        impulse = np.zeros(num_samples)
+        impulse[num_samples // 2 + phase] = 1
+
+        # Downsample the impulse with the same resampling filter as librosa.vqt
+        response = np.abs(librosa.resample(impulse, orig_sr=ds_factor, target_sr=1,
+                                           res_type='soxr_hq', scale=True))
+
+        # Determine which output samples are significantly influenced by the impulse
+        significant = np.nonzero(response > 2 ** -20 * np.max(response))[0]
+
+        # Determine the distance from the impulse to the furthest of these output samples
+        support = max(support, int(np.max(np.abs(significant * ds_factor - num_samples // 2 - phase))))
+
+    return support
+
+
+@lru_cache(maxsize=None)
+def get_resampling_filter(ds_factor):
+    """
+    Obtain the impulse response of the filter which downsamples by an integer factor
+    in the same way as librosa.vqt, such that it can be applied elsewhere (e.g. PyTorch).
+
+    The soxr_hq resampler acts as a linear-phase FIR filter followed by decimation, so the
+    response is measured with an impulse at every phase, and only the taps exceeding 2^-20
+    relative to the peak are kept, since the remaining ones are below its precision.
+
+    Parameters
+    ----------
+    ds_factor : int
+      Factor by which to downsample
+
+    Returns
+    ----------
+    taps : ndarray (K)
+      Filter taps, such that output sample m is the sum of taps[k] * audio[m * ds_factor + offset + k]
+      K - number of taps
+    offset : int
+      Position of the first tap with respect to the input sample aligned with the output sample
+    """
+
+    # Make the signal long enough that the response is not affected by its boundaries
+    num_samples = 2 ** 12 * ds_factor
+
+    # Initialize an array to hold the response at every distance from the aligned input sample
+    response = np.zeros(2 * num_samples)
+
+    # Loop through every phase of the impulse with respect to the output samples
+    for phase in range(ds_factor):
+        # Construct an impulse in the middle of the signal
+        impulse = np.zeros(num_samples)
+        impulse[num_samples // 2 + phase] = 1
+
+        # Downsample the impulse with the same resampling filter as librosa.vqt
+        output = librosa.resample(impulse, orig_sr=ds_factor, target_sr=1, res_type='soxr_hq', scale=True)
+
+        # Determine the distance from each output sample to the impulse
+        distances = num_samples // 2 + phase - np.arange(len(output)) * ds_factor
+
+        # Keep track of the response at each distance, shifted to be non-negative
+        response[distances + num_samples] = output
+
+    # Determine which taps are significant
+    significant = np.nonzero(np.abs(response) > 2 ** -20 * np.max(np.abs(response)))[0]
+
+    # Trim the response to the significant taps
+    taps = response[significant[0] : significant[-1] + 1]
+
+    # Determine the position of the first tap relative to the aligned input sample
+    offset = int(significant[0]) - num_samples
+
+    return taps, offset
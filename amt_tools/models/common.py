@@ -157,7 +157,7 @@ class TranscriptionModel(nn.Module):
 
         return NotImplementedError
 
-    def run_on_batch(self, batch):
+    def run_on_batch(self, batch, keep_raw=False):
         """
         Perform all processing steps of the transcription model on a batch.
 
@@ -166,6 +166,8 @@ class TranscriptionModel(nn.Module):
         batch : dict
           Dictionary containing all relevant fields for a group of tracks - if a single
           track is to be transcribed this way, it must be organized as a batch of size 1
+        keep_raw : bool
+          Whether to also include the raw model output (before post-processing)
 
         Returns
         ----------
@@ -183,6 +185,39 @@ class TranscriptionModel(nn.Module):
         # Obtain the model output for the batch of features
         batch[tools.KEY_OUTPUT] = self(batch[tools.KEY_FEATS])
 
+        if keep_raw:
+            # Copy the dictionary (but not the entries), since post-processing replaces them
+            raw_output = dict(batch[tools.KEY_OUTPUT])
+
+        # Post-process batch
+        output = self.post_proc(batch)
+
+        # Add the frame times to the output
+        output[tools.KEY_TIMES] = batch[tools.KEY_TIMES]
+
+        if keep_raw:
+            # Add the raw model output to the output
+            output[tools.KEY_OUTPUT] = raw_output
+
+        return output
+
+    def replay_on_batch(self, batch):
+        """
+        Perform only the post-processing steps of the transcription model on a batch
+        which already contains the raw model output (e.g. loaded from an ActivationStore).
+
+        Parameters
+        ----------
+        batch : dict
+          Dictionary including raw model output, frame times,
+          and potentially ground-truth for a group of tracks
+
+        Returns
+        ----------
+        output : dict
+          Dictionary containing loss and relevant predictions for a group of tracks
+        """
+
         # Post-process batch
         output = self.post_proc(batch)
 
@@ -374,7 +409,8 @@ class SoftmaxGroups(OutputLayer):
 
         # Transform ground-truth tabs into 1D softmax labels
         reference = reference.transpose(-2, -1)
-        reference[reference == -1] = self.num_classes - 1
+        # Replace silent labels out-of-place, since the reference may share memory with the track data
+        reference = reference.masked_fill(reference == -1, self.num_classes - 1)
         reference = reference.flatten().long()
 
         # Calculate the loss for the entire pseudo-batch
@@ -437,7 +473,7 @@ class LogisticBank(OutputLayer):
     or not the key is active.
     """
 
-    def __init__(self, dim_in, dim_out):
+    def __init__(self, dim_in, dim_out, threshold=0.5):
         """
         Initialize fields of the multi-label logistic layer.
 
@@ -447,10 +483,14 @@ class LogisticBank(OutputLayer):
           Dimensionality of input features
         dim_out : int
           Dimensionality of output activations
+        threshold : float or None (optional)
+          Activation value under which keys are considered inactive - None to leave activations as-is
         """
 
         super().__init__(dim_in, dim_out)
 
+        self.threshold = threshold
+
         # Initialize the output layer
         self.output_layer = nn.Sequential(
             nn.Linear(self.dim_in, self.dim_out),
@@ -458,6 +498,21 @@ class LogisticBank(OutputLayer):
             nn.Sigmoid()
         )
 
+    def __setstate__(self, state):
+        """
+        Restore the fields of the layer when it is unpickled (e.g. by torch.load).
+
+        Parameters
+        ----------
+        state : dict
+          Fields of the layer
+        """
+
+        # Layers saved before the threshold was configurable use the original value
+        state.setdefault('threshold', 0.5)
+
+        super().__setstate__(state)
+
     def forward(self, feats):
         """
         Perform the main processing steps for the output layer.
@@ -546,7 +601,8 @@ class LogisticBank(OutputLayer):
 
         # Switch the frame and key dimension
         final_output = final_output.transpose(-2, -1)
-        # Convert output to binary values
-        final_output = tools.threshold_activations(final_output, 0.5)
+        if self.threshold is not None:
+            # Convert output to binary values
+            final_output = tools.threshold_activations(final_output, self.threshold)
 
         return final_output
@@ -19,7 +19,8 @@ class OnsetsFrames(TranscriptionModel):
     Implements the Onsets & Frames model (V1) (https://arxiv.org/abs/1710.11153).
     """
 
-    def __init__(self, dim_in, profile, in_channels=1, model_complexity=2, detach_heads=False, device='cpu'):
+    def __init__(self, dim_in, profile, in_channels=1, model_complexity=2, detach_heads=False, device='cpu',
+                 chunk_len=None):
         """
         Initialize the model and establish parameter defaults in function signature.
 
@@ -29,11 +30,15 @@ class OnsetsFrames(TranscriptionModel):
 
         detach_heads : bool
           Whether to feed the gradient of the pitch head back into the onset head
+        chunk_len : int or None (optional)
+          Number of frames for the acoustic models to process at a time
+          during inference - None to process entire tracks at once
         """
 
         super().__init__(dim_in, profile, in_channels, model_complexity, device)
 
         self.detach_heads = detach_heads
+        self.chunk_len = chunk_len
 
         # Number of output neurons for the acoustic models
         self.dim_am = 256 * self.model_complexity
@@ -46,14 +51,14 @@ class OnsetsFrames(TranscriptionModel):
 
         # Create the onset detector head
         self.onset_head = nn.Sequential(
-            AcousticModel(self.dim_in, self.dim_am, self.in_channels, self.model_complexity),
+            AcousticModel(self.dim_in, self.dim_am, self.in_channels, self.model_complexity, self.chunk_len),
             LanguageModel(self.dim_am, self.dim_lm),
             LogisticBank(self.dim_lm, dim_out)
         )
 
         # Create the multi pitch estimator head
         self.pitch_head = nn.Sequential(
-            AcousticModel(self.dim_in, self.dim_am, self.in_channels, self.model_complexity),
+            AcousticModel(self.dim_in, self.dim_am, self.in_channels, self.model_complexity, self.chunk_len),
             LogisticBank(self.dim_am, dim_out)
         )
 
@@ -201,7 +206,8 @@ class OnsetsFrames2(OnsetsFrames):
     Implements the Onsets & Frames model (V2) (https://arxiv.org/abs/1810.12247).
     """
 
-    def __init__(self, dim_in, profile, in_channels=1, model_complexity=3, detach_heads=True, device='cpu'):
+    def __init__(self, dim_in, profile, in_channels=1, model_complexity=3, detach_heads=True, device='cpu',
+                 chunk_len=None):
         """
         Initialize the model and establish parameter defaults in function signature.
 
@@ -210,14 +216,14 @@ class OnsetsFrames2(OnsetsFrames):
         See OnsetsFrames class...
         """
 
-        super().__init__(dim_in, profile, in_channels, model_complexity, detach_heads, device)
+        super().__init__(dim_in, profile, in_channels, model_complexity, detach_heads, device, chunk_len)
 
         # Number of output neurons for each head's activations
         dim_out = self.profile.get_range_len()
 
         # Create the offset detector head
         self.offset_head = nn.Sequential(
-            AcousticModel(self.dim_in, self.dim_am, self.in_channels, self.model_complexity),
+            AcousticModel(self.dim_in, self.dim_am, self.in_channels, self.model_complexity, self.chunk_len),
             LanguageModel(self.dim_am, self.dim_lm),
             LogisticBank(self.dim_lm, dim_out)
         )
@@ -336,7 +342,7 @@ class AcousticModel(nn.Module):
     https://github.com/magenta/magenta/blob/master/magenta/models/onsets_frames_transcription/model.py
     """
 
-    def __init__(self, dim_in, dim_out, in_channels=1, model_complexity=2):
+    def __init__(self, dim_in, dim_out, in_channels=1, model_complexity=2, chunk_len=None):
         """
         Initialize the acoustic model and establish parameter defaults in function signature.
 
@@ -350,10 +356,14 @@ class AcousticModel(nn.Module):
           Number of channels in input features
         model_complexity : int, optional (default 1)
           Scaling parameter for size of model's components
+        chunk_len : int or None (optional)
+          Number of frames to process at a time during inference - None to process all frames at once
         """
 
         super(AcousticModel, self).__init__()
 
+        self.chunk_len = chunk_len
+
         # Number of filters for each convolutional layer
         nf1 = 16 * model_complexity
         nf2 = nf1
@@ -425,9 +435,42 @@ class AcousticModel(nn.Module):
             nn.Dropout(dp3)
         )
 
-    def forward(self, in_feats):
+    def __setstate__(self, state):
         """
-        Feed features through the acoustic model.
+        Restore the fields of the acoustic model when it is unpickled (e.g. by torch.load).
+
+        Parameters
+        ----------
+        state : dict
+          Fields of the acoustic model
+        """
+
+        # Models saved before chunking was supported process all frames at once
+        state.setdefault('chunk_len', None)
+
+        super().__setstate__(state)
+
+    def get_receptive_field(self):
+        """
+        Determine the number of frames on either side of a frame
+        which can influence the embeddings of the frame.
+
+        Returns
+        ----------
+        receptive_field : int
+          Number of frames influencing each frame on either side
+        """
+
+        # Each (centered) convolution extends the context along the time axis, whereas
+        # the pooling operations and the fully-connected layer act on individual frames
+        receptive_field = sum([module.dilation[0] * (module.kernel_size[0] - 1) // 2
+                               for module in self.modules() if isinstance(module, nn.Conv2d)])
+
+        return receptive_field
+
+    def embed(self, in_feats):
+        """
+        Feed features through the layers of the acoustic model all at once.
 
         Parameters
         ----------
@@ -462,6 +505,60 @@ class AcousticModel(nn.Module):
 
         return out_feats
 
+    def forward(self, in_feats):
+        """
+        Feed features through the acoustic model. During inference, the features can be
+        processed in chunks of frames, each extended by the receptive field on either side,
+        such that the embeddings are the same as when processing all frames at once.
+
+        Parameters
+        ----------
+        in_feats : Tensor (B x C x T x F)
+          Input features for a batch of tracks,
+          B - batch size
+          C - channels
+          T - number of frames
+          F - number of features (frequency bins)
+
+        Returns
+        ----------
+        out_feats : Tensor (B x T x E)
+          Embeddings for a batch of tracks,
+          B - batch size
+          T - number of frames
+          E - dimensionality of embeddings
+        """
+
+        # Determine the number of frames given
+        seq_length = in_feats.size(-2)
+
+        # Do not chunk the features during training or if they fit within a single chunk
+        if self.training or self.chunk_len is None or seq_length <= self.chunk_len:
+            # Process all of the frames at once
+            out_feats = self.embed(in_feats)
+        else:
+            # Determine the amount of context needed on either side of each chunk
+            context = self.get_receptive_field()
+
+            # Initialize a list to hold the embeddings for each chunk
+            out_feats = list()
+
+            # Loop through the start of each chunk
+            for start in range(0, seq_length, self.chunk_len):
+                # Determine where the chunk ends
+                end = min(start + self.chunk_len, seq_length)
+                # Extend the chunk with context, without exceeding the boundaries of the track
+                context_start, context_end = max(0, start - context), min(seq_length, end + context)
+                # Process the extended chunk of features
+                chunk_out = self.embed(in_feats[..., context_start : context_end, :])
+                # Discard the embeddings of the context frames
+                out_feats.append(chunk_out[..., start - context_start : end - context_start, :])
+
+            # Stitch the embeddings of the chunks back together
+            out_feats = torch.cat(out_feats, dim=-2)
+
+        return out_feats
+
 
 class LanguageModel(nn.Module):
     """
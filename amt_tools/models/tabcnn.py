@@ -7,6 +7,8 @@ from .. import tools
 # Regular imports
 from torch import nn
 
+import torch.nn.functional as F
+
 
 class TabCNN(TranscriptionModel):
     """
@@ -108,16 +110,17 @@ class TabCNN(TranscriptionModel):
         # TODO
         # batch = deepcopy(batch)
 
-        # Extract the features from the batch as a NumPy array
-        feats = tools.tensor_to_array(batch[tools.KEY_FEATS])
-        # Window the features to mimic real-time operation
-        feats = tools.framify_activations(feats, self.frame_width)
-        # Convert the features back to PyTorch tensor and add to device
-        feats = tools.array_to_tensor(feats, self.device)
-        # Switch the sequence-frame and feature axes
-        feats = feats.transpose(-2, -3)
-        # Remove the single channel dimension
-        feats = feats.squeeze(1)
+        if self.training:
+            # Window the features (on their device) to mimic real-time operation
+            feats = tools.framify_tensor(batch[tools.KEY_FEATS], self.frame_width)
+            # Switch the sequence-frame and feature axes
+            feats = feats.transpose(-2, -3)
+            # Remove the single channel dimension
+            feats = feats.squeeze(1)
+        else:
+            # Pad the frame axis with zeros, such that each frame has a full window of context
+            # (windows are formed implicitly in forward() instead of being materialized here)
+            feats = F.pad(batch[tools.KEY_FEATS], (self.frame_width // 2, self.frame_width // 2))
 
         batch[tools.KEY_FEATS] = feats
 
@@ -129,7 +132,7 @@ class TabCNN(TranscriptionModel):
 
         Parameters
         ----------
-        feats : Tensor (B x T x F x W)
+        feats : Tensor (B x T x F x W) if training or (B x 1 x F x (T + W - 1)) otherwise
           Input features for a batch of tracks,
           B - batch size
           T - number of frames
@@ -151,20 +154,42 @@ class TabCNN(TranscriptionModel):
         # Obtain the batch size before sequence-frame axis is collapsed
         batch_size = feats.size(0)
 
-        # Collapse the sequence-frame axis into the batch axis,
-        # so that each windowed group of frames is treated as one
-        # independent sample. This is not done during pre-processing
-        # in order to maintain consistency with the notion of batch size
-        feats = feats.reshape(-1, 1, self.dim_in, self.frame_width)
-
-        # Obtain the feature embeddings
-        embeddings = self.conv(feats)
-        # Flatten spatial features into one embedding
-        embeddings = embeddings.flatten(1)
-        # Size of the embedding
-        embedding_size = embeddings.size(-1)
-        # Restore proper batch dimension, unsqueezing sequence-frame axis
-        embeddings = embeddings.view(batch_size, -1, embedding_size)
+        if self.training:
+            # Collapse the sequence-frame axis into the batch axis,
+            # so that each windowed group of frames is treated as one
+            # independent sample. This is not done during pre-processing
+            # in order to maintain consistency with the notion of batch size
+            feats = feats.reshape(-1, 1, self.dim_in, self.frame_width)
+
+            # Obtain the feature embeddings
+            embeddings = self.conv(feats)
+            # Flatten spatial features into one embedding
+            embeddings = embeddings.flatten(1)
+            # Size of the embedding
+            embedding_size = embeddings.size(-1)
+            # Restore proper batch dimension, unsqueezing sequence-frame axis
+            embeddings = embeddings.view(batch_size, -1, embedding_size)
+        else:
+            # Determine the number of frames, excluding those added for padding
+            num_frames = feats.size(-1) - 2 * (self.frame_width // 2)
+
+            # Run the convolutional layers once over the whole padded features, since
+            # the convolutions for each window are a slice of the convolutions over all of them
+            embeddings = self.conv[:-2](feats)
+
+            # Obtain the reduction layer (dropout is not active during evaluation)
+            reduction = self.conv[-2]
+            # Perform the reduction with a stride of one along the frame axis, such that each
+            # frame receives the reduction of the first columns of its own window (the last
+            # column of each window would be dropped by the reduction in the windowed case)
+            embeddings = F.max_pool2d(embeddings,
+                                      kernel_size=reduction.kernel_size,
+                                      stride=(reduction.stride[0], 1))[..., :num_frames]
+
+            # Move the frame axis ahead of the filter and frequency axes
+            embeddings = embeddings.permute(0, 3, 1, 2)
+            # Flatten spatial features into one embedding for each frame
+            embeddings = embeddings.reshape(batch_size, num_frames, -1)
 
         # Obtain the tablature estimate and add it to the output dictionary
         output[tools.KEY_TABLATURE] = self.dense(embeddings)
@@ -19,6 +19,7 @@ HOME = os.path.expanduser('~')
 DEFAULT_DATASETS_DIR = os.path.join(HOME, 'Desktop', 'Datasets')
 DEFAULT_GENERATED_DIR = os.path.abspath(os.path.join(ROOT_DIR, 'generated'))
 GROUND_TRUTH_DIR = 'ground_truth'
+SHARED_STORE_DIR = 'shared_store'
 
 DEFAULT_FEATURES_GT_DIR = os.path.join(DEFAULT_GENERATED_DIR, 'data')
 DEFAULT_EXPERIMENTS_DIR = os.path.join(DEFAULT_GENERATED_DIR, 'experiments')
@@ -33,6 +34,9 @@ MID_EXT = 'mid'
 MIDI_EXT = 'midi'
 JAMS_EXT = 'jams'
 NPZ_EXT = 'npz'
+NPY_EXT = 'npy'
+JSON_EXT = 'json'
+DAT_EXT = 'dat'
 TXT_EXT = 'txt'
 PYT_EXT = 'pt'
 
@@ -93,6 +97,13 @@ KEY_PRECISION = 'precision'
 KEY_RECALL = 'recall'
 KEY_F1 = 'f1-score'
 
+KEY_ERROR_SUB = 'substitution-error'
+KEY_ERROR_MISS = 'miss-error'
+KEY_ERROR_FA = 'false-alarm-error'
+KEY_ERROR_TOTAL = 'total-error'
+
+KEY_CHROMA = 'chroma'
+
 KEY_NOTE_ON = 'note-on'
 KEY_NOTE_OFF = 'note-off'
 
@@ -114,6 +125,7 @@ DEFAULT_PIANO_HIGHEST_PITCH = 108
 # DATA TYPES                                     #
 ##################################################
 
+INT = 'int'
 UINT = 'uint'
 FLOAT = 'float'
 FLOAT32 = 'float32'
@@ -124,3 +136,7 @@ FLOAT32 = 'float32'
 
 PYT_MODEL = 'model'
 PYT_STATE = 'opt-state'
+
+NPY_SIDECAR = 'entries'
+KEY_KEYS = 'keys'
+KEY_SCALARS = 'scalars'
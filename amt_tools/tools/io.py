@@ -268,8 +268,17 @@ def load_notes_midi(midi_path):
     # Keep track of sustain pedal activity
     sustain_status = False
 
-    # Initialize an empty list to store MIDI events
-    events = []
+    # Initialize an empty list to store notes
+    notes = list()
+
+    # Keep track of the time of the most recent note or sustain pedal event
+    last_time = 0
+
+    # Notes (indices) of each pitch awaiting the next note event with the same pitch (at most one per pitch)
+    pending_note = dict()
+    # Notes (indices) of each pitch whose offset occurred while the sustain pedal was on,
+    # awaiting the release of the sustain pedal or the next note event with the same pitch
+    pending_sustain = dict()
 
     # Loop through MIDI messages, keeping track of only those pertaining to notes and sustain pedal activity
     for message in midi:
@@ -291,55 +300,50 @@ def load_notes_midi(midi_path):
             if sustain_control and sustain_change:
                 # Update the status of the sustain pedal (on/off)
                 sustain_status = sustain_on
-                # Determine which event occurred (SUSTAIN_ON or SUSTAIN_OFF)
-                event_type = constants.MIDI_SUSTAIN_ON if sustain_status else constants.MIDI_SUSTAIN_OFF
-
-                # Create a new event detailing the sustain pedal activity
-                event = dict(index=len(events),
-                             time=time,
-                             type=event_type,
-                             note=None,
-                             velocity=0)
-                # Add the sustain pedal event to the MIDI event list
-                events.append(event)
+                # Keep track of the time of the sustain pedal event
+                last_time = time
+
+                if not sustain_status:
+                    # Sustained notes of all pitches end when the sustain pedal is released
+                    for pitch in pending_sustain.keys():
+                        for idx in pending_sustain[pitch]:
+                            notes[idx][1] = time
+                    # Reset the sustained notes
+                    pending_sustain = dict()
 
         # Check if the message constitutes a note event (NOTE_ON or NOTE_OFF)
         if 'note' in message.type:
             # MIDI offsets can be either NOTE_OFF events or NOTE_ON with zero velocity
             velocity = message.velocity if message.type == constants.MIDI_NOTE_ON else 0
-
-            # Create a new event detailing the note and current sustain pedal state
-            event = dict(index=len(events),
-                         time=time,
-                         type='note',
-                         note=message.note,
-                         velocity=velocity,
-                         sustain=sustain_status)
-            # Add the note event to the MIDI event list
-            events.append(event)
-
-    # Initialize an empty list to store notes
-    notes = list()
-
-    # Loop through all of the documented MIDI events
-    for i, onset in enumerate(events):
-        # Ignore anything but note onset events (note offsets and sustain activity ignored)
-        if onset['velocity'] == 0:
-            continue
-
-        # Determine where the corresponding offset occurs
-        # by finding the next note event with the same pitch,
-        # clipping at the final frame if no correspondence is found
-        offset = next(n for n in events[i + 1:] if n['note'] == onset['note'] or n is events[-1])
-
-        # Check if the sustain pedal is on when the note offset occurs
-        if offset['sustain'] and offset is not events[-1]:
-            # If so, offset is when sustain ends or another note event of same pitch occurs
-            offset = next(n for n in events[offset['index'] + 1:] if n['type'] == constants.MIDI_SUSTAIN_OFF or
-                          n['note'] == onset['note'] or n is events[-1])
-
-        # Create a new note entry and append it to the list of notes
-        notes.append([onset['time'], offset['time'], onset['note'], onset['velocity']])
+            # Keep track of the time of the note event
+            last_time = time
+
+            # Sustained notes of the same pitch end at any note event with the same pitch
+            for idx in pending_sustain.pop(message.note, []):
+                notes[idx][1] = time
+
+            # Check if a note of the same pitch was awaiting this note event
+            if message.note in pending_note.keys():
+                # Obtain the index of the note
+                idx = pending_note.pop(message.note)
+
+                if sustain_status:
+                    # The note continues until the sustain pedal is released or the pitch occurs again
+                    pending_sustain.setdefault(message.note, []).append(idx)
+                else:
+                    # The note ends at this note event
+                    notes[idx][1] = time
+
+            # Check if the message constitutes a note onset
+            if velocity > 0:
+                # Create a new note entry (with an undetermined offset) and append it to the list of notes
+                notes.append([time, None, message.note, velocity])
+                # The note awaits the next note event with the same pitch
+                pending_note[message.note] = len(notes) - 1
+
+    # Any remaining notes end at the final note or sustain pedal event
+    for idx in list(pending_note.values()) + sum(pending_sustain.values(), []):
+        notes[idx][1] = last_time
 
     # Package the notes into an array
     notes = np.array(notes)
@@ -12,7 +12,10 @@ import numpy as np
 import warnings
 import librosa
 import random
+import shutil
 import torch
+import json
+import os
 
 
 # TODO - torch Tensor compatibility
@@ -660,24 +663,41 @@ def notes_to_multi_pitch(pitches, intervals, times, profile):
     # Initialize an empty multi pitch array
     multi_pitch = np.zeros((num_pitches, num_frames))
 
+    # Check if there is anything to populate
+    if len(pitches) == 0 or num_frames == 0:
+        return multi_pitch
+
     # Convert the pitches to number of semitones from lowest note
-    pitches = np.round(pitches - profile.low).astype(constants.UINT)
+    pitches = np.round(pitches - profile.low).astype(constants.INT)
 
-    # Duplicate the array of times for each note and stack along a new axis
-    times = np.concatenate([[times]] * max(1, len(pitches)), axis=0)
+    # Count the frames which begin at or before each onset and before each offset
+    onsets = np.searchsorted(times, intervals[..., 0], side='right')
+    offsets = np.searchsorted(times, intervals[..., 1], side='left')
 
-    # Determine the frame where each note begins and ends
-    onsets = np.argmin((times <= intervals[..., :1]), axis=1) - 1
-    offsets = np.argmin((times < intervals[..., 1:]), axis=1) - 1
+    # Each note begins at the last frame beginning at or before its onset - notes
+    # with onsets occurring before the first frame are moved to the last frame
+    onsets = np.where(onsets >= 1, onsets - 1, num_frames - 1)
+    # Each note ends (exclusively) after the last frame beginning before its offset -
+    # notes with offsets occurring at or before the first frame end after the last frame
+    offsets = np.where(offsets >= 1, offsets, num_frames)
 
-    # Clip all offsets at last frame - they will end up at -1 from
-    # previous operation if they occurred beyond last frame time
-    offsets[offsets == -1] = num_frames - 1
+    # Only keep the notes which span at least one frame
+    valid = onsets < offsets
+    pitches, onsets, offsets = pitches[valid], onsets[valid], offsets[valid]
 
-    # Loop through each note
-    for i in range(len(pitches)):
-        # Populate the multi pitch array with activations for the note
-        multi_pitch[pitches[i], onsets[i] : offsets[i] + 1] = 1
+    # Determine the flattened index of the beginning and end of each
+    # note, leaving an extra frame for notes which end after the last frame
+    starts = pitches * (num_frames + 1) + onsets
+    stops = pitches * (num_frames + 1) + offsets
+
+    # Count the notes starting and stopping at each pitch and frame
+    changes = np.bincount(starts, minlength=num_pitches * (num_frames + 1)) - \
+              np.bincount(stops, minlength=num_pitches * (num_frames + 1))
+    changes = changes.reshape(num_pitches, num_frames + 1)
+
+    # Accumulate the changes to obtain the number of active notes at each pitch and
+    # frame, and populate the multi pitch array wherever at least one note is active
+    multi_pitch[np.cumsum(changes, axis=-1)[..., :-1] > 0] = 1
 
     return multi_pitch
 
@@ -1619,6 +1639,7 @@ def threshold_activations(activations, threshold=0.5):
 def framify_activations(activations, win_length, hop_length=1, pad=True):
     """
     Chunk activations into overlapping frames along the last dimension.
+    The chunks are a (read-only) view of the activations, which are only copied if padded.
 
     Parameters
     ----------
@@ -1646,48 +1667,77 @@ def framify_activations(activations, win_length, hop_length=1, pad=True):
     if pad:
         # Determine the number of intermediary frames required to give back same size
         int_frames = num_frames + 2 * pad_length
-        # Pad the activations with zeros
-        activations = librosa.util.pad_center(activations, int_frames)
+        # Pad the activations with zeros on both sides of the last dimension
+        activations = np.pad(activations, [(0, 0)] * (activations.ndim - 1) + [(pad_length, pad_length)])
     else:
         # Number of intermediary frames is the same
         int_frames = num_frames
 
+    # Determine the number of hops in the activations
+    num_hops = (int_frames - 2 * pad_length) // hop_length
 
-    # TODO - commented code is cleaner but breaks in PyTorch pipeline during model.pre_proc
+    # Obtain a view of every chunk with the specified window length
+    activations = np.lib.stride_tricks.sliding_window_view(activations, win_length, axis=-1)
 
-    """
-    # Convert the activations to a fortran array
-    activations = np.asfortranarray(activations)
+    # Keep only the chunks beginning at each hop
+    activations = activations[..., : num_hops * hop_length : hop_length, :]
 
-    # Framify the activations using librosa
-    activations = librosa.util.frame(activations, win_length, hop_length).copy()
+    return activations
 
-    # Switch window index and time index axes
-    activations = np.swapaxes(activations, -1, -2)
 
-    return activations
+def framify_tensor(tensor, win_length, hop_length=1, pad=True):
     """
+    Chunk a tensor into overlapping frames along the last dimension, without leaving its device.
+    The chunks are a view of the tensor, which is only copied if padded.
 
-    # Determine the number of hops in the activations
+    Parameters
+    ----------
+    tensor : Tensor
+      Provided tensor
+    win_length : int
+      Number of frames to include in each chunk
+    hop_length : int
+      Number of frames to skip between each chunk
+    pad : bool
+      Whether to pad incoming tensor with zeros to give back tensor with same shape
+
+    Returns
+    ----------
+    tensor : Tensor
+      Framified tensor
+    """
+
+    # Determine the number of frames provided
+    num_frames = tensor.size(-1)
+
+    # Determine the pad length (also used if not padding)
+    pad_length = (win_length // 2)
+
+    if pad:
+        # Determine the number of intermediary frames required to give back same size
+        int_frames = num_frames + 2 * pad_length
+        # Pad the tensor with zeros on both sides of the last dimension
+        tensor = torch.nn.functional.pad(tensor, (pad_length, pad_length))
+    else:
+        # Number of intermediary frames is the same
+        int_frames = num_frames
+
+    # Determine the number of hops in the tensor
     num_hops = (int_frames - 2 * pad_length) // hop_length
-    # Obtain the indices of the start of each chunk
-    chunk_idcs = np.arange(0, num_hops) * hop_length
 
-    # Chunk the activations with the specified window and hop length
-    activations = [np.expand_dims(activations[..., i : i + win_length], axis=-2) for i in chunk_idcs]
+    # Obtain a view of the chunks beginning at each hop
+    tensor = tensor.unfold(-1, win_length, hop_length)
 
-    # Combine the chunks to get the framified activations
-    activations = np.concatenate(activations, axis=-2)
+    # Keep only as many chunks as there are hops
+    tensor = tensor[..., : num_hops, :]
 
-    return activations
+    return tensor
 
 
 def inhibit_activations(activations, times, window_length):
     """
     Remove any activations within a specified time window following a previous activation.
 
-    TODO - this is extremely slow for non-sparse activations
-
     Parameters
     ----------
     activations : ndarray
@@ -1704,35 +1754,43 @@ def inhibit_activations(activations, times, window_length):
       Inhibited activations
     """
 
-    # Keep track of non-inhibited non-zeros
-    pitch_idcs_keep = np.empty(0)
-    frame_idcs_keep = np.empty(0)
+    # Determine the total number of frames
+    num_frames = activations.shape[-1]
 
-    while True:
-        # Determine the pitch and frame indices where activations begin
-        pitch_idcs, frame_idcs = activations.nonzero()
+    # Determine the pitch and frame indices of all non-zeros (sorted by pitch, then by frame)
+    pitch_idcs, frame_idcs = activations.nonzero()
 
-        # Check if there are any non-zeros left to process
-        if len(pitch_idcs) == 0 or len(frame_idcs) == 0:
-            # If not, stop looping
-            break
+    # Determine where the inhibition window following each non-zero ends,
+    # making sure each window includes the non-zero itself and no more frames than exist
+    inhibition_ends = np.searchsorted(np.append(times, np.inf), times[frame_idcs] + window_length, side='left')
+    inhibition_ends = np.clip(inhibition_ends, frame_idcs + 1, num_frames)
 
-        # Determine the location of the next non-zero activation
-        next_nz_pitch, next_nz_frame = pitch_idcs[0], frame_idcs[0]
+    # Determine the flattened index of each non-zero, leaving an extra frame after each pitch
+    nz_keys = pitch_idcs * (num_frames + 1) + frame_idcs
 
-        # Determine where the inhibition window ends
-        inhibition_end = np.argmax(np.append(times, np.inf) >= times[next_nz_frame] + window_length)
+    # Determine the first non-zero following the inhibition window of each non-zero,
+    # which is the first non-zero of the next pitch if there are none left for the pitch
+    next_nz_idcs = np.searchsorted(nz_keys, pitch_idcs * (num_frames + 1) + inhibition_ends, side='left')
 
-        # Zero-out the activations in the inhibition window (including the non-zero itself)
-        activations[next_nz_pitch, next_nz_frame : inhibition_end] = 0
+    # Keep track of non-inhibited non-zeros
+    keep = np.zeros(len(nz_keys), dtype=bool)
+
+    # Start with the first non-zero, which is never inhibited
+    nz_idx = 0
+
+    # Sweep through the non-inhibited non-zeros, jumping past the inhibition window of each
+    next_nz_idcs = next_nz_idcs.tolist()
+    while nz_idx < len(next_nz_idcs):
+        # Keep the current non-zero
+        keep[nz_idx] = True
+        # Move on to the first non-zero which it does not inhibit
+        nz_idx = next_nz_idcs[nz_idx]
 
-        # The the non-zero that was just processed
-        pitch_idcs_keep = np.append(pitch_idcs_keep, next_nz_pitch)
-        frame_idcs_keep = np.append(frame_idcs_keep, next_nz_frame)
+    # Zero-out all of the non-zeros
+    activations[pitch_idcs, frame_idcs] = 0
 
     # Add back in all of the non-inhibited non-zeros
-    activations[pitch_idcs_keep.astype(constants.UINT),
-                frame_idcs_keep.astype(constants.UINT)] = 1
+    activations[pitch_idcs[keep], frame_idcs[keep]] = 1
 
     return activations
 
@@ -1946,6 +2004,8 @@ def save_pack_npz(path, keys, *args):
     keyword arguments for NumPy zip loading and saving.
     This saves the desired keys (in-order) for the rest
     of the array in the first entry of the zipped array.
+    The file is first written to a temporary path, which
+    replaces the specified path once it is complete.
 
     Parameters
     ----------
@@ -1957,12 +2017,22 @@ def save_pack_npz(path, keys, *args):
       Any objects to save to the array
     """
 
-    # Make sure there is agreement between dataset and features
+    # Warn if the number of keys differs from the number of entries to save
     if len(keys) != len(args):
         warnings.warn('Number of keys does not match number of entries provided.')
 
-    # Save the keys and entries as a NumPy zip at the specified path
-    np.savez(path, keys, *args)
+    # Add the extension to the path if it is missing, as would NumPy
+    if not path.endswith(f'.{constants.NPZ_EXT}'):
+        path = f'{path}.{constants.NPZ_EXT}'
+
+    # Construct a path to a temporary file unique to this process
+    tmp_path = f'{path}.{os.getpid()}.tmp.{constants.NPZ_EXT}'
+
+    # Save the keys and entries as a NumPy zip at the temporary path
+    np.savez(tmp_path, keys, *args)
+
+    # Move the complete file to the specified path
+    os.replace(tmp_path, path)
 
 
 def load_unpack_npz(path):
@@ -1999,6 +2069,101 @@ def load_unpack_npz(path):
     return data
 
 
+def save_pack_npy(path, keys, *args):
+    """
+    Simple helper function to save entries as individual NumPy files
+    within a directory, such that each array can later be memory-mapped.
+    The desired keys (in-order) and any scalar entries are saved to a small
+    JSON sidecar file. The entries are first written to a temporary directory,
+    which replaces the directory at the specified path once it is complete.
+
+    Parameters
+    ----------
+    path : string
+      Path to the directory under which to save the entries
+    keys : list of str
+      Keys corresponding to the entries
+    *args : object
+      Any objects to save within the directory
+    """
+
+    # Warn if the number of keys differs from the number of entries to save
+    if len(keys) != len(args):
+        warnings.warn('Number of keys does not match number of entries provided.')
+
+    # Construct a path to a temporary directory unique to this process
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+
+    # Make sure the temporary directory exists and is empty
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    # Initialize a dictionary to hold the keys and scalar entries
+    sidecar = {constants.KEY_KEYS : list(keys), constants.KEY_SCALARS : dict()}
+
+    # Loop through the keys and entries
+    for key, entry in zip(keys, args):
+        if isinstance(entry, np.ndarray) and entry.ndim > 0:
+            # Save the array to its own NumPy file
+            np.save(os.path.join(tmp_path, f'{key}.{constants.NPY_EXT}'), entry)
+        else:
+            # Convert any NumPy scalar to a native Python type
+            if isinstance(entry, (np.ndarray, np.generic)):
+                entry = entry.item()
+            # Add the scalar to the sidecar
+            sidecar[constants.KEY_SCALARS][key] = entry
+
+    # Write the sidecar last, after all arrays have been saved
+    with open(os.path.join(tmp_path, f'{constants.NPY_SIDECAR}.{constants.JSON_EXT}'), 'w') as sidecar_file:
+        json.dump(sidecar, sidecar_file)
+
+    # Remove any entries which were previously saved at the path
+    if os.path.exists(path):
+        shutil.rmtree(path)
+
+    # Move the complete directory to its final location
+    os.replace(tmp_path, path)
+
+
+def load_unpack_npy(path, mmap_mode='r'):
+    """
+    Simple helper function to load entries which were saved as individual
+    NumPy files within a directory, using the JSON sidecar to recover the
+    keys (in-order) and any scalar entries.
+
+    Parameters
+    ----------
+    path : string
+      Path to the directory containing the entries
+    mmap_mode : string or None (optional)
+      Mode for memory-mapping the arrays (see numpy.load) - None to read them into RAM
+
+    Returns
+    ----------
+    data : dict
+      Unpacked dictionary with specified keys inserted
+    """
+
+    # Load the sidecar containing the keys and scalar entries
+    with open(os.path.join(path, f'{constants.NPY_SIDECAR}.{constants.JSON_EXT}')) as sidecar_file:
+        sidecar = json.load(sidecar_file)
+
+    # Initialize a dictionary to hold the entries
+    data = dict()
+
+    # Loop through the saved keys
+    for key in sidecar[constants.KEY_KEYS]:
+        if key in sidecar[constants.KEY_SCALARS].keys():
+            # Wrap scalars in 0-dimensional arrays, as is the case for NumPy zip files
+            data[key] = np.array(sidecar[constants.KEY_SCALARS][key])
+        else:
+            # Open the array, which is memory-mapped unless otherwise specified
+            data[key] = np.load(os.path.join(path, f'{key}.{constants.NPY_EXT}'), mmap_mode=mmap_mode)
+
+    return data
+
+
 def track_to_dtype(track, dtype):
     """
     Convert all ndarray entries in a dictionary to a specified type.
@@ -2017,8 +2182,8 @@ def track_to_dtype(track, dtype):
       Dictionary containing data for a track
     """
 
-    # Copy the dictionary to avoid hard assignment
-    track = deepcopy(track)
+    # Copy the dictionary (but not the entries) to avoid hard assignment
+    track = dict(track)
 
     # Obtain a list of the dictionary keys
     keys = list(track.keys())
@@ -2027,7 +2192,7 @@ def track_to_dtype(track, dtype):
     for key in keys:
         # Check if the dictionary entry is an ndarray
         if isinstance(track[key], np.ndarray):
-            # Convert the ndarray to the specified type
+            # Convert the ndarray to the specified type (always a new array)
             track[key] = track[key].astype(dtype)
 
         # TODO - convert non ndarray to similar type?
@@ -2054,8 +2219,8 @@ def track_to_device(track, device):
       Dictionary containing data for a track
     """
 
-    # Copy the dictionary to avoid hard assignment
-    track = deepcopy(track)
+    # Copy the dictionary (but not the entries) to avoid hard assignment
+    track = dict(track)
 
     # Obtain a list of the dictionary keys
     keys = list(track.keys())
@@ -2121,8 +2286,8 @@ def track_to_batch(track):
       Dictionary containing data for a track
     """
 
-    # Copy the dictionary to avoid hard assignment
-    track = deepcopy(track)
+    # Copy the dictionary (but not the entries) to avoid hard assignment
+    track = dict(track)
 
     # Obtain a list of the dictionary keys
     keys = list(track.keys())
@@ -2131,6 +2296,10 @@ def track_to_batch(track):
     for key in keys:
         # Check if the dictionary entry is an ndarray
         if isinstance(track[key], np.ndarray):
+            # Copy read-only (e.g. memory-mapped) arrays, since tensors
+            # share memory with the array they are converted from
+            if not track[key].flags.writeable:
+                track[key] = np.array(track[key])
             # Convert to tensor and add batch dimension
             track[key] = array_to_tensor(track[key]).unsqueeze(0)
 
@@ -2273,8 +2442,9 @@ def slice_track(track, start, stop, skip=None):
     if skip is None:
         skip = list()
 
-    # Copy the dictionary to avoid hard assignment
-    track = deepcopy(track)
+    # Copy the dictionary (but not the entries) to avoid hard assignment,
+    # such that slices of the entries are views and not copies
+    track = dict(track)
 
     # Obtain a list of the dictionary keys
     keys = list(track.keys())
@@ -1,19 +1,241 @@
 # Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
 
 # My imports
-from .evaluate import append_results, average_results, log_results
+from .evaluate import ResultsAccumulator, average_results, log_results
+from .transcribe import NoteTranscriber, filter_notes_by_duration
+from .models import LogisticBank
 from . import tools
 
 # Regular imports
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from tensorboardX import SummaryWriter
+from collections import deque
+from copy import deepcopy
+from itertools import product
 from tqdm import tqdm
 
 import torch.nn as nn
 import numpy as np
+import hashlib
 import torch
+import json
 import os
 
 
+class ActivationStore(object):
+    """
+    Implements an on-disk store for the raw (e.g. pre-threshold) output of a model and the
+    corresponding frame times for each track, organized by checkpoint (see get_checkpoint).
+
+    Since the raw output does not depend on any post-processing steps, predictions for
+    a checkpoint can be re-obtained from the store without running the model, such that
+    estimators and evaluators can be replayed at the cost of post-processing alone.
+    """
+
+    def __init__(self, save_dir):
+        """
+        Initialize the fields of the store.
+
+        Parameters
+        ----------
+        save_dir : string
+          Directory under which to save the raw output for each checkpoint
+        """
+
+        self.save_dir = save_dir
+
+    @staticmethod
+    def get_checkpoint(model, dataset, length=10):
+        """
+        Identify the raw output of a model for a dataset. This consists of the iteration of
+        the model, a hash of its weights, and a hash of everything the frames of the dataset
+        depend on (the configuration of the features, the sampling rate and the hop length),
+        such that raw output is never replayed for a different run, model, or feature setup.
+
+        Parameters
+        ----------
+        model : TranscriptionModel
+          Model which produces the raw output
+        dataset : TranscriptionDataset
+          Dataset containing the tracks
+        length : int
+          Number of characters of each hash to keep
+
+        Returns
+        ----------
+        checkpoint : string
+          Identity of the raw output, used as the name of its directory
+        """
+
+        # Initialize a hash for the weights of the model
+        model_hash = hashlib.sha256()
+
+        # Loop through the parameters and buffers of the model
+        for key, value in model.state_dict().items():
+            if isinstance(value, torch.Tensor):
+                # Add the name and the raw bytes of the tensor to the hash
+                model_hash.update(key.encode())
+                model_hash.update(value.detach().cpu().contiguous().view(-1).view(torch.uint8).numpy().tobytes())
+
+        # Collect everything which the frames of the dataset depend on
+        data_config = {'features' : dataset.data_proc.get_config_hash(),
+                       'sample_rate' : dataset.sample_rate,
+                       'hop_length' : dataset.hop_length}
+
+        # Hash the collection in a stable way
+        data_hash = hashlib.sha256(json.dumps(data_config, sort_keys=True).encode())
+
+        # Combine the iteration and the hashes
+        checkpoint = f'{model.iter}-{model_hash.hexdigest()[:length]}-{data_hash.hexdigest()[:length]}'
+
+        return checkpoint
+
+    def get_checkpoint_dir(self, checkpoint):
+        """
+        Obtain the directory holding the raw output for a checkpoint.
+
+        Parameters
+        ----------
+        checkpoint : string
+          Identity of the raw output (see get_checkpoint)
+
+        Returns
+        ----------
+        checkpoint_dir : string
+          Directory holding the raw output for the checkpoint
+        """
+
+        checkpoint_dir = os.path.join(self.save_dir, checkpoint)
+
+        return checkpoint_dir
+
+    def get_track_path(self, checkpoint, track):
+        """
+        Obtain the path to the raw output for a track at a checkpoint.
+
+        Parameters
+        ----------
+        checkpoint : string
+          Identity of the raw output (see get_checkpoint)
+        track : string
+          Name of the track
+
+        Returns
+        ----------
+        track_path : string
+          Path to the NumPy zip file holding the raw output for the track
+        """
+
+        track_path = os.path.join(self.get_checkpoint_dir(checkpoint), f'{track}.{tools.NPZ_EXT}')
+
+        return track_path
+
+    def is_saved(self, checkpoint, track):
+        """
+        Determine whether the raw output for a track at a checkpoint exists within the store.
+
+        Parameters
+        ----------
+        checkpoint : string
+          Identity of the raw output (see get_checkpoint)
+        track : string
+          Name of the track
+
+        Returns
+        ----------
+        exists : bool
+          Whether or not the raw output exists within the store
+        """
+
+        exists = os.path.exists(self.get_track_path(checkpoint, track))
+
+        return exists
+
+    def save(self, checkpoint, track, raw_output, times):
+        """
+        Save the raw output for a track at a checkpoint.
+
+        Parameters
+        ----------
+        checkpoint : string
+          Identity of the raw output (see get_checkpoint)
+        track : string
+          Name of the track
+        raw_output : dict
+          Dictionary containing the raw model output for the track (NumPy arrays)
+        times : ndarray (N)
+          Time in seconds of beginning of each frame
+          N - number of time samples (frames)
+        """
+
+        # Make sure the directory for the checkpoint exists
+        os.makedirs(self.get_checkpoint_dir(checkpoint), exist_ok=True)
+
+        # Pack the raw output entries followed by the times
+        keys = list(raw_output.keys()) + [tools.KEY_TIMES]
+        entries = list(raw_output.values()) + [times]
+
+        # Save the entries as a NumPy zip file
+        tools.save_pack_npz(self.get_track_path(checkpoint, track), keys, *entries)
+
+    def load(self, checkpoint, track):
+        """
+        Load the raw output for a track at a checkpoint.
+
+        Parameters
+        ----------
+        checkpoint : string
+          Identity of the raw output (see get_checkpoint)
+        track : string
+          Name of the track
+
+        Returns
+        ----------
+        raw_output : dict
+          Dictionary containing the raw model output for the track (NumPy arrays)
+        times : ndarray (N)
+          Time in seconds of beginning of each frame
+          N - number of time samples (frames)
+        """
+
+        # Load the entries from the NumPy zip file
+        raw_output = tools.load_unpack_npz(self.get_track_path(checkpoint, track))
+
+        # Separate the times from the raw output
+        times = raw_output.pop(tools.KEY_TIMES)
+
+        return raw_output, times
+
+    def get_tracks(self, checkpoint):
+        """
+        Obtain the names of the tracks with raw output saved for a checkpoint.
+
+        Parameters
+        ----------
+        checkpoint : string
+          Identity of the raw output (see get_checkpoint)
+
+        Returns
+        ----------
+        tracks : list of string
+          Names of the tracks saved for the checkpoint
+        """
+
+        # Obtain the directory for the checkpoint
+        checkpoint_dir = self.get_checkpoint_dir(checkpoint)
+
+        # Initialize an empty list to hold the track names
+        tracks = list()
+
+        if os.path.exists(checkpoint_dir):
+            # Remove the extension from the names of all complete NumPy zip files
+            tracks = sorted([os.path.splitext(f)[0] for f in os.listdir(checkpoint_dir)
+                             if f.endswith(f'.{tools.NPZ_EXT}') and '.tmp.' not in f])
+
+        return tracks
+
+
 def file_sort(file_name):
     """
     Augment file names for sorting within the models directory. Since, e.g.,
@@ -37,7 +259,41 @@ def file_sort(file_name):
     return sort_name
 
 
-def validate(model, dataset, evaluator, estimator=None):
+def evaluate_track(predictions, track, track_id, evaluator, estimator=None):
+    """
+    Perform any estimation steps and evaluate the predictions for a single track.
+    This is performed within worker processes during parallel validation.
+
+    Parameters
+    ----------
+    predictions : dict
+      Dictionary containing the model predictions for the track (NumPy arrays)
+    track : dict
+      Dictionary containing the ground-truth for the track
+    track_id : string
+      Name of the track
+    evaluator : Evaluator
+      Evaluation protocol to use (with no tracked results)
+    estimator : Estimator or None (optional)
+      Estimation protocol to use
+
+    Returns
+    ----------
+    evaluator : Evaluator
+      Evaluation protocol tracking only the results for the track
+    """
+
+    if estimator is not None:
+        # Perform any estimation steps (e.g. note transcription)
+        predictions.update(estimator.process_track(predictions, track_id))
+
+    # Evaluate the predictions and track the results
+    evaluator.get_track_results(predictions, track, track_id)
+
+    return evaluator
+
+
+def validate(model, dataset, evaluator, estimator=None, num_workers=0, store=None):
     """
     Implements the validation or evaluation loop for a model and dataset partition.
     Optionally save predictions and log results.
@@ -52,6 +308,13 @@ def validate(model, dataset, evaluator, estimator=None):
       Estimation protocol to use
     evaluator : Evaluator
       Evaluation protocol to use
+    num_workers : int
+      Number of processes to use for estimation and evaluation, while
+      model inference remains within this process - 0 to process serially
+    store : ActivationStore or None (optional)
+      Store for the raw model output of each track at the current checkpoint (see
+      ActivationStore.get_checkpoint), which is replayed (post-processing only)
+      if it was already saved, and saved otherwise
 
     Returns
     ----------
@@ -62,8 +325,24 @@ def validate(model, dataset, evaluator, estimator=None):
     # Make sure the model is in evaluation mode
     model.eval()
 
-    # Turn off gradient computation
-    with torch.no_grad():
+    # Identify the raw output of the model for the dataset within the store
+    checkpoint = None if store is None else store.get_checkpoint(model, dataset)
+
+    if num_workers > 0:
+        # Create a copy of the evaluator with no tracked results to send to the processes
+        track_evaluator = deepcopy(evaluator)
+        track_evaluator.reset_results()
+    else:
+        # Process everything serially
+        track_evaluator = None
+
+    # Keep track of tracks being processed, in the order they were submitted
+    pending = deque()
+
+    # Initialize a pool of processes for estimation and evaluation (if requested), which is
+    # shut down upon leaving the block, even if an error occurs, and turn off gradient computation
+    with (ProcessPoolExecutor(max_workers=num_workers) if num_workers > 0 else nullcontext()) as executor, \
+            torch.no_grad():
         # Loop through the validation track ids
         for track_id in dataset.tracks:
             # Obtain the track data
@@ -72,15 +351,47 @@ def validate(model, dataset, evaluator, estimator=None):
             # Treat the track data as a batch
             batch = tools.track_to_batch(track)
 
-            # Get the model predictions and convert them to NumPy arrays
-            predictions = tools.track_to_cpu(model.run_on_batch(batch))
-
-            if estimator is not None:
-                # Perform any estimation steps (e.g. note transcription)
-                predictions.update(estimator.process_track(predictions, track_id))
-
-            # Evaluate the predictions and track the results
-            evaluator.get_track_results(predictions, track, track_id)
+            if store is not None and store.is_saved(checkpoint, track_id):
+                # Load the raw model output saved for the current checkpoint
+                raw_output, times = store.load(checkpoint, track_id)
+                # Add the raw output and times to the batch
+                batch[tools.KEY_OUTPUT] = tools.track_to_batch(raw_output)
+                batch[tools.KEY_TIMES] = tools.array_to_tensor(times).unsqueeze(0)
+                # Perform only the post-processing steps and convert the predictions to NumPy arrays
+                predictions = tools.track_to_cpu(model.replay_on_batch(batch))
+            else:
+                # Get the model predictions and convert them to NumPy arrays
+                predictions = tools.track_to_cpu(model.run_on_batch(batch, keep_raw=store is not None))
+
+                if store is not None:
+                    # Save the raw model output for the current checkpoint
+                    store.save(checkpoint, track_id, predictions.pop(tools.KEY_OUTPUT),
+                               predictions[tools.KEY_TIMES])
+
+            if executor is None:
+                if estimator is not None:
+                    # Perform any estimation steps (e.g. note transcription)
+                    predictions.update(estimator.process_track(predictions, track_id))
+
+                # Evaluate the predictions and track the results
+                evaluator.get_track_results(predictions, track, track_id)
+            else:
+                # Leave out the audio and features, which are not needed for evaluation
+                track = {k : track[k] for k in track.keys() if k not in [tools.KEY_AUDIO, tools.KEY_FEATS]}
+
+                # Send the track to be estimated and evaluated by the next available process
+                pending.append(executor.submit(evaluate_track, predictions, track,
+                                               track_id, track_evaluator, estimator))
+
+                # Limit the number of tracks held in memory while waiting to be processed
+                while len(pending) > 2 * num_workers:
+                    # Wait for the earliest track and merge its results, such that they
+                    # are always merged in the same order regardless of completion time
+                    evaluator.merge_results(pending.popleft().result())
+
+        # Merge the results for any remaining tracks in order
+        while len(pending):
+            evaluator.merge_results(pending.popleft().result())
 
     # Obtain the average results from this validation loop
     average = evaluator.average_results()
@@ -88,8 +399,320 @@ def validate(model, dataset, evaluator, estimator=None):
     return average
 
 
+def get_activations(model, raw_output, times):
+    """
+    Perform only the post-processing steps of a model on its raw output,
+    without thresholding the activations of any multi-label logistic layer.
+
+    Parameters
+    ----------
+    model : TranscriptionModel
+      Model which produced the raw output
+    raw_output : dict
+      Dictionary containing the raw model output for a batch of tracks (Tensors)
+    times : Tensor (B x N)
+      Time in seconds of beginning of each frame
+      B - batch size,
+      N - number of time samples (frames)
+
+    Returns
+    ----------
+    activations : dict
+      Dictionary containing the (un-thresholded) activations for a batch of tracks
+    """
+
+    # Obtain all of the multi-label logistic layers and their thresholds
+    layers = [layer for layer in model.modules() if isinstance(layer, LogisticBank)]
+    thresholds = [layer.threshold for layer in layers]
+
+    try:
+        # Temporarily disable thresholding
+        for layer in layers:
+            layer.threshold = None
+
+        # Copy the dictionary (but not the entries), since post-processing replaces them
+        batch = {tools.KEY_OUTPUT : dict(raw_output), tools.KEY_TIMES : times}
+
+        # Perform only the post-processing steps
+        activations = model.replay_on_batch(batch)
+    finally:
+        # Restore the original thresholds
+        for layer, threshold in zip(layers, thresholds):
+            layer.threshold = threshold
+
+    return activations
+
+
+def sweep_track(activations, track, track_id, profile, evaluator, onset_thresholds,
+                frame_thresholds, inhibition_windows, minimum_durations):
+    """
+    Transcribe notes from the activations of a single track with NoteTranscriber and evaluate
+    them for every combination of post-processing parameters. Each step is only performed once
+    for the parameters it depends on, and shared by all combinations of the parameters of
+    subsequent steps. This is performed within worker processes during parallel sweeps.
+
+    Parameters
+    ----------
+    activations : dict
+      Dictionary containing the (un-thresholded) multi pitch and onset activations (F x T)
+      and the frame times (T) for the track (NumPy arrays)
+      F - number of discrete pitches
+      T - number of frames
+    track : dict
+      Dictionary containing the ground-truth for the track
+    track_id : string
+      Name of the track
+    profile : InstrumentProfile (instrument.py)
+      Instrument profile detailing experimental setup
+    evaluator : Evaluator
+      Evaluation protocol to use for each combination (with no tracked results)
+    onset_thresholds : list of (float or None)
+      Thresholds for the onset activations - None to derive onsets from the multi pitch
+    frame_thresholds : list of float
+      Thresholds for the multi pitch activations
+    inhibition_windows : list of (float or None)
+      Amount of time after which another note of the same pitch cannot begin
+      (only used when onsets are derived from the multi pitch, as in NoteTranscriber)
+    minimum_durations : list of (float or None)
+      Minimum necessary duration to keep a note
+
+    Returns
+    ----------
+    evaluators : list of Evaluator
+      Evaluation protocol tracking only the results for the track, for each
+      combination of parameters (in the order given by itertools.product)
+    """
+
+    # Obtain the activations and the frame times
+    multi_pitch_act = tools.unpack_dict(activations, tools.KEY_MULTIPITCH)
+    onsets_act = tools.unpack_dict(activations, tools.KEY_ONSETS)
+    times = tools.unpack_dict(activations, tools.KEY_TIMES)
+
+    # Threshold the onset activations once for each threshold
+    thresholded_onsets = {threshold : None if threshold is None or onsets_act is None else
+                          tools.threshold_activations(np.array(onsets_act), threshold)
+                          for threshold in set(onset_thresholds)}
+
+    # Initialize a list to hold an evaluator for each combination
+    evaluators = list()
+
+    # Loop through the thresholds for the multi pitch activations
+    for frame_threshold in frame_thresholds:
+        # Threshold the multi pitch activations once for all other parameters
+        multi_pitch = tools.threshold_activations(np.array(multi_pitch_act), frame_threshold)
+
+        # Keep track of the notes transcribed for each onset configuration,
+        # since the inhibition window does not affect provided onsets
+        transcribed = dict()
+
+        # Loop through the onset thresholds and the inhibition windows
+        for onset_threshold, inhibition_window in product(onset_thresholds, inhibition_windows):
+            # Obtain the thresholded onsets
+            onsets = thresholded_onsets[onset_threshold]
+
+            # Determine which configuration of onsets will be used
+            config = (onset_threshold, None) if onsets is not None else (None, inhibition_window)
+
+            if config not in transcribed.keys():
+                # Package the thresholded activations as they would be after post-processing
+                raw_output = {tools.KEY_MULTIPITCH : multi_pitch, tools.KEY_TIMES : times}
+
+                if onsets is not None:
+                    # Add the thresholded onsets
+                    raw_output[tools.KEY_ONSETS] = onsets
+
+                # Transcribe the notes once for all minimum durations
+                transcriber = NoteTranscriber(profile, inhibition_window=config[1])
+                transcribed[config] = transcriber.estimate(raw_output)
+
+            # Loop through the minimum durations
+            for minimum_duration in minimum_durations:
+                # Obtain the transcribed notes
+                batched_notes = transcribed[config]
+
+                if minimum_duration is not None:
+                    # Filter the notes by duration, which is the final step of NoteTranscriber
+                    pitches, intervals = tools.batched_notes_to_notes(batched_notes)
+                    pitches, intervals = filter_notes_by_duration(pitches, intervals, minimum_duration)
+                    batched_notes = tools.notes_to_batched_notes(pitches, intervals)
+
+                # Package the estimates as they would be after estimation
+                estimated = {tools.KEY_MULTIPITCH : multi_pitch,
+                             tools.KEY_NOTES : batched_notes,
+                             tools.KEY_TIMES : times}
+
+                # Create a copy of the evaluator for this combination
+                grid_evaluator = deepcopy(evaluator)
+                # Evaluate the estimates and track the results
+                grid_evaluator.get_track_results(estimated, track, track_id)
+
+                evaluators.append(grid_evaluator)
+
+    # Order the evaluators like itertools.product over the parameters
+    num_frame, num_onset = len(frame_thresholds), len(onset_thresholds)
+    num_inhibition, num_duration = len(inhibition_windows), len(minimum_durations)
+    order = np.arange(len(evaluators)).reshape(num_frame, num_onset, num_inhibition, num_duration)
+    evaluators = [evaluators[i] for i in order.transpose(1, 0, 2, 3).flatten()]
+
+    return evaluators
+
+
+def sweep(model, dataset, evaluator, profile, onset_thresholds=None, frame_thresholds=None,
+          inhibition_windows=None, minimum_durations=None, num_workers=0, store=None):
+    """
+    Evaluate note transcription for a model and dataset partition over a grid of post-processing
+    parameters, running the model (or replaying its raw output) only once for each track.
+
+    Only models whose output consists of multi pitch and (optionally) onset activations are
+    supported, since the grid does not cover any other activations (e.g. offsets) which
+    NoteTranscriber would use, and the results would then differ from those of validation.
+
+    Parameters
+    ----------
+    model : TranscriptionModel
+      Model to evaluate (with multi-label logistic multi pitch and optionally onset output)
+    dataset : TranscriptionDataset
+      Dataset (partition) to use for evaluation
+    evaluator : Evaluator
+      Evaluation protocol to use for each combination of parameters (e.g. NoteEvaluator)
+    profile : InstrumentProfile (instrument.py)
+      Instrument profile detailing experimental setup
+    onset_thresholds : list of (float or None) or None (optional)
+      Thresholds for the onset activations - None to derive onsets from the multi pitch
+    frame_thresholds : list of float or None (optional)
+      Thresholds for the multi pitch activations
+    inhibition_windows : list of (float or None) or None (optional)
+      Amount of time after which another note of the same pitch cannot begin
+    minimum_durations : list of (float or None) or None (optional)
+      Minimum necessary duration to keep a note
+    num_workers : int
+      Number of processes to use for the sweep, while model
+      inference remains within this process - 0 to process serially
+    store : ActivationStore or None (optional)
+      Store for the raw model output of each track at the current checkpoint (see ActivationStore.get_checkpoint)
+
+    Returns
+    ----------
+    sweep_results : list of (dict, dict)
+      Parameters and results averaged across all tracks for each combination
+      of parameters (in the order given by itertools.product)
+    """
+
+    # Default the parameters to those of NoteTranscriber and LogisticBank
+    onset_thresholds = [None] if onset_thresholds is None else list(onset_thresholds)
+    frame_thresholds = [0.5] if frame_thresholds is None else list(frame_thresholds)
+    inhibition_windows = [None] if inhibition_windows is None else list(inhibition_windows)
+    minimum_durations = [None] if minimum_durations is None else list(minimum_durations)
+
+    # Package the parameters of the grid
+    grid = (onset_thresholds, frame_thresholds, inhibition_windows, minimum_durations)
+
+    # Obtain all combinations of the parameters
+    combinations = list(product(*grid))
+
+    # Create a copy of the evaluator with no tracked results to use for each track
+    track_evaluator = deepcopy(evaluator)
+    track_evaluator.reset_results()
+
+    # Create a copy of the evaluator to track the results of each combination
+    grid_evaluators = [deepcopy(track_evaluator) for _ in combinations]
+
+    # Make sure the model is in evaluation mode
+    model.eval()
+
+    # Identify the raw output of the model for the dataset within the store
+    checkpoint = None if store is None else store.get_checkpoint(model, dataset)
+
+    # Keep track of tracks being processed, in the order they were submitted
+    pending = deque()
+
+    # Initialize a pool of processes (if requested), which is shut down upon leaving
+    # the block, even if an error occurs, and turn off gradient computation
+    with (ProcessPoolExecutor(max_workers=num_workers) if num_workers > 0 else nullcontext()) as executor, \
+            torch.no_grad():
+        # Loop through the track ids
+        for track_id in dataset.tracks:
+            # Obtain the track data
+            track = dataset.get_track_data(track_id)
+
+            if store is not None and store.is_saved(checkpoint, track_id):
+                # Load the raw model output saved for the current checkpoint
+                raw_output, times = store.load(checkpoint, track_id)
+                # Treat the raw output and times as a batch
+                raw_output = tools.track_to_batch(raw_output)
+                times = tools.array_to_tensor(times).unsqueeze(0)
+            else:
+                # Run the model on the track data, treated as a batch, keeping the raw output
+                output = model.run_on_batch(tools.track_to_batch(track), keep_raw=True)
+                # Extract the raw output and times
+                raw_output, times = output[tools.KEY_OUTPUT], output[tools.KEY_TIMES]
+
+                if store is not None:
+                    # Save the raw model output for the current checkpoint
+                    store.save(checkpoint, track_id, tools.track_to_cpu(dict(raw_output)),
+                               tools.tensor_to_array(times.squeeze()))
+
+            # Obtain the (un-thresholded) activations and convert them to NumPy arrays
+            activations = tools.track_to_cpu(get_activations(model, raw_output, times))
+
+            if tools.KEY_MULTIPITCH not in activations.keys():
+                # There is nothing to transcribe notes from
+                raise ValueError('Sweeps require multi pitch activations.')
+
+            # Determine which activations are not covered by the sweep
+            unsupported = [k for k in activations.keys()
+                           if k not in [tools.KEY_MULTIPITCH, tools.KEY_ONSETS, tools.KEY_TIMES]]
+
+            if len(unsupported):
+                # These activations would be ignored, so the results would not match validation
+                raise ValueError(f'Sweeps only support multi pitch and onset activations, '
+                                 f'but the model also produced {unsupported}.')
+
+            # Leave out the audio and features, which are not needed for evaluation
+            track = {k : track[k] for k in track.keys() if k not in [tools.KEY_AUDIO, tools.KEY_FEATS]}
+
+            if executor is None:
+                # Evaluate all combinations of parameters for the track
+                track_evaluators = sweep_track(activations, track, track_id, profile, track_evaluator, *grid)
+
+                # Merge the results for each combination
+                for grid_evaluator, other in zip(grid_evaluators, track_evaluators):
+                    grid_evaluator.merge_results(other)
+            else:
+                # Send the track to be swept by the next available process
+                pending.append(executor.submit(sweep_track, activations, track, track_id,
+                                               profile, track_evaluator, *grid))
+
+                # Limit the number of tracks held in memory while waiting to be processed
+                while len(pending) > 2 * num_workers:
+                    # Merge the results of the earliest track for each combination, such
+                    # that they are always merged in the same order regardless of completion time
+                    for grid_evaluator, other in zip(grid_evaluators, pending.popleft().result()):
+                        grid_evaluator.merge_results(other)
+
+        # Merge the results for any remaining tracks in order
+        while len(pending):
+            for grid_evaluator, other in zip(grid_evaluators, pending.popleft().result()):
+                grid_evaluator.merge_results(other)
+
+    # Initialize a list to hold the parameters and averaged results for each combination
+    sweep_results = list()
+
+    # Loop through the combinations of parameters
+    for i, combination in enumerate(combinations):
+        # Package the parameters
+        params = dict(zip(['onset_threshold', 'frame_threshold',
+                           'inhibition_window', 'minimum_duration'], combination))
+
+        # Add the parameters and the averaged results for the combination
+        sweep_results.append((params, grid_evaluators[i].average_results()))
+
+    return sweep_results
+
+
 def train(model, train_loader, optimizer, iterations, checkpoints=0, log_dir='.', scheduler=None,
-          resume=True, single_batch=False, val_set=None, estimator=None, evaluator=None, vis_fnc=None):
+          resume=True, single_batch=False, val_set=None, estimator=None, evaluator=None, vis_fnc=None,
+          num_workers=0, store=None):
     """
     Implements the training loop for an experiment.
 
@@ -124,6 +747,10 @@ def train(model, train_loader, optimizer, iterations, checkpoints=0, log_dir='.'
     vis_fnc : function(model, i)
       TODO - generalize to any extra validation steps
       Function to perform any visualization steps during validation loop
+    num_workers : int
+      Number of processes to use for estimation and evaluation during validation - 0 to process serially
+    store : ActivationStore or None (optional)
+      Store for the raw model output of each validation track at each checkpoint
 
     Returns
     ----------
@@ -180,7 +807,7 @@ def train(model, train_loader, optimizer, iterations, checkpoints=0, log_dir='.'
 
     for global_iter in tqdm(range(start_iter, iterations)):
         # Collection of losses for each batch in the loop
-        train_loss = dict()
+        train_loss = ResultsAccumulator()
         # Loop through the dataset
         for batch in train_loader:
             # Zero the accumulated gradients
@@ -192,7 +819,7 @@ def train(model, train_loader, optimizer, iterations, checkpoints=0, log_dir='.'
             # Compute gradients based on total loss
             batch_loss[tools.KEY_LOSS_TOTAL].backward()
             # Add all of the losses to the collection
-            train_loss = append_results(train_loss, tools.track_to_cpu(batch_loss))
+            train_loss.append(tools.track_to_cpu(batch_loss))
             # Perform gradient clipping
             # TODO = make optional
             #nn.utils.clip_grad_norm_(model.parameters(), 3)
@@ -244,7 +871,7 @@ def train(model, train_loader, optimizer, iterations, checkpoints=0, log_dir='.'
             # If we are at a checkpoint, and a validation set with an estimator is available
             if checkpoint and val_set is not None and evaluator is not None:
                 # Validate the current model weights
-                validate(model, val_set, evaluator, estimator)
+                validate(model, val_set, evaluator, estimator, num_workers=num_workers, store=store)
                 # Average the results, log them, and reset the tracking
                 evaluator.finalize(writer, global_iter + 1)
                 # Make sure the model is back in training mode
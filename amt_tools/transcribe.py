@@ -104,54 +104,36 @@ def multi_pitch_to_notes(multi_pitch, times, profile, onsets=None, offsets=None)
     # Estimate the duration of the track (for bounding note offsets)
     times = np.append(times, times[-1] + tools.estimate_hop_length(times))
 
-    # Create empty lists for note pitches and their time intervals
-    pitches, intervals = list(), list()
-
     # Determine the pitch and frame indices where notes begin
     pitch_idcs, frame_idcs = onsets.nonzero()
 
-    # Loop through note beginnings
-    for pitch, frame in zip(pitch_idcs, frame_idcs):
-        # Mark onset and start offset counter
-        onset, offset = frame, frame + 1
-
-        # Increment the offset counter until one of the following occurs:
-        #  1. There are no more frames
-        #  2. Pitch is no longer active in the multi pitch array
-        #  3. A new onset occurs involving the current pitch
-        while True:
-            # There are no more frames to count
-            maxed_out = offset == num_frames
-
-            if maxed_out:
-                # Stop looping
-                break
-
-            # There is an activation for the pitch at the next frame
-            active_pitch = multi_pitch[pitch, offset]
-
-            if not active_pitch:
-                # Stop looping
-                break
-
-            # There is an onset for the pitch at the next frame
-            new_onset = onsets[pitch, offset]
-
-            if new_onset:
-                # Stop looping
-                break
-
-            # Include the offset counter
-            offset += 1
-
-        # Add the frequency to the list
-        pitches.append(pitch + profile.low)
-
-        # Add the interval to the list
-        intervals.append([times[onset], times[offset]])
-
-    # Convert the lists to numpy arrays
-    pitches, intervals = np.array(pitches), np.array(intervals)
+    # Notes continue until one of the following occurs:
+    #  1. There are no more frames
+    #  2. Pitch is no longer active in the multi pitch array
+    #  3. A new onset occurs involving the current pitch
+    breaks = np.logical_or(multi_pitch == 0, onsets != 0)
+    # Add a frame after the last frame where every note must end
+    breaks = np.concatenate((breaks, np.ones((breaks.shape[0], 1), dtype=bool)), axis=-1)
+
+    # Determine the flattened indices of all breaks (sorted by pitch, then by frame)
+    break_idcs = np.flatnonzero(breaks)
+    # Determine the flattened index of the frame where each note begins
+    onset_idcs = pitch_idcs * (num_frames + 1) + frame_idcs
+
+    # Find the first break after the beginning of each note, which is
+    # always within the same pitch due to the frame added at the end
+    offset_idcs = break_idcs[np.searchsorted(break_idcs, onset_idcs, side='right')]
+    # Convert the flattened indices back to frame indices
+    offset_frames = offset_idcs - pitch_idcs * (num_frames + 1)
+
+    if len(pitch_idcs):
+        # Obtain the pitch of each note in MIDI format
+        pitches = pitch_idcs + profile.low
+        # Obtain the onset-offset time pair of each note
+        intervals = np.stack((times[frame_idcs], times[offset_frames]), axis=-1)
+    else:
+        # There are no notes
+        pitches, intervals = np.array([]), np.array([])
 
     # Sort notes by onset just for the purpose of being neat
     pitches, intervals = tools.sort_notes(pitches, intervals)
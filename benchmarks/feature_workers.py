@@ -0,0 +1,114 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from amt_tools.features import HVQT, CQT, VQT, FeatureCombo
+
+# Regular imports
+import numpy as np
+import time
+import os
+
+# Duration of the synthetic audio in seconds
+DURATION = 30
+# Sampling rate of the audio
+SAMPLE_RATE = 22050
+# Number of tracks to compute with the same modules
+NUM_TRACKS = 5
+# Numbers of workers to compare against computing the inner modules in order
+NUM_WORKERS = [2, 4]
+
+
+def get_modules(num_workers=0, use_processes=False):
+    """
+    Construct the feature extraction modules to time.
+
+    Parameters
+    ----------
+    num_workers : int
+      Number of workers to compute the inner modules concurrently - 0 to compute them in order
+    use_processes : bool
+      Whether to use a pool of processes, rather than threads, for the workers
+
+    Returns
+    ----------
+    modules : dict
+      Feature extraction modules, keyed by a description
+    """
+
+    modules = {
+        # HVQT with the harmonics of the DeepSalience paper
+        'HVQT (6 harmonics, 180 bins, 36 bpo)' : HVQT(sample_rate=SAMPLE_RATE, harmonics=[0.5, 1, 2, 3, 4, 5],
+                                                      n_bins=180, bins_per_octave=36, num_workers=num_workers,
+                                                      use_processes=use_processes),
+        # Combination of transforms with the same frequency bins
+        'FeatureCombo (CQT + VQT)' : FeatureCombo([CQT(sample_rate=SAMPLE_RATE),
+                                                   VQT(sample_rate=SAMPLE_RATE, gamma=5)],
+                                                  num_workers=num_workers, use_processes=use_processes)
+    }
+
+    return modules
+
+
+def time_modules(tracks, num_workers=0, use_processes=False):
+    """
+    Time the computation of the features of each module for several pieces of audio,
+    reusing each module (and therefore its pool of workers) across the pieces.
+
+    Parameters
+    ----------
+    tracks : list of ndarray
+      Pieces of mono-channel audio
+    num_workers : int
+      Number of workers to compute the inner modules concurrently - 0 to compute them in order
+    use_processes : bool
+      Whether to use a pool of processes, rather than threads, for the workers
+
+    Returns
+    ----------
+    results : dict
+      Time in seconds for the first piece of audio, average time in seconds
+      for the remaining pieces, and features of each module, keyed by a description
+    """
+
+    results = dict()
+
+    for name, module in get_modules(num_workers, use_processes).items():
+        # Initialize a list to hold the time and features for each piece of audio
+        times, feats = list(), list()
+
+        for audio in tracks:
+            start = time.perf_counter()
+            feats.append(module.process_audio(audio))
+            times.append(time.perf_counter() - start)
+
+        results[name] = (times[0], np.mean(times[1:]), feats)
+
+    return results
+
+
+if __name__ == '__main__':
+    # Initialize a random number generator
+    rng = np.random.default_rng(0)
+
+    # Generate random audio for each track
+    tracks = [0.1 * rng.standard_normal(DURATION * SAMPLE_RATE).astype(np.float32) for _ in range(NUM_TRACKS)]
+
+    print(f'{NUM_TRACKS} tracks of {DURATION} s of synthetic audio at {SAMPLE_RATE} Hz, {os.cpu_count()} CPUs')
+
+    # Compute the inner modules one after another
+    serial = time_modules(tracks)
+
+    for name, (first, rest, _) in serial.items():
+        print(f'{name} - in order: {first:.2f} s first track, {rest:.2f} s per remaining track')
+
+    for num_workers in NUM_WORKERS:
+        for use_processes in [False, True]:
+            # Compute the inner modules with a pool of workers
+            results = time_modules(tracks, num_workers, use_processes)
+
+            for name, (first, rest, feats) in results.items():
+                # Make sure the workers did not change the features
+                identical = all(np.array_equal(f, s) for f, s in zip(feats, serial[name][2]))
+                print(f'{name} - {num_workers} {"processes" if use_processes else "threads"}: '
+                      f'{first:.2f} s first track (including starting the workers), '
+                      f'{rest:.2f} s per remaining track (identical: {identical})')
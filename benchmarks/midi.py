@@ -0,0 +1,93 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from amt_tools.tools import load_notes_midi, constants
+
+# Regular imports
+import numpy as np
+import tempfile
+import time
+import mido
+import os
+
+# Numbers of notes within each synthetic performance
+NUM_NOTES = [20000, 50000]
+
+
+def write_performance(path, num_notes, seed=0):
+    """
+    Write a synthetic piano performance with dense sustain pedaling to a MIDI file.
+
+    Parameters
+    ----------
+    path : string
+      Path to the MIDI file to write
+    num_notes : int
+      Number of notes within the performance
+    seed : int
+      Seed for the random number generator
+    """
+
+    # Initialize a random number generator
+    rng = np.random.default_rng(seed)
+
+    # Initialize a list to hold the events (absolute time in ticks and message)
+    events = []
+
+    # Initialize the onset time of the first note
+    onset = 0
+
+    for _ in range(num_notes):
+        # Choose the onset time, duration, pitch, and velocity of the next note
+        onset += int(rng.integers(0, 200))
+        duration = int(rng.integers(1, 1500))
+        pitch, velocity = int(rng.integers(21, 109)), int(rng.integers(1, 128))
+
+        events += [(onset, mido.Message('note_on', note=pitch, velocity=velocity)),
+                   (onset + duration, mido.Message('note_off', note=pitch, velocity=0))]
+
+        # Add a sustain pedal event around every note
+        value = int(rng.choice([0, 127]))
+        events.append((onset + int(rng.integers(0, 500)),
+                       mido.Message('control_change', control=constants.MIDI_SUSTAIN_CONTROL_NUM, value=value)))
+
+    # Sort the events by time
+    events.sort(key=lambda event : event[0])
+
+    # Initialize a MIDI file with a single track
+    midi = mido.MidiFile(ticks_per_beat=480)
+    track = mido.MidiTrack()
+    midi.tracks.append(track)
+
+    # Keep track of the time of the previous message
+    last_time = 0
+
+    for event_time, message in events:
+        # Add the message with the time relative to the previous message
+        track.append(message.copy(time=event_time - last_time))
+        last_time = event_time
+
+    # End with an offset of a pitch which is never played
+    track.append(mido.Message('note_off', note=0, velocity=0, time=10))
+
+    midi.save(path)
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for num_notes in NUM_NOTES:
+            # Write the synthetic performance
+            path = os.path.join(temp_dir, f'{num_notes}.mid')
+            write_performance(path, num_notes)
+
+            # Time the parsing of the MIDI messages alone, for reference
+            start = time.perf_counter()
+            list(mido.MidiFile(path))
+            parse_time = time.perf_counter() - start
+
+            # Time the extraction of notes
+            start = time.perf_counter()
+            load_notes_midi(path)
+            load_time = time.perf_counter() - start
+
+            print(f'{num_notes} notes: load_notes_midi {load_time:.2f} s (mido parsing alone {parse_time:.2f} s)')
@@ -0,0 +1,180 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from amt_tools.datasets import TranscriptionDataset, precompute
+from amt_tools.features import MelSpec
+
+import amt_tools.tools as tools
+
+# Regular imports
+import numpy as np
+import tempfile
+import time
+import os
+
+# Number of tracks within the synthetic dataset
+NUM_TRACKS = 6
+# Duration of each track in seconds
+DURATION = 600
+# Number of processes to use for the parallel run
+NUM_WORKERS = 4
+# Sampling rate of the audio
+SAMPLE_RATE = 16000
+
+
+class SyntheticDataset(TranscriptionDataset):
+    """
+    Dataset of random audio and notes, resembling MAPS, which is saved like any other dataset.
+    """
+
+    def __init__(self, base_dir=None, splits=None, hop_length=512, sample_rate=SAMPLE_RATE, data_proc=None,
+                 profile=None, num_frames=None, split_notes=False, reset_data=False, store_data=False,
+                 save_data=True, save_loc=None, seed=0, save_format='npz', window_feats=False,
+                 shared_store=False, cache_bytes=0, cache_policy='lru'):
+        """
+        Initialize the dataset and establish parameter defaults in function signature.
+
+        Parameters
+        ----------
+        See TranscriptionDataset class...
+        """
+
+        super().__init__(base_dir, splits, hop_length, sample_rate, data_proc, profile, num_frames,
+                         split_notes, reset_data, store_data, save_data, save_loc, seed,
+                         save_format, window_feats, shared_store, cache_bytes, cache_policy)
+
+    def get_tracks(self, split):
+        """
+        Get the names of the tracks in a partition of the synthetic dataset.
+
+        Parameters
+        ----------
+        split : string
+          Name of the partition
+
+        Returns
+        ----------
+        tracks : list of strings
+          Names of tracks
+        """
+
+        tracks = [f'{split}_{i}' for i in range(NUM_TRACKS)]
+
+        return tracks
+
+    def load(self, track):
+        """
+        Load the ground-truth from memory or generate it randomly.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track to load
+
+        Returns
+        ----------
+        data : dict
+          Dictionary with ground-truth for the track
+        """
+
+        # Load the track data if it exists in memory, otherwise instantiate track data
+        data = super().load(track)
+
+        # If the track data is being instantiated, it will not have the 'audio' key
+        if tools.KEY_AUDIO not in data.keys():
+            # Seed a random number generator with the index of the track
+            rng = np.random.default_rng(int(track.split('_')[-1]))
+
+            # Generate random audio for the track
+            data[tools.KEY_AUDIO] = 0.1 * rng.standard_normal(int(DURATION * self.sample_rate)).astype(tools.FLOAT32)
+            data[tools.KEY_FS] = self.sample_rate
+
+            # Generate random notes (one per second) for the track
+            onsets = np.sort(rng.uniform(0, DURATION - 1, DURATION))
+            offsets = onsets + rng.uniform(0.05, 1.0, DURATION)
+            pitches = rng.integers(21, 109, DURATION).astype(tools.FLOAT32)
+            data[tools.KEY_NOTES] = np.stack((onsets, offsets, pitches), axis=-1)
+
+            # Obtain the multi pitch array from the notes
+            times = self.data_proc.get_times(data[tools.KEY_AUDIO])
+            data[tools.KEY_MULTIPITCH] = tools.notes_to_multi_pitch(pitches, np.stack((onsets, offsets), axis=-1),
+                                                                    times, self.profile)
+
+            if self.save_data:
+                # Get the appropriate path for saving the track data
+                gt_path = self.get_gt_dir(track)
+
+                # Create the path if it doesn't exist
+                os.makedirs(os.path.dirname(gt_path), exist_ok=True)
+
+                # Save the data in the selected format
+                keys = (tools.KEY_FS, tools.KEY_AUDIO, tools.KEY_NOTES, tools.KEY_MULTIPITCH)
+                self.save_entries(gt_path, keys,
+                                  data[tools.KEY_FS],
+                                  data[tools.KEY_AUDIO],
+                                  data[tools.KEY_NOTES],
+                                  data[tools.KEY_MULTIPITCH])
+
+        return data
+
+    @staticmethod
+    def available_splits():
+        """
+        Obtain a list of possible splits.
+
+        Returns
+        ----------
+        splits : list of strings
+          The single synthetic split
+        """
+
+        splits = ['synthetic']
+
+        return splits
+
+    @staticmethod
+    def download(save_dir):
+        """
+        There is nothing to download for the synthetic dataset.
+
+        Parameters
+        ----------
+        save_dir : string
+          Directory for the dataset
+        """
+
+        os.makedirs(save_dir, exist_ok=True)
+
+
+if __name__ == '__main__':
+    # Initialize the feature extraction module
+    data_proc = MelSpec(sample_rate=SAMPLE_RATE, n_mels=229, hop_length=512)
+
+    with tempfile.TemporaryDirectory() as serial_loc, tempfile.TemporaryDirectory() as parallel_loc:
+        # Compute and save the data for each track in turn
+        start = time.perf_counter()
+        serial = SyntheticDataset(base_dir=serial_loc, save_loc=serial_loc, data_proc=data_proc)
+        for track in serial.tracks:
+            serial.precompute_track(track)
+        print(f'Serial loop: {time.perf_counter() - start:.2f} s')
+
+        # Compute and save the data for the tracks using a pool of processes
+        start = time.perf_counter()
+        parallel = precompute(SyntheticDataset, data_proc=data_proc, num_workers=NUM_WORKERS,
+                              base_dir=parallel_loc, save_loc=parallel_loc)
+        print(f'precompute ({NUM_WORKERS} workers, {os.cpu_count()} CPUs): {time.perf_counter() - start:.2f} s')
+
+        # Run again, which should skip every track
+        start = time.perf_counter()
+        precompute(SyntheticDataset, data_proc=data_proc, num_workers=NUM_WORKERS,
+                   base_dir=parallel_loc, save_loc=parallel_loc)
+        print(f'precompute re-run (all tracks skipped): {(time.perf_counter() - start) * 1E3:.0f} ms')
+
+        # Make sure both approaches saved the same data
+        identical = True
+        for track in serial.tracks:
+            serial_data = serial.get_track_data(track)
+            parallel_data = parallel.get_track_data(track)
+            identical &= all(np.array_equal(serial_data[key], parallel_data[key]) for key in serial_data.keys()
+                             if isinstance(serial_data[key], np.ndarray))
+        print(f'Identical outputs: {identical}')
@@ -0,0 +1,241 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from amt_tools.datasets import TranscriptionDataset
+from amt_tools.features import FeatureModule
+
+import amt_tools.tools as tools
+
+# Regular imports
+import numpy as np
+import tracemalloc
+import tempfile
+import inspect
+import time
+
+# Number of tracks within each synthetic dataset
+NUM_TRACKS = 4
+# Number of samples to time for each synthetic dataset
+NUM_SAMPLES = 200
+
+
+class RandomFeatures(FeatureModule):
+    """
+    Feature extraction module which produces random features of a fixed shape.
+    """
+
+    def __init__(self, sample_rate, hop_length, shape):
+        """
+        Initialize parameters for the random features.
+
+        Parameters
+        ----------
+        See FeatureModule class for others...
+
+        shape : tuple of ints
+          Shape of the features of each frame (channels x bins)
+        """
+
+        super().__init__(sample_rate, hop_length, shape[0])
+
+        self.shape = shape
+
+    def process_audio(self, audio):
+        """
+        Get random features for a piece of audio.
+
+        Parameters
+        ----------
+        audio : ndarray
+          Mono-channel audio
+
+        Returns
+        ----------
+        feats : ndarray
+          Random features
+        """
+
+        # Generate features with the expected number of frames
+        feats = np.random.rand(*self.shape, self.get_expected_frames(audio)).astype(tools.FLOAT32)
+
+        return feats
+
+
+class SyntheticDataset(TranscriptionDataset):
+    """
+    Dataset of random audio and ground-truth which is never saved to disk.
+    """
+
+    def __init__(self, sample_rate, duration, data_proc, gt_shapes, num_frames, save_loc):
+        """
+        Initialize the synthetic dataset, storing all of the data in RAM.
+
+        Parameters
+        ----------
+        sample_rate : int or float
+          Number of samples per second of audio
+        duration : float
+          Duration of each track in seconds
+        data_proc : FeatureModule (features/common.py)
+          Feature extraction model to use for the dataset
+        gt_shapes : dict
+          Shape of each frame-level ground-truth entry, without the frame dimension
+        num_frames : int
+          Number of frames per data sample
+        save_loc : string
+          Location for saving and loading ground-truth and features (unused)
+        """
+
+        self.duration = duration
+        self.gt_shapes = gt_shapes
+
+        # Collect the arguments common to all datasets
+        kwargs = {'base_dir' : save_loc, 'splits' : ['synthetic'], 'hop_length' : data_proc.hop_length,
+                  'sample_rate' : sample_rate, 'data_proc' : data_proc, 'profile' : None,
+                  'num_frames' : num_frames, 'split_notes' : False, 'reset_data' : False,
+                  'store_data' : True, 'save_data' : False, 'save_loc' : save_loc, 'seed' : 0,
+                  'save_format' : 'npz', 'window_feats' : False, 'shared_store' : False,
+                  'cache_bytes' : 0, 'cache_policy' : 'lru'}
+
+        # Only pass the arguments supported by this revision, so that earlier revisions can also be measured
+        parameters = inspect.signature(TranscriptionDataset.__init__).parameters
+        kwargs = {key : kwargs[key] for key in kwargs.keys() if key in parameters}
+
+        super().__init__(**kwargs)
+
+    def get_tracks(self, split):
+        """
+        Get the names of the tracks in the synthetic dataset.
+
+        Parameters
+        ----------
+        split : string
+          Unused
+
+        Returns
+        ----------
+        tracks : list of strings
+          Names of tracks
+        """
+
+        tracks = [f'track_{i}' for i in range(NUM_TRACKS)]
+
+        return tracks
+
+    def load(self, track):
+        """
+        Generate random audio and frame-level ground-truth for a track.
+
+        Parameters
+        ----------
+        track : string
+          Synthetic track name
+
+        Returns
+        ----------
+        data : dict
+          Dictionary with random audio and ground-truth
+        """
+
+        # Generate random audio for the track
+        audio = np.random.rand(int(self.sample_rate * self.duration)).astype(tools.FLOAT32)
+
+        data = {tools.KEY_TRACK : track, tools.KEY_FS : self.sample_rate, tools.KEY_AUDIO : audio}
+
+        # Determine the number of frames of the ground-truth
+        num_frames = self.data_proc.get_expected_frames(audio)
+
+        for key, shape in self.gt_shapes.items():
+            # Generate sparse random activations for each ground-truth entry
+            data[key] = (np.random.rand(*shape, num_frames) > 0.9).astype(tools.FLOAT32)
+
+        return data
+
+    @staticmethod
+    def available_splits():
+        """
+        Obtain a list of possible splits.
+
+        Returns
+        ----------
+        splits : list of strings
+          The single synthetic split
+        """
+
+        splits = ['synthetic']
+
+        return splits
+
+    @staticmethod
+    def download(save_dir):
+        """
+        There is nothing to download for the synthetic dataset.
+
+        Parameters
+        ----------
+        save_dir : string
+          Unused
+        """
+
+        return
+
+
+def benchmark(name, sample_rate, duration, feats_shape, gt_shapes, num_frames):
+    """
+    Measure the time and peak memory of sampling from a synthetic dataset with stored data.
+
+    Parameters
+    ----------
+    name : string
+      Description of the synthetic dataset
+    sample_rate : int or float
+      Number of samples per second of audio
+    duration : float
+      Duration of each track in seconds
+    feats_shape : tuple of ints
+      Shape of the features of each frame (channels x bins)
+    gt_shapes : dict
+      Shape of each frame-level ground-truth entry, without the frame dimension
+    num_frames : int
+      Number of frames per data sample
+    """
+
+    # Seed the random number generator for the synthetic data
+    np.random.seed(0)
+
+    with tempfile.TemporaryDirectory() as save_loc:
+        # Instantiate the synthetic dataset, which stores the audio and ground-truth of each track
+        dataset = SyntheticDataset(sample_rate, duration,
+                                   RandomFeatures(sample_rate, 512, feats_shape),
+                                   gt_shapes, num_frames, save_loc)
+
+        for i in range(NUM_TRACKS):
+            # Sample each track once, so that its features are also stored
+            dataset[i]
+
+        # Start measuring memory and time
+        tracemalloc.start()
+        start = time.perf_counter()
+
+        for i in range(NUM_SAMPLES):
+            # Sample from each track in turn
+            dataset[i % NUM_TRACKS]
+
+        # Stop measuring memory and time
+        elapsed = (time.perf_counter() - start) / NUM_SAMPLES
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f'{name}: {elapsed * 1E3:.2f} ms/sample, peak traced memory {peak / 1E6:.1f} MB')
+
+
+if __name__ == '__main__':
+    # Track shapes resembling GuitarSet, with an HCQT and tablature
+    benchmark('GuitarSet-like (44.1 kHz, 30 s, 6x192 HCQT)', 44100, 30, (6, 192),
+              {tools.KEY_TABLATURE : (6,), tools.KEY_MULTIPITCH : (44,),
+               tools.KEY_ONSETS : (6,), tools.KEY_OFFSETS : (6,)}, 200)
+
+    # Track shapes resembling MAPS, with a Mel spectrogram and piano roll
+    benchmark('MAPS-like (16 kHz, 120 s, 229-bin mel, 88 keys)', 16000, 120, (1, 229),
+              {tools.KEY_MULTIPITCH : (88,), tools.KEY_ONSETS : (88,),
+               tools.KEY_OFFSETS : (88,)}, 625)
@@ -148,13 +148,12 @@ def onsets_frames_run(sample_rate, hop_length, num_frames, iterations, checkpoin
     test_splits = ['ENSTDkAm', 'ENSTDkCl']
 
     # Create a dataset corresponding to the MAPS testing partition
-    # Need to reset due to HTK Mel-Spectrogram spacing
     maps_test = MAPS(splits=test_splits,
                      hop_length=hop_length,
                      sample_rate=sample_rate,
                      data_proc=data_proc,
                      profile=profile,
-                     reset_data=True,
+                     reset_data=reset_data,
                      store_data=False)
 
     print('Initializing model...')
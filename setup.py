@@ -10,7 +10,7 @@ setup(
     author_email='fcwitkow@ur.rochester.edu',
     packages=find_packages(),
     python_requires='>=3.7',
-    install_requires=['numpy', 'librosa', 'torch', 'matplotlib',
+    install_requires=['numpy', 'librosa>=0.11.0', 'torch', 'matplotlib',
                       'sacred', 'mir_eval', 'jams', 'mido', 'requests',
                       'tqdm', 'tensorboardX', 'scipy', 'pandas', 'mirdata'],
     #scripts=['examples/of_1.py', 'examples/of_2.py', 'examples/tabcnn.py'],
@@ -0,0 +1,143 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from amt_tools.datasets import TranscriptionDataset
+
+import amt_tools.tools as tools
+
+# Regular imports
+import numpy as np
+import os
+
+
+class ToyDataset(TranscriptionDataset):
+    """
+    Dataset with a single track of random audio and notes, which is saved like any other dataset.
+    """
+
+    def __init__(self, base_dir=None, splits=None, hop_length=512, sample_rate=16000, data_proc=None,
+                 profile=None, num_frames=None, split_notes=False, reset_data=False, store_data=False,
+                 save_data=True, save_loc=None, seed=0, save_format='npz',
+                 window_feats=False, shared_store=False, cache_bytes=0, cache_policy='lru'):
+        """
+        Initialize the dataset and establish parameter defaults in function signature.
+
+        Parameters
+        ----------
+        See TranscriptionDataset class...
+        """
+
+        # Default the instrument profile to the piano
+        if profile is None:
+            profile = tools.PianoProfile()
+
+        super().__init__(base_dir, splits, hop_length, sample_rate, data_proc, profile,
+                         num_frames, split_notes, reset_data, store_data, save_data, save_loc, seed,
+                         save_format, window_feats, shared_store, cache_bytes, cache_policy)
+
+    def get_tracks(self, split):
+        """
+        Get the names of the tracks in a partition of the dataset.
+
+        Parameters
+        ----------
+        split : string
+          Name of the partition
+
+        Returns
+        ----------
+        tracks : list of strings
+          Names of tracks
+        """
+
+        tracks = ['track']
+
+        return tracks
+
+    def load(self, track):
+        """
+        Load the ground-truth from disk or generate it randomly.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track to load
+
+        Returns
+        ----------
+        data : dict
+          Dictionary with ground-truth for the track
+        """
+
+        # Load the track data if it was saved, otherwise instantiate track data
+        data = super().load(track)
+
+        # If the track data is being instantiated, it will not have the 'audio' key
+        if tools.KEY_AUDIO not in data.keys():
+            # Generate random audio and notes
+            rng = np.random.default_rng(0)
+            data[tools.KEY_AUDIO] = 0.1 * rng.standard_normal(2 * self.sample_rate).astype(tools.FLOAT32)
+            data[tools.KEY_FS] = self.sample_rate
+            pitches, intervals = np.array([60., 64.]), np.array([[0.2, 0.9], [0.5, 1.5]])
+
+            # Obtain the multi pitch array for the frames of the features
+            times = self.data_proc.get_times(data[tools.KEY_AUDIO])
+            data[tools.KEY_MULTIPITCH] = tools.notes_to_multi_pitch(pitches, intervals, times, self.profile)
+
+            # Save the data
+            self.save_entries(self.get_gt_dir(track), (tools.KEY_FS, tools.KEY_AUDIO, tools.KEY_MULTIPITCH),
+                              data[tools.KEY_FS], data[tools.KEY_AUDIO], data[tools.KEY_MULTIPITCH])
+
+        return data
+
+    @staticmethod
+    def available_splits():
+        """
+        Obtain a list of possible splits.
+
+        Returns
+        ----------
+        splits : list of strings
+          The single split
+        """
+
+        splits = ['toy']
+
+        return splits
+
+    @staticmethod
+    def download(save_dir):
+        """
+        There is nothing to download for the dataset.
+
+        Parameters
+        ----------
+        save_dir : string
+          Directory for the dataset
+        """
+
+        os.makedirs(save_dir, exist_ok=True)
+
+
+def test_ground_truth_keyed_on_configuration(tmp_path):
+    # Keyword arguments shared by each dataset
+    kwargs = dict(base_dir=str(tmp_path), save_loc=str(tmp_path), store_data=False)
+
+    # Save the ground-truth for a hop length and sampling rate
+    dataset = ToyDataset(hop_length=512, sample_rate=16000, **kwargs)
+    dataset.precompute_track('track')
+
+    # The same configuration should find the saved ground-truth
+    assert ToyDataset(hop_length=512, sample_rate=16000, **kwargs).get_gt_dir() == dataset.get_gt_dir()
+
+    for hop_length, sample_rate in [(256, 16000), (512, 22050)]:
+        # Construct the dataset with a different hop length or sampling rate
+        other = ToyDataset(hop_length=hop_length, sample_rate=sample_rate, **kwargs)
+
+        # The ground-truth should be kept separately
+        assert other.get_gt_dir() != dataset.get_gt_dir()
+
+        # The ground-truth should be computed again, such that it agrees with the features
+        data = other.get_track_data('track')
+        assert len(data[tools.KEY_AUDIO]) == 2 * sample_rate
+        assert data[tools.KEY_MULTIPITCH].shape[-1] == data[tools.KEY_FEATS].shape[-1]
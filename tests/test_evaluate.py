@@ -0,0 +1,118 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from amt_tools.evaluate import evaluate_frames_fast, PitchListEvaluator
+
+import amt_tools.tools as tools
+
+# Regular imports
+from mir_eval.multipitch import evaluate as evaluate_frames
+
+import numpy as np
+import pytest
+
+
+def random_pitch_list(rng, num_frames, num_pitches, density):
+    """
+    Generate a list of random discrete pitches active within each frame.
+
+    Parameters
+    ----------
+    rng : Generator
+      Random number generator
+    num_frames : int
+      Number of frames
+    num_pitches : int
+      Number of distinct pitches, beginning at MIDI pitch 21
+    density : float
+      Probability of each pitch being active within each frame
+
+    Returns
+    ----------
+    pitch_list : list of ndarray (N x [...])
+      Array of pitches (MIDI) active within each frame
+      N - number of frames
+    """
+
+    pitch_list = [np.sort(rng.choice(num_pitches, rng.binomial(num_pitches, density), replace=False) + 21.)
+                  for _ in range(num_frames)]
+
+    return pitch_list
+
+
+def assert_results_close(results, expected):
+    """
+    Check that two (possibly nested) dictionaries of results match up to floating-point error.
+
+    Parameters
+    ----------
+    results : dict
+      Dictionary of results to check
+    expected : dict
+      Dictionary of expected results
+    """
+
+    # The same results should be reported in the same order
+    assert list(results.keys()) == list(expected.keys())
+
+    for key in expected.keys():
+        if isinstance(expected[key], dict):
+            # Check the nested results
+            assert_results_close(results[key], expected[key])
+        else:
+            # Each result should match up to floating-point error
+            assert np.isclose(results[key], expected[key], rtol=0, atol=1E-12)
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_evaluate_frames_fast_matches_mir_eval(seed):
+    # Initialize a random number generator
+    rng = np.random.default_rng(seed)
+
+    # Choose the number of frames (possibly none), the pitch range, and the density of active pitches
+    num_frames, num_pitches = int(rng.integers(0, 60)), int(rng.integers(1, 30))
+    density = rng.uniform(0, 0.4)
+
+    # Generate the times and random pitches of the reference and estimate
+    ref_times = np.arange(num_frames) * 512 / 16000
+    ref_pitches = random_pitch_list(rng, num_frames, num_pitches, density)
+    est_times = ref_times.copy()
+    est_pitches = random_pitch_list(rng, num_frames, num_pitches, density)
+
+    if seed % 4 == 1 and num_frames > 0:
+        # Add duplicate pitches to the first frame
+        est_pitches[0] = np.array([60., 60., 72.])
+    if seed % 4 == 2 and num_frames > 2:
+        # Misalign the time grids
+        est_times = est_times + 0.003
+    if seed % 4 == 3 and num_frames > 0:
+        # Add a continuous pitch to the final frame
+        est_pitches[-1] = np.append(est_pitches[-1], 60.3)
+
+    # Compute the metrics with and without the fast path
+    fast_metrics = evaluate_frames_fast(ref_times, ref_pitches, est_times, est_pitches)
+    metrics = evaluate_frames(ref_times, tools.pitch_list_to_hz(ref_pitches),
+                              est_times, tools.pitch_list_to_hz(est_pitches))
+
+    # The same metrics should be computed in the same order and match
+    assert_results_close(fast_metrics, metrics)
+
+
+@pytest.mark.parametrize('extended', [False, True])
+def test_pitch_list_evaluator_fast_frames(extended):
+    # Initialize a random number generator
+    rng = np.random.default_rng(0)
+
+    # Generate random pitch lists for the reference and estimate on a shared time grid
+    times = np.arange(2000) * 512 / 16000
+    ref_pitches = random_pitch_list(rng, len(times), 88, 0.05)
+    est_pitches = random_pitch_list(rng, len(times), 88, 0.05)
+
+    # Evaluate the estimate with and without the fast path
+    fast_results = PitchListEvaluator(fast_frames=True, extended=extended).evaluate((times, est_pitches),
+                                                                                  (times, ref_pitches))
+    results = PitchListEvaluator(fast_frames=False, extended=extended).evaluate((times, est_pitches),
+                                                                               (times, ref_pitches))
+
+    # The fast path should produce the same results
+    assert_results_close(fast_results, results)
@@ -0,0 +1,267 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from amt_tools.features import *
+
+# Regular imports
+import numpy as np
+import pickle
+import pytest
+import os
+
+
+def get_audio(sample_rate, seconds=6, seed=0):
+    """
+    Generate a deterministic piece of audio containing noise and a few sinusoids.
+
+    Parameters
+    ----------
+    sample_rate : int
+      Number of samples per second of audio
+    seconds : float
+      Duration of the audio in seconds
+    seed : int
+      Seed for the random number generator
+
+    Returns
+    ----------
+    audio : ndarray
+      Mono-channel audio
+    """
+
+    # Initialize a random number generator
+    rng = np.random.default_rng(seed)
+
+    # Determine the time of each sample
+    times = np.arange(int(seconds * sample_rate)) / sample_rate
+
+    # Mix a few sinusoids with some noise
+    audio = sum(np.sin(2 * np.pi * f * times) for f in [55., 220., 1000.])
+    audio = (audio + 0.1 * rng.standard_normal(len(times))).astype(np.float32)
+
+    return audio
+
+
+# Feature extraction modules which do not convert to decibels, so that a
+# slice of the track is scaled in the same way as the full track
+modules = {
+    'stft' : lambda : STFT(sample_rate=16000, hop_length=512, decibels=False),
+    'mel' : lambda : MelSpec(sample_rate=16000, hop_length=512, decibels=False),
+    'cqt' : lambda : CQT(sample_rate=22050, hop_length=512, decibels=False),
+    'vqt' : lambda : VQT(sample_rate=22050, hop_length=512, gamma=5, decibels=False),
+    'hvqt' : lambda : HVQT(sample_rate=22050, hop_length=512, harmonics=[0.5, 1, 2],
+                           n_bins=60, decibels=False),
+}
+
+
+@pytest.mark.parametrize('name', modules.keys())
+@pytest.mark.parametrize('frame_start', [0, 700, 901])
+def test_process_frames_matches_process_audio(name, frame_start):
+    # Construct the feature extraction module
+    module = modules[name]()
+
+    # Obtain audio at the sampling rate of the module
+    audio = get_audio(module.sample_rate, seconds=30)
+
+    # Make sure the receptive field is known for this module
+    assert module.get_receptive_field() is not None
+
+    # Compute the features for the full track
+    full_feats = module.process_audio(audio)
+
+    # Compute the features only for a range of frames
+    num_frames = 20
+    frame_feats = module.process_frames(audio, frame_start, num_frames)
+
+    # Slice the features of the full track to the same range of frames
+    full_feats = full_feats[..., frame_start : frame_start + num_frames]
+
+    if isinstance(module, (STFT, MelSpec)):
+        # Features without resampling should match exactly
+        np.testing.assert_array_equal(frame_feats, full_feats)
+    else:
+        # The soxr_hq resampler is only precise to 20 bits, and its rounding depends on
+        # where the signal starts, so allow a few times that precision relative to the peak
+        np.testing.assert_allclose(frame_feats, full_feats, rtol=0, atol=2 ** -18 * np.max(full_feats))
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'gamma' : 5}, {'sample_rate' : 44100, 'hop_length' : 1024}])
+def test_vqt_without_private_helpers(kwargs, monkeypatch):
+    # Construct a module which computes the VQT with a transform plan
+    planned = VQT(decibels=False, **kwargs)
+
+    # Obtain audio at the sampling rate of the module
+    audio = get_audio(planned.sample_rate)
+
+    # Determine the number of downsamples computed by librosa
+    early_ds_count = planned.get_early_ds_count()
+
+    # Pretend the private helpers of librosa are unavailable
+    monkeypatch.setattr('amt_tools.features.vqt.early_downsample_count', None)
+    monkeypatch.setattr('amt_tools.features.vqt.relative_bandwidth', None)
+
+    # Construct a module which must fall back to librosa.vqt
+    fallback = VQT(decibels=False, **kwargs)
+
+    # Make sure no plan was computed and that the same number of downsamples is used
+    assert fallback.plan is None
+    assert fallback.get_early_ds_count() == early_ds_count
+
+    # The plan should produce the same features as librosa.vqt
+    np.testing.assert_array_equal(fallback.process_audio(audio), planned.process_audio(audio))
+
+
+@pytest.mark.parametrize('use_processes', [False, True])
+def test_workers_match_serial(use_processes):
+    # Construct feature extraction modules which compute their inner modules in order
+    serial = [HVQT(harmonics=[0.5, 1, 2], n_bins=60),
+              FeatureCombo([CQT(), VQT(gamma=5)])]
+    # Construct the same modules computing their inner modules with workers
+    workers = [HVQT(harmonics=[0.5, 1, 2], n_bins=60, num_workers=2, use_processes=use_processes),
+               FeatureCombo([CQT(), VQT(gamma=5)], num_workers=2, use_processes=use_processes)]
+
+    # Obtain audio at the sampling rate of the modules
+    audio = get_audio(22050)
+
+    for serial_module, workers_module in zip(serial, workers):
+        # The workers should not change the features
+        np.testing.assert_array_equal(workers_module.process_audio(audio), serial_module.process_audio(audio))
+
+        # Obtain the pool of workers created for the first piece of audio
+        executor = workers_module.executor
+
+        # The same pool should be reused for the next piece of audio
+        np.testing.assert_array_equal(workers_module.process_audio(audio[::-1]), serial_module.process_audio(audio[::-1]))
+        assert workers_module.executor is executor
+
+        # The pool should be left out when the module is copied
+        assert pickle.loads(pickle.dumps(workers_module)).executor is None
+
+        # Split the audio into blocks, as if it were being streamed
+        blocks = np.array_split(audio, 7)
+
+        if use_processes:
+            with pytest.raises(ValueError):
+                # The running reference would be lost within the processes
+                list(workers_module.process_audio_stream(blocks))
+        else:
+            # The running reference should be maintained across the threads
+            np.testing.assert_array_equal(np.concatenate(list(workers_module.process_audio_stream(blocks)), axis=-1),
+                                          np.concatenate(list(serial_module.process_audio_stream(blocks)), axis=-1))
+
+
+# Feature extraction modules which convert to decibels with a fixed reference,
+# such that the features do not depend on the rest of the signal
+fixed_ref_modules = {
+    'stft' : lambda : STFT(sample_rate=16000, hop_length=512, db_ref=1.),
+    'mel' : lambda : MelSpec(sample_rate=16000, hop_length=512, db_ref=1.),
+    'cqt' : lambda : CQT(sample_rate=22050, hop_length=512, db_ref=1.),
+    'hvqt' : lambda : HVQT(sample_rate=22050, hop_length=512, harmonics=[0.5, 1, 2],
+                           n_bins=60, db_ref=1.),
+    'combo' : lambda : FeatureCombo([CQT(sample_rate=22050, hop_length=512, db_ref=1.),
+                                     VQT(sample_rate=22050, hop_length=512, gamma=5, db_ref=1.)]),
+}
+
+
+@pytest.mark.parametrize('name', fixed_ref_modules.keys())
+@pytest.mark.parametrize('block_size', [100, 1000, 22050])
+def test_process_audio_stream_matches_process_audio(name, block_size):
+    # Construct the feature extraction module
+    module = fixed_ref_modules[name]()
+
+    # Obtain audio at the sampling rate of the module
+    audio = get_audio(module.get_sample_rate())
+
+    # Compute the features for the full track
+    full_feats = module.process_audio(audio)
+
+    # Split the audio into blocks, which may be shorter than the FFT window
+    blocks = [audio[i : i + block_size] for i in range(0, len(audio), block_size)]
+
+    # Compute the features for the blocks as they are streamed
+    stream_feats = np.concatenate(list(module.process_audio_stream(blocks)), axis=-1)
+
+    # Convert the features (scaled from -80 to 0 dB) back to decibels
+    full_db, stream_db = 80 * (full_feats - 1), 80 * (stream_feats - 1)
+
+    if isinstance(module, (STFT, MelSpec)):
+        # Features without resampling should only differ by rounding
+        np.testing.assert_allclose(stream_db, full_db, rtol=0, atol=1E-4)
+    else:
+        # The resampling precision (see test_process_frames_matches_process_audio)
+        # only becomes noticeable far below the peak
+        np.testing.assert_allclose(stream_db, full_db, rtol=0, atol=5E-2)
+        # Bins within 40 dB of the peak should be much closer
+        significant = full_db > np.max(full_db) - 40
+        np.testing.assert_allclose(stream_db[significant], full_db[significant], rtol=0, atol=1E-2)
+
+
+def test_vqt_plan_round_trip(tmp_path, monkeypatch):
+    # Obtain some audio
+    audio = get_audio(22050)
+
+    # Construct a module which computes its plan and saves it (without the extension)
+    plan_path = str(tmp_path / 'plans' / 'vqt')
+    saved = VQT(gamma=5, plan_path=plan_path)
+
+    # Make sure the plan was saved, with the extension added
+    assert saved.plan_path == plan_path + '.npz'
+    assert os.path.exists(saved.plan_path)
+
+    # Make sure the plan is not computed again
+    monkeypatch.setattr(VQT, 'build_plan', lambda self: pytest.fail('Plan was computed instead of loaded'))
+
+    # Construct a module which loads the saved plan
+    loaded = VQT(gamma=5, plan_path=plan_path)
+
+    # The loaded plan should produce the same features
+    np.testing.assert_array_equal(loaded.process_audio(audio), saved.process_audio(audio))
+
+    # Allow the plan to be computed again
+    monkeypatch.undo()
+
+    with pytest.warns(RuntimeWarning):
+        # Construct a module with a different configuration, pointing to the saved plan
+        mismatched = VQT(gamma=10, plan_path=plan_path)
+
+    # The plan should have been computed for the new configuration
+    np.testing.assert_array_equal(mismatched.process_audio(audio), VQT(gamma=10).process_audio(audio))
+
+
+def test_hvqt_plan_paths(tmp_path):
+    # Obtain some audio
+    audio = get_audio(22050)
+
+    # Construct a module which saves the plan of each harmonic
+    plan_path = str(tmp_path / 'hvqt.npz')
+    saved = HVQT(harmonics=[0.5, 1, 2], n_bins=60, plan_path=plan_path)
+
+    # Make sure there is a separate plan for each harmonic
+    for h, module in zip(saved.harmonics, saved.modules):
+        assert module.plan_path == str(tmp_path / f'hvqt_h{h}.npz')
+        assert os.path.exists(module.plan_path)
+
+    # Construct a module which loads the saved plans
+    loaded = HVQT(harmonics=[0.5, 1, 2], n_bins=60, plan_path=plan_path)
+
+    # The loaded plans should produce the same features
+    np.testing.assert_array_equal(loaded.process_audio(audio), saved.process_audio(audio))
+
+    # The plans should not affect the configuration
+    assert loaded.get_config_hash() == HVQT(harmonics=[0.5, 1, 2], n_bins=60).get_config_hash()
+
+
+def test_vqt_unpickled_without_plan():
+    # Obtain some audio
+    audio = get_audio(22050)
+
+    # Construct a module and remove the fields added along with plans
+    module = VQT(gamma=5)
+    del module.plan, module.plan_path
+
+    # Copy the module as if it were saved before plans existed
+    module = pickle.loads(pickle.dumps(module))
+
+    # The module should fall back to librosa.vqt, which produces the same features
+    assert module.plan is None and module.plan_path is None
+    np.testing.assert_array_equal(module.process_audio(audio), VQT(gamma=5).process_audio(audio))
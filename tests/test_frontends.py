@@ -0,0 +1,67 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from amt_tools.features.frontends import *
+from amt_tools.features import *
+
+from test_features import get_audio
+
+# Regular imports
+import numpy as np
+import pytest
+import torch
+
+
+# Feature extraction modules which do not convert to decibels, paired with their frontends
+frontends = {
+    'stft' : lambda : STFTFrontend(STFT(sample_rate=16000, hop_length=512, decibels=False)),
+    'mel' : lambda : MelSpecFrontend(MelSpec(sample_rate=16000, hop_length=512, decibels=False)),
+    'cqt' : lambda : VQTFrontend(CQT(sample_rate=22050, hop_length=512, decibels=False)),
+    'vqt' : lambda : VQTFrontend(VQT(sample_rate=22050, hop_length=512, gamma=5, decibels=False)),
+    'hvqt' : lambda : HVQTFrontend(HVQT(sample_rate=22050, hop_length=512, harmonics=[0.5, 1, 2],
+                                        n_bins=60, decibels=False)),
+}
+
+
+@pytest.mark.parametrize('name', frontends.keys())
+def test_frontend_matches_module(name):
+    # Construct the frontend along with its feature extraction module
+    frontend = frontends[name]()
+    module = frontend.module
+
+    # Obtain audio at the sampling rate of the module
+    audio = get_audio(module.sample_rate)
+
+    # Compute the features with the feature extraction module
+    module_feats = module.process_audio(audio)
+
+    with torch.no_grad():
+        # Compute the features for a batch containing the audio with the frontend
+        frontend_feats = frontend(torch.from_numpy(audio)[None, None]).numpy()[0]
+
+    # Stack any harmonics along the channel dimension, as the frontend does
+    module_feats = module_feats.reshape(frontend_feats.shape)
+
+    if isinstance(module, (STFT, MelSpec)):
+        # The same filters are applied to the same STFT, so only rounding should differ
+        np.testing.assert_allclose(frontend_feats, module_feats, rtol=0, atol=1e-6 * np.max(module_feats))
+    else:
+        # The resampler of librosa handles the boundaries of the audio slightly differently
+        # when downsampling by more than 2 before processing, so leave out the edge frames
+        frontend_feats, module_feats = frontend_feats[..., 2 : -2], module_feats[..., 2 : -2]
+
+        # Only consider bins which are not negligible compared to the peak
+        mask = module_feats > 0.01 * np.max(module_feats)
+
+        # The same filters are applied to the same downsampled audio, so only rounding should differ
+        np.testing.assert_allclose(frontend_feats[mask], module_feats[mask], rtol=1e-3, atol=0)
+
+
+def test_vqt_frontend_requires_plan():
+    # Construct a module whose transform plan could not be built
+    module = CQT(sample_rate=22050, hop_length=512)
+    module.plan = None
+
+    with pytest.raises(ValueError):
+        # The frontend cannot obtain the filters of the module
+        VQTFrontend(module)
@@ -0,0 +1,235 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from amt_tools.tools import constants
+from amt_tools.tools.io import load_notes_midi
+
+# Regular imports
+import numpy as np
+import pytest
+import mido
+
+
+def load_notes_midi_two_pass(midi_path):
+    """
+    Previous implementation of load_notes_midi, which first collects all note and
+    sustain pedal events, and then scans the remaining events to find each offset.
+
+    Parameters
+    ----------
+    midi_path : string
+      Path to MIDI file to read
+
+    Returns
+    ----------
+    batched_notes : ndarray (N x 4)
+      Array of note pitches, intervals, and velocities by row
+      N - number of notes
+    """
+
+    # Open the MIDI file
+    midi = mido.MidiFile(midi_path)
+
+    # Initialize a counter for the time
+    time = 0
+
+    # Keep track of sustain pedal activity
+    sustain_status = False
+
+    # Initialize an empty list to store MIDI events
+    events = []
+
+    # Loop through MIDI messages, keeping track of only those pertaining to notes and sustain pedal activity
+    for message in midi:
+        # Increment the time
+        time += message.time
+
+        # Check if the message constitutes a control change event
+        if message.type == constants.MIDI_CONTROL_CHANGE:
+            # Whether the message constitutes a sustain control event
+            sustain_control = message.control == constants.MIDI_SUSTAIN_CONTROL_NUM
+
+            # Value >= 64 means SUSTAIN_ON and value < 64 means SUSTAIN OFF
+            sustain_on = message.value >= constants.MIDI_SUSTAIN_CONTROL_NUM
+
+            # Whether the current status of the sustain pedal was actually changed
+            sustain_change = sustain_on != sustain_status
+
+            # Check if the above two conditions were met (sustain control and status change)
+            if sustain_control and sustain_change:
+                # Update the status of the sustain pedal (on/off)
+                sustain_status = sustain_on
+                # Determine which event occurred (SUSTAIN_ON or SUSTAIN_OFF)
+                event_type = constants.MIDI_SUSTAIN_ON if sustain_status else constants.MIDI_SUSTAIN_OFF
+
+                # Create a new event detailing the sustain pedal activity
+                event = dict(index=len(events),
+                             time=time,
+                             type=event_type,
+                             note=None,
+                             velocity=0)
+                # Add the sustain pedal event to the MIDI event list
+                events.append(event)
+
+        # Check if the message constitutes a note event (NOTE_ON or NOTE_OFF)
+        if 'note' in message.type:
+            # MIDI offsets can be either NOTE_OFF events or NOTE_ON with zero velocity
+            velocity = message.velocity if message.type == constants.MIDI_NOTE_ON else 0
+
+            # Create a new event detailing the note and current sustain pedal state
+            event = dict(index=len(events),
+                         time=time,
+                         type='note',
+                         note=message.note,
+                         velocity=velocity,
+                         sustain=sustain_status)
+            # Add the note event to the MIDI event list
+            events.append(event)
+
+    # Initialize an empty list to store notes
+    notes = list()
+
+    # Loop through all of the documented MIDI events
+    for i, onset in enumerate(events):
+        # Ignore anything but note onset events (note offsets and sustain activity ignored)
+        if onset['velocity'] == 0:
+            continue
+
+        # Determine where the corresponding offset occurs
+        # by finding the next note event with the same pitch,
+        # clipping at the final frame if no correspondence is found
+        offset = next(n for n in events[i + 1:] if n['note'] == onset['note'] or n is events[-1])
+
+        # Check if the sustain pedal is on when the note offset occurs
+        if offset['sustain'] and offset is not events[-1]:
+            # If so, offset is when sustain ends or another note event of same pitch occurs
+            offset = next(n for n in events[offset['index'] + 1:] if n['type'] == constants.MIDI_SUSTAIN_OFF or
+                          n['note'] == onset['note'] or n is events[-1])
+
+        # Create a new note entry and append it to the list of notes
+        notes.append([onset['time'], offset['time'], onset['note'], onset['velocity']])
+
+    # Package the notes into an array
+    notes = np.array(notes)
+
+    return notes
+
+
+def write_midi(path, events):
+    """
+    Write a single-track MIDI file from a list of timed messages.
+
+    Parameters
+    ----------
+    path : string
+      Path to the MIDI file to write
+    events : list of (int, mido.Message)
+      Absolute time in ticks and message for each event, in order
+    """
+
+    # Initialize a MIDI file with a single track
+    midi = mido.MidiFile(ticks_per_beat=480)
+    track = mido.MidiTrack()
+    midi.tracks.append(track)
+
+    # Keep track of the time of the previous message
+    last_time = 0
+
+    for time, message in events:
+        # Add the message with the time relative to the previous message
+        track.append(message.copy(time=time - last_time))
+        last_time = time
+
+    midi.save(path)
+
+
+def note_on(pitch, velocity=80):
+    """
+    Construct a NOTE_ON message.
+    """
+
+    return mido.Message('note_on', note=pitch, velocity=velocity)
+
+
+def note_off(pitch):
+    """
+    Construct a NOTE_OFF message.
+    """
+
+    return mido.Message('note_off', note=pitch, velocity=0)
+
+
+def sustain(value):
+    """
+    Construct a sustain pedal control change message.
+    """
+
+    return mido.Message('control_change', control=constants.MIDI_SUSTAIN_CONTROL_NUM, value=value)
+
+
+# Hand-written performances covering specific cases, each ending
+# with an offset, since the previous implementation required it
+cases = {
+    'overlapping pitches' : [(0, note_on(60)), (100, note_on(64)), (200, note_off(60)),
+                             (300, note_on(67)), (400, note_off(64)), (500, note_off(67))],
+    'restruck pitch' : [(0, note_on(60)), (100, note_on(60, 90)), (200, note_off(60)),
+                        (300, note_on(62)), (400, note_off(62))],
+    'zero-length notes' : [(0, note_on(60)), (0, note_off(60)), (100, note_on(62)),
+                           (100, note_off(62)), (100, note_on(64)), (200, note_off(64))],
+    'sustained offsets' : [(0, note_on(60)), (50, sustain(127)), (100, note_off(60)),
+                           (150, note_on(62)), (200, note_off(62)), (300, sustain(0)),
+                           (400, note_on(64)), (500, note_off(64))],
+    'restruck while sustained' : [(0, sustain(100)), (10, note_on(60)), (100, note_off(60)),
+                                  (200, note_on(60, 50)), (250, note_off(60)), (300, note_on(65)),
+                                  (350, sustain(20)), (400, note_off(65))],
+    'repeated pedal values' : [(0, sustain(64)), (10, note_on(60)), (20, sustain(127)),
+                               (30, note_off(60)), (40, sustain(63)), (50, sustain(0)),
+                               (60, note_on(61)), (70, note_off(61))],
+}
+
+
+@pytest.mark.parametrize('name', cases.keys())
+def test_load_notes_midi_cases(name, tmp_path):
+    # Write the performance to a MIDI file
+    path = str(tmp_path / 'case.mid')
+    write_midi(path, cases[name])
+
+    # The notes should match those of the previous implementation exactly
+    np.testing.assert_array_equal(load_notes_midi(path), load_notes_midi_two_pass(path))
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_load_notes_midi_random(seed, tmp_path):
+    # Initialize a random number generator
+    rng = np.random.default_rng(seed)
+
+    # Initialize a list to hold the events
+    events = []
+
+    for _ in range(200):
+        # Choose the onset time and duration (possibly zero) of a note with a narrow
+        # range of pitches, such that notes of the same pitch frequently overlap
+        onset, duration = int(rng.integers(0, 20000)), int(rng.integers(0, 1000))
+        pitch = int(rng.integers(60, 72))
+
+        # Offsets are either NOTE_OFF events or NOTE_ON events with zero velocity
+        offset = note_off(pitch) if rng.random() < 0.5 else note_on(pitch, 0)
+
+        events += [(onset, note_on(pitch, int(rng.integers(1, 128)))), (onset + duration, offset)]
+
+        if rng.random() < 0.5:
+            # Add a sustain pedal event with a random value
+            events.append((int(rng.integers(0, 20000)), sustain(int(rng.choice([0, 30, 64, 100, 127])))))
+
+    # Sort the events by time, placing offsets before onsets occurring at the same time
+    events.sort(key=lambda event : (event[0], event[1].type == 'note_on' and event[1].velocity > 0))
+
+    # End with an offset of a pitch which is never played
+    events.append((events[-1][0] + 10, note_off(100)))
+
+    # Write the performance to a MIDI file
+    path = str(tmp_path / 'random.mid')
+    write_midi(path, events)
+
+    # The notes should match those of the previous implementation exactly
+    np.testing.assert_array_equal(load_notes_midi(path), load_notes_midi_two_pass(path))
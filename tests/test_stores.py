@@ -0,0 +1,83 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from amt_tools.datasets.stores import SharedTrackStore
+
+# Regular imports
+import numpy as np
+import subprocess
+import sys
+import gc
+import os
+
+
+def test_shared_store_removes_file(tmp_path):
+    # Create a store and add a track to it
+    store = SharedTrackStore(SharedTrackStore.get_store_path(str(tmp_path)))
+    store.add('track', {'entry' : np.arange(10)})
+    store.finalize()
+
+    # Make sure the file was written
+    path = store.path
+    assert os.path.exists(path)
+
+    # The file should be removed once the store is garbage-collected
+    del store
+    gc.collect()
+    assert not os.path.exists(path)
+
+
+def test_shared_store_removes_stale_files(tmp_path):
+    # Script which creates a store and is then killed before it can clean up
+    script = ('import os, signal, numpy as np\n'
+              'from amt_tools.datasets.stores import SharedTrackStore\n'
+              f'store = SharedTrackStore(SharedTrackStore.get_store_path({str(tmp_path)!r}))\n'
+              'store.add("track", {"entry" : np.arange(10)})\n'
+              'store.finalize()\n'
+              'os.kill(os.getpid(), signal.SIGKILL)\n')
+
+    # Run the script in a separate process, from the root of the repository
+    subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    # The file of the killed process should be left behind
+    assert len(os.listdir(tmp_path)) == 1
+
+    # The file should be removed when a new store is created in the same directory
+    store = SharedTrackStore(SharedTrackStore.get_store_path(str(tmp_path)))
+    assert os.listdir(tmp_path) == [os.path.basename(store.path)]
+
+
+def test_shared_store_keeps_files_in_use(tmp_path):
+    # Script which creates a store and keeps it until its input is closed
+    script = ('import sys, numpy as np\n'
+              'from amt_tools.datasets.stores import SharedTrackStore\n'
+              f'store = SharedTrackStore(SharedTrackStore.get_store_path({str(tmp_path)!r}))\n'
+              'store.add("track", {"entry" : np.arange(10)})\n'
+              'store.finalize()\n'
+              'print(store.path, flush=True)\n'
+              'sys.stdin.read()\n')
+
+    # Run the script in a separate process, from the root of the repository
+    process = subprocess.Popen([sys.executable, '-c', script], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), text=True)
+
+    # Wait for the store of the other process to be created
+    path = process.stdout.readline().strip()
+
+    # Leave behind a file which is not in use, named as if it belonged to this (running) process
+    unused_path = SharedTrackStore.get_store_path(str(tmp_path))
+    open(unused_path, 'wb').close()
+
+    # Create a store in the same directory
+    store = SharedTrackStore(SharedTrackStore.get_store_path(str(tmp_path)))
+
+    # The file of the other store should be kept, regardless of process IDs
+    assert os.path.exists(path)
+    # The file which is not in use should be removed, even though its process is running
+    assert not os.path.exists(unused_path)
+
+    # Let the other process finish
+    process.communicate('')
+
+    # The other process should have removed its own file
+    assert not os.path.exists(path)
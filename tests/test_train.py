@@ -0,0 +1,120 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from amt_tools.evaluate import ComboEvaluator, MultipitchEvaluator, NoteEvaluator
+from amt_tools.transcribe import NoteTranscriber
+from amt_tools.train import ActivationStore, sweep_track
+from amt_tools.features import MelSpec
+
+import amt_tools.tools as tools
+
+# Regular imports
+from types import SimpleNamespace
+from itertools import product
+
+import numpy as np
+import torch
+
+
+def test_sweep_track_matches_note_transcriber():
+    # Initialize a random number generator
+    rng = np.random.default_rng(0)
+
+    # Use a standard piano
+    profile = tools.PianoProfile()
+
+    # Generate random notes for a 20 second track
+    onsets = np.sort(rng.uniform(0, 19, 60))
+    intervals = np.stack((onsets, onsets + rng.uniform(0.02, 1.0, 60)), axis=-1)
+    pitches = rng.integers(21, 109, 60).astype(tools.FLOAT32)
+
+    # Obtain the ground-truth multi pitch and onsets on a grid of frames
+    times = np.arange(0, 20, 512 / 16000)
+    multi_pitch = tools.notes_to_multi_pitch(pitches, intervals, times, profile)
+    onsets = tools.multi_pitch_to_onsets(multi_pitch)
+
+    # Package the ground-truth for evaluation
+    track = {tools.KEY_MULTIPITCH : multi_pitch, tools.KEY_NOTES : tools.notes_to_batched_notes(pitches, intervals),
+             tools.KEY_TIMES : times}
+
+    # Corrupt the ground-truth with noise to obtain un-thresholded activations
+    activations = {tools.KEY_MULTIPITCH : np.clip(0.7 * multi_pitch + rng.uniform(0, 0.5, multi_pitch.shape), 0, 1),
+                   tools.KEY_ONSETS : np.clip(0.6 * onsets + rng.uniform(0, 0.45, onsets.shape), 0, 1),
+                   tools.KEY_TIMES : times}
+
+    # Define the grid of post-processing parameters
+    grid = ([None, 0.3, 0.6], [0.4, 0.5, 0.7], [None, 0.05, 0.2], [None, 0.05, 0.1])
+
+    # Initialize an evaluator with no tracked results
+    evaluator = ComboEvaluator([MultipitchEvaluator(), NoteEvaluator(), NoteEvaluator(0.2)])
+    evaluator.reset_results()
+
+    # Evaluate every combination of parameters at once
+    sweep_evaluators = sweep_track(activations, track, 'track', profile, evaluator, *grid)
+
+    # Loop through the combinations of parameters
+    for i, (onset_threshold, frame_threshold, inhibition_window, minimum_duration) in enumerate(product(*grid)):
+        # Threshold the activations as the output layers of a model would
+        predictions = {tools.KEY_MULTIPITCH : tools.threshold_activations(activations[tools.KEY_MULTIPITCH].copy(),
+                                                                          frame_threshold),
+                       tools.KEY_TIMES : times}
+
+        if onset_threshold is not None:
+            # Add the thresholded onsets
+            predictions[tools.KEY_ONSETS] = tools.threshold_activations(activations[tools.KEY_ONSETS].copy(),
+                                                                        onset_threshold)
+
+        # Transcribe the notes with the parameters of the combination
+        predictions.update(NoteTranscriber(profile, inhibition_window=inhibition_window,
+                                           minimum_duration=minimum_duration).process_track(predictions))
+
+        # Evaluate the notes with a fresh evaluator
+        point_evaluator = ComboEvaluator([MultipitchEvaluator(), NoteEvaluator(), NoteEvaluator(0.2)])
+        point_evaluator.reset_results()
+        point_evaluator.get_track_results(predictions, track, 'track')
+
+        # The sweep should produce the same results for the combination
+        assert sweep_evaluators[i].average_results() == point_evaluator.average_results()
+
+
+def test_activation_store_checkpoints(tmp_path):
+    # Construct a small model at some iteration
+    torch.manual_seed(0)
+    model = torch.nn.Linear(8, 4)
+    model.iter = 500
+
+    # Construct a stand-in for a dataset with everything its frames depend on
+    dataset = SimpleNamespace(data_proc=MelSpec(sample_rate=16000, hop_length=512),
+                              sample_rate=16000, hop_length=512)
+
+    # Initialize a store and identify the raw output of the model for the dataset
+    store = ActivationStore(str(tmp_path))
+    checkpoint = store.get_checkpoint(model, dataset)
+
+    # The identity should be stable
+    assert store.get_checkpoint(model, dataset) == checkpoint
+
+    # Save some raw output for a track
+    raw_output = {tools.KEY_MULTIPITCH : np.random.rand(88, 100).astype(np.float32)}
+    times = np.arange(100) * 512 / 16000
+    store.save(checkpoint, 'track', raw_output, times)
+
+    # The raw output should be replayed for the same model and dataset
+    assert store.is_saved(store.get_checkpoint(model, dataset), 'track')
+    loaded_output, loaded_times = store.load(checkpoint, 'track')
+    np.testing.assert_array_equal(loaded_output[tools.KEY_MULTIPITCH], raw_output[tools.KEY_MULTIPITCH])
+    np.testing.assert_array_equal(loaded_times, times)
+
+    # A different model at the same iteration (e.g. from another run)
+    other_model = torch.nn.Linear(8, 4)
+    other_model.iter = 500
+    assert not store.is_saved(store.get_checkpoint(other_model, dataset), 'track')
+
+    # The same tracks with a different feature configuration
+    other_features = SimpleNamespace(data_proc=MelSpec(sample_rate=16000, hop_length=512, n_mels=128),
+                                     sample_rate=16000, hop_length=512)
+    assert not store.is_saved(store.get_checkpoint(model, other_features), 'track')
+
+    # The same tracks with a different hop length for the frames
+    other_hop = SimpleNamespace(data_proc=dataset.data_proc, sample_rate=16000, hop_length=256)
+    assert not store.is_saved(store.get_checkpoint(model, other_hop), 'track')